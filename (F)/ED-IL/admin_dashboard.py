@@ -1,9 +1,16 @@
 # admin_dashboard.py - Modern Admin Dashboard with New Frontend
-from flask import Blueprint, render_template, redirect, url_for, request, session, flash
+from flask import Blueprint, current_app, render_template, redirect, url_for, request, session, flash
 import datetime
+import sessions
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
+# The running portal (data lists, indexes, helpers), registered by app.py.
+# Views go through this instead of importing app: under `python app.py` that
+# import would load a second copy of the module and its data.
+def portal():
+    return current_app.extensions['portal']
+
 # Helper function to check if admin is logged in
 def require_admin():
     if not session.get('admin_logged_in'):
@@ -22,6 +29,7 @@ def login():
         # Simple authentication (replace with your actual auth logic)
         # For demo: admin@example.com / admin123
         if email == 'admin@example.com' and password == 'admin123':
+            sessions.regenerate(session)
             session['admin_logged_in'] = True
             session['admin_email'] = email
             flash('Login successful! Welcome to the admin dashboard.', 'success')
@@ -37,6 +45,7 @@ def login():
 # ----------------------------
 @admin_bp.route('/logout')
 def logout():
+    sessions.regenerate(session)
     session.pop('admin_logged_in', None)
     session.pop('admin_email', None)
     flash('You have been logged out successfully.', 'success')
@@ -53,8 +62,7 @@ def dashboard():
     if check:
         return check
     
-    # Import data from main app
-    from app import students, internships
+    students, internships = portal().students, portal().internships
     
     # Calculate statistics
     total_students = len(students)
@@ -72,28 +80,20 @@ def dashboard():
     
     rejected = total_apps - accepted
     
-    # Get recent applications for the table
+    # Recent applications for the table, newest first (kept by the rollups)
+    p = portal()
     applications = []
-    for idx, it in enumerate(internships):
-        for sid in it.get('app_ids', [])[:10]:  # Limit to recent 10
-            student = next((s for s in students if s['id'] == sid), None)
-            if student:
-                # Determine status
-                if sid in it.get('selected_ids', []):
-                    status = 'Accepted'
-                else:
-                    status = 'Pending'
-                
-                applications.append({
-                    'student_name': student['name'],
-                    'company': it['company'],
-                    'position': it['title'],
-                    'date': it.get('created_at', '')[:10] if it.get('created_at') else 'N/A',
-                    'status': status
-                })
-    
-    # Sort by date (most recent first) and limit to 10
-    applications = sorted(applications, key=lambda x: x['date'], reverse=True)[:10]
+    for when, iid, sid in p.application_rollups.latest(10):
+        it = p.listing_index.by_id.get(iid)
+        student = p.student_by_id(sid)
+        if it and student:
+            applications.append({
+                'student_name': student['name'],
+                'company': it['company'],
+                'position': it['title'],
+                'date': when[:10] if when else 'N/A',
+                'status': 'Accepted' if sid in it.get('selected_ids', []) else 'Pending'
+            })
     
     return render_template('admin_dashboard.html',
                          total_students=total_students,
@@ -102,6 +102,145 @@ def dashboard():
                          rejected_applications=rejected,
                          applications=applications)
 
+# ----------------------------
+# Admin Chart Data Route
+# ----------------------------
+@admin_bp.route('/api/rollups')
+def rollup_series():
+    """Application / selection counts per hour or day, from the precomputed rollups.
+
+    ?metric=applied|selected &by=all|internship|company|skill &key=<value>
+    &granularity=day|hour &days=<n>. With `by` but no `key`, the `top` keys
+    (default 5) with the most events overall each get a series; `total` is
+    the sum over the requested window.
+    """
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import jsonify
+    import rollups
+    
+    metric = request.args.get('metric', 'applied')
+    by = request.args.get('by', 'all')
+    granularity = request.args.get('granularity', 'day')
+    if metric not in rollups.METRICS or by not in rollups.DIMENSIONS or granularity not in ('day', 'hour'):
+        return jsonify({"error": "unknown metric, dimension or granularity"}), 400
+    try:
+        days = min(max(int(request.args.get('days', 30 if granularity == 'day' else 2)), 1),
+                   366 if granularity == 'day' else rollups.HOURLY_DAYS)
+        top = min(max(int(request.args.get('top', 5)), 1), 20)
+    except ValueError:
+        return jsonify({"error": "days and top must be integers"}), 400
+    
+    end = datetime.datetime.utcnow()
+    buckets = rollups.bucket_range(granularity, end - datetime.timedelta(days=days), end)
+    r = portal().application_rollups
+    if by == 'all':
+        keys = [('', None)]
+    elif request.args.get('key') is not None:
+        key = request.args['key']
+        if by == 'internship':
+            try:
+                key = int(key)
+            except ValueError:
+                return jsonify({"error": "internship keys are ids"}), 400
+        keys = [(key.lower() if by == 'skill' else key, None)]
+    else:
+        keys = r.top(metric, by, top)
+    
+    series = []
+    for key, _ in keys:
+        counts = r.series(metric, granularity, by, key, buckets)
+        series.append({"key": key, "total": sum(counts), "counts": counts})
+    return jsonify({"metric": metric, "by": by, "granularity": granularity, "buckets": buckets, "series": series})
+
+# ----------------------------
+# Admin Similar Students Route
+# ----------------------------
+@admin_bp.route('/api/students/<int:sid>/similar')
+def similar_students(sid):
+    """Students with the closest skills / education to student `sid` (?k=, at most 50)"""
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import jsonify
+    import metrics
+    
+    p = portal()
+    st = p.student_by_id(sid)
+    if not st:
+        return jsonify({"error": "student not found"}), 404
+    try:
+        k = min(max(int(request.args.get('k', 10)), 1), 50)
+    except ValueError:
+        return jsonify({"error": "k must be an integer"}), 400
+    with metrics.timer("edil_similar_query_seconds"):
+        found = p.similar_items.similar(st, "student", "student", k)
+    out = []
+    for other_id, score in found:
+        other = p.student_by_id(other_id)
+        if other:
+            out.append({"id": other_id, "name": other.get("name"), "education": other.get("education"),
+                        "skills": other.get("skills", []), "score": score})
+    return jsonify({"student": sid, "similar": out})
+
+# ----------------------------
+# Admin Export Routes
+# ----------------------------
+@admin_bp.route('/export/<dataset>.<fmt>')
+def export(dataset, fmt):
+    """Stream applications, allocations or students as CSV or XLSX.
+
+    Filters: ?internship=<id> &company=<name> &status=accepted|rejected|pending
+    (applications only) &from=YYYY-MM-DD &to=YYYY-MM-DD.
+    """
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import Response, abort
+    import exports
+    
+    if dataset not in ('applications', 'allocations', 'students') or fmt not in ('csv', 'xlsx'):
+        abort(404)
+    p = portal()
+    args = request.args
+    try:
+        internship = int(args['internship']) if args.get('internship') else None
+        start, end = args.get('from') or None, args.get('to') or None
+        for d in (start, end):
+            if d:
+                datetime.date.fromisoformat(d)
+    except ValueError:
+        abort(400)
+    status = args.get('status') or None
+    if status and status not in exports.STATUSES:
+        abort(400)
+    
+    if dataset == 'students':
+        columns, rows = exports.STUDENT_COLUMNS, exports.student_rows(p.students, p.internships, start, end)
+    else:
+        by_id = {s['id']: s for s in list(p.students)}
+        if dataset == 'applications':
+            columns = exports.APPLICATION_COLUMNS
+            rows = exports.application_rows(p.listing_index, p.internships, by_id, internship,
+                                            args.get('company'), status, start, end)
+        else:
+            columns = exports.ALLOCATION_COLUMNS
+            rows = exports.allocation_rows(p.listing_index, p.internships, by_id, internship,
+                                           args.get('company'), start, end)
+    
+    filename = f"{dataset}-{datetime.date.today().isoformat()}.{fmt}"
+    if fmt == 'csv':
+        body, mimetype = exports.csv_stream(columns, rows), 'text/csv'
+    else:
+        body = exports.xlsx_stream(columns, rows, sheet=dataset.title())
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    return Response(body, mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
 # ----------------------------
 # Admin Students Route
 # ----------------------------
@@ -111,11 +250,16 @@ def students():
     if check:
         return check
     
-    from app import students as student_list
+    p = portal()
+    student_list, internships, stream_page = p.students, p.internships, p.stream_page
     
-    # You can create a dedicated template or use render_template_string
-    from flask import render_template_string
-    return render_template_string("""
+    # Applications per student in one pass instead of a scan per row
+    app_counts = {}
+    for it in internships:
+        for sid in it.get('app_ids', []):
+            app_counts[sid] = app_counts.get(sid, 0) + 1
+    
+    return stream_page("""
 {% extends "base.html" %}
 {% block title %}Students - Admin Dashboard{% endblock %}
 {% block content %}
@@ -158,22 +302,14 @@ def students():
                             </td>
                             <td>
                                 {% if s.get('resume') %}
-                                    <a href="/uploads/{{ s.get('resume') }}" target="_blank" class="btn btn-sm btn-outline-primary">
+                                    <a href="{{ url_for('uploaded_file', filename=s.get('resume'), name=s.get('resume_name')) }}" target="_blank" class="btn btn-sm btn-outline-primary">
                                         <i class="bi bi-download"></i> Download
                                     </a>
                                 {% else %}
                                     <span class="text-muted">-</span>
                                 {% endif %}
                             </td>
-                            <td>
-                                {% set app_count = namespace(value=0) %}
-                                {% for it in internships %}
-                                    {% if s['id'] in it.get('app_ids', []) %}
-                                        {% set app_count.value = app_count.value + 1 %}
-                                    {% endif %}
-                                {% endfor %}
-                                {{ app_count.value }}
-                            </td>
+                            <td>{{ app_counts.get(s['id'], 0) }}</td>
                             <td>
                                 <button class="btn btn-sm btn-outline-secondary">
                                     <i class="bi bi-eye"></i> View
@@ -188,7 +324,208 @@ def students():
     </div>
 </div>
 {% endblock %}
-""", students=student_list, internships=__import__('app').internships)
+""", students=list(student_list), app_counts=app_counts)
+
+# ----------------------------
+# Admin Duplicate Students Routes
+# ----------------------------
+@admin_bp.route('/duplicates')
+def duplicates():
+    """Likely duplicate students: same email, or similar name/email/skills.
+
+    ?threshold=<0.3-1.0> overrides the similarity needed for non-email pairs.
+    """
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import render_template_string
+    import dedupe, metrics
+    
+    p = portal()
+    try:
+        threshold = min(1.0, max(0.3, float(request.args.get('threshold', dedupe.THRESHOLD))))
+    except ValueError:
+        threshold = dedupe.THRESHOLD
+    by_id = {s['id']: s for s in list(p.students)}
+    with metrics.timer("edil_duplicate_report_seconds"):
+        groups = p.duplicates.report(by_id.get, threshold)
+    app_counts = {}
+    for it in p.internships:
+        for sid in it.get('app_ids', []):
+            app_counts[sid] = app_counts.get(sid, 0) + 1
+    
+    return render_template_string("""
+{% extends "base.html" %}
+{% block title %}Duplicate Students - Admin Dashboard{% endblock %}
+{% block content %}
+<div class="container-fluid">
+    <div class="row mb-4">
+        <div class="col-12">
+            <h1 class="h3 mb-2 fw-bold">Duplicate Students</h1>
+            <p class="text-muted mb-0">{{ groups|length }} group(s) sharing an email or at least {{ '%.0f'|format(threshold * 100) }}% similar by name, email and skills</p>
+        </div>
+    </div>
+    
+    <div class="card mb-4">
+        <div class="card-body">
+            <form method="get" class="row g-2 align-items-end">
+                <div class="col-auto">
+                    <label class="form-label">Similarity threshold</label>
+                    <input type="number" name="threshold" class="form-control" min="0.3" max="1" step="0.05" value="{{ threshold }}">
+                </div>
+                <div class="col-auto">
+                    <button class="btn btn-primary">Apply</button>
+                </div>
+            </form>
+        </div>
+    </div>
+    
+    {% for g in groups[:200] %}
+    <div class="card mb-3">
+        <div class="card-body">
+            <form method="post" action="{{ url_for('admin.merge_duplicates') }}">
+                <input type="hidden" name="ids" value="{{ g.ids|join(',') }}">
+                <table class="table table-sm mb-2">
+                    <thead>
+                        <tr><th>Keep</th><th>ID</th><th>Name</th><th>Email</th><th>Education</th><th>Skills</th><th>Applications</th></tr>
+                    </thead>
+                    <tbody>
+                        {% for sid in g.ids %}{% set s = by_id.get(sid, {}) %}
+                        <tr>
+                            <td><input type="radio" name="keep" value="{{ sid }}" {% if loop.first %}checked{% endif %}></td>
+                            <td>{{ sid }}</td>
+                            <td>{{ s.get('name', '') }}</td>
+                            <td>{{ s.get('email', '') }}</td>
+                            <td>{{ s.get('education', '') }}</td>
+                            <td class="small">{{ s.get('skills', [])|join(', ') }}</td>
+                            <td>{{ app_counts.get(sid, 0) }}</td>
+                        </tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+                <div class="d-flex justify-content-between align-items-center">
+                    <span class="small text-muted">
+                        {% for a, b, score, reason in g.pairs %}{{ a }}&ndash;{{ b }}: {{ 'same email' if reason == 'email' else '%.0f%% similar'|format(score * 100) }}{% if not loop.last %}; {% endif %}{% endfor %}
+                    </span>
+                    <button class="btn btn-sm btn-outline-danger" onclick="return confirm('Merge these students into the selected one?')">Merge into selected</button>
+                </div>
+            </form>
+        </div>
+    </div>
+    {% else %}
+    <div class="card"><div class="card-body text-muted">No likely duplicates found.</div></div>
+    {% endfor %}
+    {% if groups|length > 200 %}
+    <p class="text-muted">Showing the first 200 groups; raise the threshold to narrow the list.</p>
+    {% endif %}
+</div>
+{% endblock %}
+""", groups=groups, by_id=by_id, app_counts=app_counts, threshold=threshold)
+
+@admin_bp.route('/duplicates/merge', methods=['POST'])
+def merge_duplicates():
+    """Merge every student of a group (ids=1,2,3) into the one picked as keep"""
+    check = require_admin()
+    if check:
+        return check
+    
+    p = portal()
+    try:
+        keep_id = int(request.form['keep'])
+        ids = {int(x) for x in request.form.get('ids', '').split(',') if x.strip()}
+    except (KeyError, ValueError):
+        flash('Pick the student to keep.', 'error')
+        return redirect(url_for('admin.duplicates'))
+    keep = p.student_by_id(keep_id)
+    if not keep or keep_id not in ids:
+        flash('Student to keep not found.', 'error')
+        return redirect(url_for('admin.duplicates'))
+    merged = 0
+    for sid in sorted(ids - {keep_id}):
+        drop = p.student_by_id(sid)
+        if drop and drop is not keep:
+            p.merge_students(keep, drop)
+            merged += 1
+    flash(f"Merged {merged} student(s) into #{keep_id} ({keep.get('name', '')}).", 'success')
+    return redirect(url_for('admin.duplicates'))
+
+# ----------------------------
+# Admin Resume Search Route
+# ----------------------------
+@admin_bp.route('/resumes')
+def resume_search():
+    check = require_admin()
+    if check:
+        return check
+    
+    p = portal()
+    import fulltext, uploads
+    from flask import render_template_string
+    
+    q = request.args.get('q', '').strip()
+    results = []
+    if q and not fulltext.searchable(q):
+        # Stopwords only: plain substring match over the extracted texts
+        for s in p.students:
+            text = uploads.extracted_text(s['resume']) if s.get('resume') else None
+            if text and q.lower() in text.lower():
+                results.append({"student": s, "score": 0.0, "snippet": fulltext.snippet(text, q)})
+                if len(results) == 200:
+                    break
+    elif q:
+        hits = dict(p.resume_search.search(q, limit=200))
+        # Several students can share one (deduplicated) resume file
+        for s in p.students:
+            key = s.get('resume')
+            if key in hits:
+                results.append({"student": s, "score": hits[key],
+                                "snippet": fulltext.snippet(uploads.extracted_text(key), q)})
+        results.sort(key=lambda r: r["score"], reverse=True)
+    
+    return render_template_string("""
+{% extends "base.html" %}
+{% block title %}Resume Search - Admin Dashboard{% endblock %}
+{% block content %}
+<div class="container-fluid">
+    <div class="row mb-4">
+        <div class="col-12">
+            <h1 class="h3 mb-2 fw-bold">Resume Search</h1>
+            <p class="text-muted mb-0">Full-text search over {{ indexed }} uploaded resumes</p>
+        </div>
+    </div>
+    
+    <form method="get" class="mb-4">
+        <div class="input-group">
+            <span class="input-group-text bg-white"><i class="bi bi-search"></i></span>
+            <input type="text" class="form-control" name="q" value="{{ q }}" placeholder="e.g. kubernetes internship">
+            <button class="btn btn-primary" type="submit">Search</button>
+        </div>
+    </form>
+    
+    {% if q %}
+    <div class="card">
+        <div class="card-body">
+            <p class="text-muted">{{ results|length }} matching student{{ 's' if results|length != 1 else '' }}</p>
+            <div class="list-group list-group-flush">
+                {% for r in results %}
+                <div class="list-group-item">
+                    <div class="d-flex justify-content-between">
+                        <strong>{{ r.student['name'] }} <span class="text-muted small">#{{ r.student['id'] }}</span></strong>
+                        <a href="{{ url_for('uploaded_file', filename=r.student['resume'], name=r.student.get('resume_name')) }}" target="_blank" class="btn btn-sm btn-outline-primary">
+                            <i class="bi bi-download"></i> Resume
+                        </a>
+                    </div>
+                    <div class="small text-muted mt-1">{{ r.snippet }}</div>
+                </div>
+                {% endfor %}
+            </div>
+        </div>
+    </div>
+    {% endif %}
+</div>
+{% endblock %}
+""", q=q, results=results, indexed=len(p.resume_search))
 
 # ----------------------------
 # Admin Companies Route
@@ -199,8 +536,9 @@ def companies():
     if check:
         return check
     
-    from app import internships
+    internships = portal().internships
     from flask import render_template_string
+    import archive
     
     return render_template_string("""
 {% extends "base.html" %}
@@ -231,7 +569,8 @@ def companies():
                             <h5 class="card-title mb-1">{{ it['title'] }}</h5>
                             <p class="text-muted mb-0">{{ it['company'] }}</p>
                         </div>
-                        <span class="badge bg-success">Active</span>
+                        {% set state = state_of(it) %}
+                        <span class="badge {{ {'open': 'bg-success', 'allocated': 'bg-primary', 'closed': 'bg-secondary'}[state] }}">{{ state|capitalize }}</span>
                     </div>
                     
                     <div class="mb-3">
@@ -257,9 +596,18 @@ def companies():
                     </div>
                     
                     <div class="d-grid gap-2">
-                        <a href="/allocate/{{ loop.index0 }}" class="btn btn-outline-primary btn-sm">
+                        <a href="/allocate/{{ it['id'] }}" class="btn btn-outline-primary btn-sm">
                             <i class="bi bi-bar-chart me-2"></i>View Allocations
                         </a>
+                        <form method="post" action="{{ url_for('admin.internship_state', internship_id=it['id']) }}" class="d-grid">
+                            {% if state == 'closed' %}
+                            <input type="hidden" name="state" value="open">
+                            <button class="btn btn-outline-success btn-sm"><i class="bi bi-unlock me-2"></i>Reopen</button>
+                            {% else %}
+                            <input type="hidden" name="state" value="closed">
+                            <button class="btn btn-outline-secondary btn-sm"><i class="bi bi-lock me-2"></i>Close</button>
+                            {% endif %}
+                        </form>
                     </div>
                 </div>
             </div>
@@ -268,7 +616,153 @@ def companies():
     </div>
 </div>
 {% endblock %}
-""", internships=internships)
+""", internships=internships, state_of=archive.state)
+
+@admin_bp.route('/internships/<int:internship_id>/state', methods=['POST'])
+def internship_state(internship_id):
+    """Close a posting to applications (state=closed) or reopen it (state=open)"""
+    check = require_admin()
+    if check:
+        return check
+    
+    p = portal()
+    it = p.listing_index.by_id.get(internship_id)
+    state = request.form.get('state')
+    if not it or state not in ('open', 'closed'):
+        flash('Internship not found.', 'error')
+        return redirect(url_for('admin.companies'))
+    if p.set_internship_state(it, state):
+        flash(f"{it['title']} at {it['company']} is now {state}.", 'success')
+    return redirect(url_for('admin.companies'))
+
+# ----------------------------
+# Admin Archive Routes
+# ----------------------------
+@admin_bp.route('/archive')
+def archived():
+    """Archived internships (?q= searches company and title), newest first"""
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import render_template_string
+    
+    p = portal()
+    q = request.args.get('q', '').strip()
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+    except ValueError:
+        page = 1
+    per_page = 50
+    total, rows = p.cold.search_internships(q, per_page, (page - 1) * per_page)
+    
+    return render_template_string("""
+{% extends "base.html" %}
+{% block title %}Archive - Admin Dashboard{% endblock %}
+{% block content %}
+<div class="container-fluid">
+    <div class="row mb-4">
+        <div class="col-12">
+            <div class="d-flex justify-content-between align-items-center">
+                <div>
+                    <h1 class="h3 mb-2 fw-bold">Archive</h1>
+                    <p class="text-muted mb-0">{{ counts.internships }} archived internship(s), {{ counts.notifications }} archived notification(s).
+                        Closed postings move here after {{ days }} quiet days, read notifications after {{ note_days }}.</p>
+                </div>
+                <form method="post" action="{{ url_for('admin.archive_sweep') }}">
+                    <button class="btn btn-outline-primary"><i class="bi bi-archive me-2"></i>Archive now</button>
+                </form>
+            </div>
+        </div>
+    </div>
+    
+    <div class="card mb-4">
+        <div class="card-body">
+            <form method="get" class="row g-2 align-items-end">
+                <div class="col-md-6">
+                    <input type="text" name="q" class="form-control" placeholder="Company or title" value="{{ q }}">
+                </div>
+                <div class="col-auto">
+                    <button class="btn btn-primary">Search</button>
+                </div>
+            </form>
+        </div>
+    </div>
+    
+    <div class="card">
+        <div class="card-body">
+            <table class="table table-sm mb-0">
+                <thead>
+                    <tr><th>ID</th><th>Company</th><th>Title</th><th>State</th><th>Archived</th><th></th></tr>
+                </thead>
+                <tbody>
+                    {% for r in rows %}
+                    <tr>
+                        <td><a href="{{ url_for('admin.archived_internship', internship_id=r.id) }}">{{ r.id }}</a></td>
+                        <td>{{ r.company }}</td>
+                        <td>{{ r.title }}</td>
+                        <td>{{ r.state|capitalize }}</td>
+                        <td>{{ r.archived_at[:10] }}</td>
+                        <td class="text-end">
+                            <form method="post" action="{{ url_for('admin.restore_archived', internship_id=r.id) }}">
+                                <button class="btn btn-sm btn-outline-secondary">Restore</button>
+                            </form>
+                        </td>
+                    </tr>
+                    {% else %}
+                    <tr><td colspan="6" class="text-muted">Nothing archived{% if q %} matches "{{ q }}"{% endif %}.</td></tr>
+                    {% endfor %}
+                </tbody>
+            </table>
+        </div>
+    </div>
+    {% if total > page * per_page or page > 1 %}
+    <div class="d-flex justify-content-between mt-3">
+        {% if page > 1 %}<a class="btn btn-sm btn-outline-primary" href="{{ url_for('admin.archived', q=q, page=page - 1) }}">Newer</a>{% else %}<span></span>{% endif %}
+        {% if total > page * per_page %}<a class="btn btn-sm btn-outline-primary" href="{{ url_for('admin.archived', q=q, page=page + 1) }}">Older</a>{% endif %}
+    </div>
+    {% endif %}
+</div>
+{% endblock %}
+""", rows=rows, total=total, q=q, page=page, per_page=per_page, counts=p.cold.counts(),
+       days=p.ARCHIVE_DAYS, note_days=p.NOTIFICATION_DAYS)
+
+@admin_bp.route('/api/archive/<int:internship_id>')
+def archived_internship(internship_id):
+    """The full archived record of one internship"""
+    check = require_admin()
+    if check:
+        return check
+    
+    from flask import jsonify
+    
+    it = portal().cold.internship(internship_id)
+    if it is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(it)
+
+@admin_bp.route('/archive/<int:internship_id>/restore', methods=['POST'])
+def restore_archived(internship_id):
+    check = require_admin()
+    if check:
+        return check
+    
+    it = portal().restore_internship(internship_id)
+    if it is None:
+        flash('Internship not found in the archive.', 'error')
+    else:
+        flash(f"Restored {it.get('title', '')} at {it.get('company', '')}.", 'success')
+    return redirect(url_for('admin.archived'))
+
+@admin_bp.route('/archive/sweep', methods=['POST'])
+def archive_sweep():
+    check = require_admin()
+    if check:
+        return check
+    
+    moved = portal().archive_cold()
+    flash(f"Archived {moved['internship']} internship(s) and {moved['notification']} notification(s).", 'success')
+    return redirect(url_for('admin.archived'))
 
 # ----------------------------
 # Admin Applications Route
@@ -279,46 +773,64 @@ def applications():
     if check:
         return check
     
-    from app import internships, students as student_list
-    from flask import render_template_string
+    p = portal()
+    internships, student_list, stream_page = p.internships, p.students, p.stream_page
     
-    # Build comprehensive applications list
-    all_apps = []
-    for it in internships:
-        for sid in it.get('app_ids', []):
-            student = next((s for s in student_list if s['id'] == sid), None)
-            if student:
-                # Determine status
-                if sid in it.get('selected_ids', []):
-                    status = 'Accepted'
-                    status_class = 'success'
-                else:
-                    status = 'Pending'
-                    status_class = 'warning'
-                
-                all_apps.append({
-                    'student_id': student['id'],
-                    'student_name': student['name'],
-                    'company': it['company'],
-                    'position': it['title'],
-                    'date': it.get('created_at', '')[:10] if it.get('created_at') else 'N/A',
-                    'status': status,
-                    'status_class': status_class,
-                    'skills': student.get('skills', [])
-                })
-    
-    # Sort by date
-    all_apps = sorted(all_apps, key=lambda x: x['date'], reverse=True)
+    by_id = {s['id']: s for s in student_list}
     
-    return render_template_string("""
+    def date_of(it):
+        return it.get('created_at', '')[:10] if it.get('created_at') else 'N/A'
+    
+    # Newest postings first; rows are produced while the page streams
+    def all_apps():
+        for it in sorted(internships, key=date_of, reverse=True):
+            selected = set(it.get('selected_ids', []))
+            for sid in it.get('app_ids', []):
+                student = by_id.get(sid)
+                if student:
+                    # Determine status
+                    if sid in selected:
+                        status = 'Accepted'
+                        status_class = 'success'
+                    else:
+                        status = 'Pending'
+                        status_class = 'warning'
+                    
+                    yield {
+                        'student_id': student['id'],
+                        'student_name': student['name'],
+                        'company': it['company'],
+                        'position': it['title'],
+                        'date': date_of(it),
+                        'status': status,
+                        'status_class': status_class,
+                        'skills': student.get('skills', [])
+                    }
+    
+    return stream_page("""
 {% extends "base.html" %}
 {% block title %}Applications - Admin Dashboard{% endblock %}
 {% block content %}
 <div class="container-fluid">
     <div class="row mb-4">
         <div class="col-12">
-            <h1 class="h3 mb-2 fw-bold">All Applications</h1>
-            <p class="text-muted mb-0">View and manage all student applications</p>
+            <div class="d-flex justify-content-between align-items-center">
+                <div>
+                    <h1 class="h3 mb-2 fw-bold">All Applications</h1>
+                    <p class="text-muted mb-0">View and manage all student applications</p>
+                </div>
+                <div class="btn-group btn-group-sm">
+                    <a href="{{ url_for('admin.export', dataset='applications', fmt='csv') }}" class="btn btn-outline-primary">
+                        <i class="bi bi-filetype-csv me-1"></i>Applications CSV
+                    </a>
+                    <a href="{{ url_for('admin.export', dataset='applications', fmt='xlsx') }}" class="btn btn-outline-primary">
+                        <i class="bi bi-file-earmark-excel me-1"></i>XLSX
+                    </a>
+                    <a href="{{ url_for('admin.export', dataset='allocations', fmt='xlsx') }}" class="btn btn-outline-primary">
+                        <i class="bi bi-award me-1"></i>Allocations XLSX
+                    </a>
+                </div>
+            </div>
         </div>
     </div>
     
@@ -385,7 +897,197 @@ document.getElementById('searchApps').addEventListener('input', function(e) {
 });
 </script>
 {% endblock %}
-""", applications=all_apps)
+""", applications=all_apps())
+
+# ----------------------------
+# Admin Metrics Route
+# ----------------------------
+@admin_bp.route('/metrics')
+def metrics_page():
+    check = require_admin()
+    if check:
+        return check
+    
+    import metrics
+    from flask import render_template_string
+    
+    return render_template_string("""
+{% extends "base.html" %}
+{% block title %}Metrics - Admin Dashboard{% endblock %}
+{% block content %}
+<div class="container-fluid">
+    <div class="row mb-4">
+        <div class="col-12">
+            <div class="d-flex justify-content-between align-items-center">
+                <div>
+                    <h1 class="h3 mb-2 fw-bold">Performance Metrics</h1>
+                    <p class="text-muted mb-0">Route latency, lock waits, persistence and scan counts since startup</p>
+                </div>
+                <a href="/metrics" class="btn btn-outline-primary btn-sm">
+                    <i class="bi bi-filetype-txt me-2"></i>Prometheus format
+                </a>
+            </div>
+        </div>
+    </div>
+    
+    {% if not enabled %}
+    <div class="alert alert-warning">Metrics are disabled. Set EDIL_METRICS=1 to enable them.</div>
+    {% endif %}
+    
+    <div class="card">
+        <div class="card-body">
+            <div class="table-responsive">
+                <table class="table table-sm table-hover">
+                    <thead>
+                        <tr>
+                            <th>Metric</th>
+                            <th>Labels</th>
+                            <th class="text-end">Count</th>
+                            <th class="text-end">Mean</th>
+                            <th class="text-end">p50 &le;</th>
+                            <th class="text-end">p99 &le;</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for r in rows %}
+                        <tr>
+                            <td><code>{{ r.name }}</code></td>
+                            <td class="small text-muted">{{ r.labels }}</td>
+                            <td class="text-end">{{ r.count }}</td>
+                            {% if r.kind == 'histogram' %}
+                            <td class="text-end">{{ '%.4g'|format(r.mean) }}</td>
+                            <td class="text-end">{{ '%.4g'|format(r.p50) }}</td>
+                            <td class="text-end">{{ '%.4g'|format(r.p99) }}</td>
+                            {% else %}
+                            <td></td><td></td><td></td>
+                            {% endif %}
+                        </tr>
+                        {% else %}
+                        <tr><td colspan="6" class="text-muted">No data recorded yet.</td></tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+    </div>
+</div>
+{% endblock %}
+""", rows=metrics.summary(), enabled=metrics.enabled)
+
+# ----------------------------
+# Admin Profiling Routes
+# ----------------------------
+@admin_bp.route('/profiles', methods=['GET', 'POST'])
+def profiles():
+    check = require_admin()
+    if check:
+        return check
+    
+    import profiling
+    from flask import render_template_string
+    
+    if request.method == 'POST':
+        if request.form.get('action') == 'clear':
+            profiling.clear()
+            flash('Stored profiles cleared.', 'success')
+        else:
+            try:
+                profiling.set_sample_percent(request.form.get('sample_percent', '0'))
+                flash(f'Sampling set to {profiling.sample_percent:g}% of requests.', 'success')
+            except ValueError:
+                flash('Sampling percentage must be a finite number.', 'error')
+        return redirect(url_for('admin.profiles'))
+    
+    return render_template_string("""
+{% extends "base.html" %}
+{% block title %}Profiles - Admin Dashboard{% endblock %}
+{% block content %}
+<div class="container-fluid">
+    <div class="row mb-4">
+        <div class="col-12">
+            <h1 class="h3 mb-2 fw-bold">Request Profiles</h1>
+            <p class="text-muted mb-0">Add <code>?_profile=1</code> to any URL while logged in as admin, or sample a share of all traffic.</p>
+        </div>
+    </div>
+    
+    <div class="card mb-4">
+        <div class="card-body">
+            <form method="post" class="row g-2 align-items-end">
+                <div class="col-auto">
+                    <label class="form-label">Sample % of requests</label>
+                    <input type="number" name="sample_percent" class="form-control" min="0" max="100" step="0.1" value="{{ sample_percent }}">
+                </div>
+                <div class="col-auto">
+                    <button class="btn btn-primary">Apply</button>
+                </div>
+                <div class="col-auto ms-auto">
+                    <button class="btn btn-outline-danger" name="action" value="clear">Clear stored profiles</button>
+                </div>
+            </form>
+        </div>
+    </div>
+    
+    <div class="card">
+        <div class="card-body">
+            <div class="table-responsive">
+                <table class="table table-sm table-hover">
+                    <thead>
+                        <tr>
+                            <th>#</th>
+                            <th>Time</th>
+                            <th>Route</th>
+                            <th>Path</th>
+                            <th>Status</th>
+                            <th class="text-end">Duration</th>
+                            <th>Top function (cumulative)</th>
+                            <th>Download</th>
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {% for p in entries %}
+                        <tr>
+                            <td>{{ p.id }}</td>
+                            <td class="small">{{ p.time }}</td>
+                            <td><code>{{ p.route }}</code></td>
+                            <td class="small text-muted">{{ p.method }} {{ p.path }}</td>
+                            <td>{{ p.status }}</td>
+                            <td class="text-end">{{ '%.1f'|format(p.duration_ms) }} ms</td>
+                            <td class="small">{% for f in top(p, 3) %}{{ f.func }} ({{ '%.1f'|format(f.cumtime_ms) }} ms)<br>{% endfor %}</td>
+                            <td>
+                                <a href="{{ url_for('admin.profile_download', pid=p.id, fmt='prof') }}" class="btn btn-sm btn-outline-primary">pstats</a>
+                                <a href="{{ url_for('admin.profile_download', pid=p.id, fmt='collapsed') }}" class="btn btn-sm btn-outline-secondary">collapsed</a>
+                            </td>
+                        </tr>
+                        {% else %}
+                        <tr><td colspan="8" class="text-muted">No profiles captured yet.</td></tr>
+                        {% endfor %}
+                    </tbody>
+                </table>
+            </div>
+        </div>
+    </div>
+</div>
+{% endblock %}
+""", entries=profiling.recent(), sample_percent=profiling.sample_percent, top=profiling.top_functions)
+
+@admin_bp.route('/profiles/<int:pid>.<fmt>')
+def profile_download(pid, fmt):
+    check = require_admin()
+    if check:
+        return check
+    
+    import profiling
+    from flask import Response, abort
+    
+    entry = profiling.get(pid)
+    if not entry or fmt not in ('prof', 'collapsed'):
+        abort(404)
+    name = f"profile-{pid}-{entry['route']}.{fmt}"
+    if fmt == 'prof':
+        body, mimetype = profiling.pstats_bytes(entry), 'application/octet-stream'
+    else:
+        body, mimetype = profiling.collapsed_text(entry), 'text/plain'
+    return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename={name}'})
 
 # ----------------------------
 # Admin Settings Route (Optional)
@@ -0,0 +1,122 @@
+# admission.py - Per-client rate limits and in-flight load shedding
+#
+# Requests are sorted into classes ("write", "search"; everything else is
+# not limited). Each class has:
+#   - a cap on requests in flight across all clients: a request waits up to
+#     `wait` seconds for a slot, then is shed with 503
+#   - optionally, a token bucket per client (logged-in student, else IP):
+#     refills at `rate` tokens/second up to `burst`; an empty bucket means 429
+# Both carry a Retry-After. Page views are never limited here, so a rush of
+# applications or suggest keystrokes cannot starve them of worker threads.
+#
+# Knobs:
+#   EDIL_ADMISSION=0       turns it all off (default 1)
+#   EDIL_RATE_LIMIT=1      enables the per-client buckets (default off:
+#                          anonymous clients are keyed by IP, and a college
+#                          lab behind one NAT would share a single bucket)
+#   EDIL_LIMIT_<CLASS>="rate,burst,inflight,wait" overrides a class, e.g.
+#                          EDIL_LIMIT_WRITE="2,10,8,1.0"; empty fields keep
+#                          the defaults below
+import os, threading, time
+from collections import OrderedDict
+
+import metrics
+
+enabled = os.environ.get("EDIL_ADMISSION", "1") == "1"
+rate_limited = os.environ.get("EDIL_RATE_LIMIT", "0") == "1"
+MAX_CLIENTS = 50_000  # buckets kept per class (least recently used are dropped)
+
+DEFAULTS = {
+    #           rate/s  burst  in-flight  wait s
+    "write":   (2.0,    10,    8,         1.0),
+    "search":  (10.0,   30,    16,        0.0),  # a stale suggestion is worthless: shed at once
+}
+
+
+class TokenBuckets:
+    """One token bucket per client key"""
+
+    def __init__(self, rate, burst, max_keys=MAX_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [tokens, last refill]
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """0.0 if a token was taken, else seconds until one is available"""
+        now = time.monotonic()
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                b = self._buckets[key] = [float(self.burst), now]
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+                b[1] = now
+            if b[0] >= 1.0:
+                b[0] -= 1.0
+                return 0.0
+            return (1.0 - b[0]) / self.rate
+
+
+class Gate:
+    """Bounded number of requests in flight, with a short queue wait"""
+
+    def __init__(self, limit, wait):
+        self.limit = limit
+        self.wait = wait
+        self._sem = threading.BoundedSemaphore(limit)
+
+    def enter(self):
+        if self.wait > 0:
+            return self._sem.acquire(timeout=self.wait)
+        return self._sem.acquire(blocking=False)
+
+    def leave(self):
+        self._sem.release()
+
+
+def _limits(klass):
+    raw = os.environ.get(f"EDIL_LIMIT_{klass.upper()}")
+    if not raw:
+        return DEFAULTS[klass]
+    rate, burst, inflight, wait = (raw.split(",") + [None] * 4)[:4]
+    d = DEFAULTS[klass]
+    return (float(rate or d[0]), int(burst or d[1]), int(inflight or d[2]), float(wait if wait is not None else d[3]))
+
+
+_buckets = {}
+_gates = {}
+for _k in DEFAULTS:
+    _rate, _burst, _inflight, _wait = _limits(_k)
+    _buckets[_k] = TokenBuckets(_rate, _burst)
+    _gates[_k] = Gate(_inflight, _wait)
+
+
+def client_key(student_id, remote_addr):
+    return f"s:{student_id}" if student_id else f"ip:{remote_addr or '-'}"
+
+
+def admit(klass, client):
+    """None if admitted (call release(klass) when done), else (status, retry_after)"""
+    if not enabled or klass not in _gates:
+        return None
+    retry = _buckets[klass].take(client) if rate_limited else 0.0
+    if retry:
+        metrics.inc("edil_admission_rejected_total", **{"class": klass, "reason": "rate"})
+        return 429, retry
+    gate = _gates[klass]
+    start = time.perf_counter()
+    if not gate.enter():
+        metrics.inc("edil_admission_rejected_total", **{"class": klass, "reason": "overload"})
+        return 503, max(gate.wait, 1.0)
+    metrics.observe("edil_admission_wait_seconds", time.perf_counter() - start, **{"class": klass})
+    return None
+
+
+def release(klass):
+    if enabled and klass in _gates:
+        _gates[klass].leave()
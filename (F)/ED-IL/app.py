@@ -1,7 +1,19 @@
 # app.py - Complete Modern Internship Portal
-from flask import Flask, render_template, render_template_string, request, redirect, jsonify, session, url_for, send_from_directory, abort, flash
-import json, os, datetime, threading
+from flask import Flask, Request, Response, before_render_template, template_rendered, render_template, render_template_string, stream_template_string, has_app_context, request, redirect, jsonify, session, url_for, send_from_directory, send_file, abort, flash, g
+import contextlib, json, os, sys, datetime, heapq, math, mimetypes, threading, time
 from werkzeug.utils import secure_filename
+import skill_bits, shared_state, uploads, metrics, profiling, fulltext, assets, compression, sessions, admission, snapshot, prefork, changefeed, rollups, dedupe, similarity, datawatch, archive
+from concurrency import IdAllocator, add_application, internship_locks, student_locks
+from listing_index import ListingIndex, DURATION_BUCKETS, structure_record, normalize_location_type, parse_duration
+from skill_bits import record_mask, index_record, skill_mask, mask_skills, overlap_count
+
+# Preloaded in a pre-fork master: no collections until the workers fork
+prefork.begin()
+
+# Under `python app.py` this module is __main__; make `import app` return it
+# instead of loading (and populating) a second copy
+if __name__ == "__main__":
+    sys.modules.setdefault("app", sys.modules[__name__])
 
 # Import admin blueprint
 try:
@@ -9,82 +21,452 @@ try:
 except Exception:
     admin_bp = None
 
+class PortalRequest(Request):
+    # Stream uploaded files into the upload folder, hashing as they arrive
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return uploads.file_stream_factory(total_content_length, content_type, filename, content_length)
+
 app = Flask(__name__)
+app.request_class = PortalRequest
 app.secret_key = os.environ.get('SECRET_KEY', 'change-this-in-production-very-secret-key')
 
+# Blueprints reach the live data (lists, indexes, helpers) through this
+# registry on the app instead of importing this module
+app.extensions["portal"] = sys.modules[__name__]
+
 # Register admin blueprint if available
 if admin_bp:
     app.register_blueprint(admin_bp)
 
 # Files & storage
 BASE_DIR = os.path.dirname(__file__)
-DATA_FILE = os.path.join(BASE_DIR, "data.json")
+DATA_FILE = os.environ.get("EDIL_DATA_FILE", os.path.join(BASE_DIR, "data.json"))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 ALLOWED_EXT = {"pdf", "doc", "docx", "txt"}
 
+# Upload limits (MB): per resume file, and per request overall
+RESUME_MAX_MB = int(os.environ.get("EDIL_RESUME_MAX_MB", "10"))
+app.config["MAX_CONTENT_LENGTH"] = int(os.environ.get("EDIL_MAX_REQUEST_MB", "12")) * 1024 * 1024
+uploads.configure(UPLOAD_FOLDER, RESUME_MAX_MB * 1024 * 1024)
+# Resumes are content-addressed, so their URLs can be cached for a year
+RESUME_CACHE_SECONDS = 365 * 24 * 3600
+
+# Static assets: fingerprinted copies in static/dist (`python assets.py build`), linked via asset_url()
+assets.init()
+app.jinja_env.globals["asset_url"] = assets.asset_url
+
+# gzip/brotli for text responses, negotiated per request
+app.wsgi_app = compression.CompressionMiddleware(app.wsgi_app)
+
+# Multi-worker mode: set EDIL_MULTIWORKER=1 when running several processes
+MULTI_WORKER = os.environ.get("EDIL_MULTIWORKER", "0") == "1"
+VERSION_FILE = DATA_FILE + ".version"
+_data_lock = shared_state.FileLock(DATA_FILE + ".lock")
+_version_watcher = shared_state.VersionWatcher(VERSION_FILE)
+_reload_lock = threading.Lock()
+data_version = 0
+
+# Hot reload: with EDIL_WATCH=1 edits to data.json are applied while running
+# (see datawatch.py); with several workers the same diff picks up the other
+# workers' saves, so both keep the base of what was last written or read
+WATCH_DATA = os.environ.get("EDIL_WATCH", "0") == "1"
+_data_watch = datawatch.Watcher(DATA_FILE, lambda: reload_changes())
+
 # In-memory containers (will be loaded from disk)
 students = []
 internships = []
 blogs = []
 
+# Sessions live server-side; the cookie only carries a random session id
+SESSION_BACKEND = os.environ.get("EDIL_SESSION_BACKEND", "sqlite")
+# Worker processes as configured for gunicorn (EDIL_WORKERS) or uvicorn (WEB_CONCURRENCY)
+_processes = 2 if MULTI_WORKER else max(int(os.environ.get(k) or 1) for k in ("EDIL_WORKERS", "WEB_CONCURRENCY"))
+if SESSION_BACKEND != "cookie":
+    app.session_interface = sessions.ServerSideSessionInterface(
+        sessions.make_store(SESSION_BACKEND, DATA_FILE + ".sessions.sqlite", _processes))
+
+# Student IDs are handed out atomically instead of max(id)+1 per request
+_student_ids = IdAllocator()
+# Internships get a stable id too (list positions shift on every new posting)
+_internship_ids = IdAllocator()
+listing_index = ListingIndex()
+_blog_ids = IdAllocator()
+
+# Full-text indexes: internships and blogs by id, resumes by upload key
+internship_search = fulltext.Index()
+blog_search = fulltext.Index()
+resume_search = fulltext.Index()
+uploads.extract_listeners.append(resume_search.add)
+
+# Change feed: one event per mutation, served on /api/changes
+changes = changefeed.ChangeLog(DATA_FILE + ".changes.jsonl")
+# Application counts per hour/day, kept up to date for the admin charts
+application_rollups = rollups.Rollups()
+# Registered emails (exact) and MinHash buckets (near-duplicates) of students
+duplicates = dedupe.DuplicateIndex()
+# Vectors + LSH for "similar internships / students" (see similarity.py)
+similar_items = similarity.Similarity()
+RELATED_RECOMMENDATIONS = 5
+# Cold tier: quiet closed postings and old read notifications move out of
+# the lists above into a SQLite file, read on demand (see archive.py)
+ARCHIVE_DAYS = int(os.environ.get("EDIL_ARCHIVE_DAYS", "30"))            # closed postings stay hot this long
+AUTO_CLOSE_DAYS = int(os.environ.get("EDIL_AUTO_CLOSE_DAYS", "0"))       # opt-in: close open postings quiet this long (0 = never)
+NOTIFICATION_DAYS = int(os.environ.get("EDIL_NOTIFICATION_DAYS", "90"))   # read notifications stay hot this long
+cold = archive.Archive(DATA_FILE + ".archive.sqlite")
+_archiver = archive.Sweeper(float(os.environ.get("EDIL_ARCHIVE_INTERVAL", "3600")), lambda: archive_cold())
+
+def internship_text(it):
+    # The title is repeated so title matches outrank skill/company matches
+    return " ".join([it.get("title", "")] * 2 + [it.get("company", ""), it.get("location", "")] + list(it.get("skills", [])))
+
+def blog_text(b):
+    return " ".join([b.get("title", "")] * 2 + [b.get("author", ""), b.get("body", "")])
+
+def index_resume(student):
+    """Add a student's resume text to the resume index if it is not there yet"""
+    key = student.get("resume")
+    if key and key not in resume_search and uploads.is_key(key):
+        text = uploads.extracted_text(key)
+        if text is not None:
+            resume_search.add(key, text)
+
 # --- Persistence helpers ---
+def normalize_record(name, rec):
+    """Fix up a record read from data.json ("students", "internships" or "blogs")"""
+    # Convert string skills to list
+    if name != "blogs" and isinstance(rec.get("skills"), str):
+        rec["skills"] = [x.strip() for x in rec["skills"].split(",") if x.strip()]
+    if name == "internships":
+        structure_record(rec)
+    return rec
+
 def load_data():
-    global students, internships, blogs
+    global students, internships, blogs, data_version
+    seen, base = datawatch.stamp(DATA_FILE), None
     if os.path.exists(DATA_FILE):
         try:
             with open(DATA_FILE, "r", encoding="utf-8") as f:
-                d = json.load(f)
+                text = f.read()
+            d = json.loads(text)
             students = d.get("students", [])
             internships = d.get("internships", [])
             blogs = d.get("blogs", [])
-
-            # Convert string skills to list
-            for s in students:
-                if isinstance(s.get("skills"), str):
-                    s["skills"] = [x.strip() for x in s["skills"].split(",") if x.strip()]
-            for it in internships:
-                if isinstance(it.get("skills"), str):
-                    it["skills"] = [x.strip() for x in it["skills"].split(",") if x.strip()]
+            data_version = int(d.get("version", 0))
+
+            for name, records in (("students", students), ("internships", internships), ("blogs", blogs)):
+                for rec in records:
+                    normalize_record(name, rec)
+
+            # Older postings have no id: number them oldest first
+            _internship_ids.reset(it["id"] for it in internships if "id" in it)
+            for it in reversed(internships):
+                if "id" not in it:
+                    it["id"] = _internship_ids.next()
+            _blog_ids.reset(b["id"] for b in blogs if "id" in b)
+            for b in reversed(blogs):
+                if "id" not in b:
+                    b["id"] = _blog_ids.next()
+
+            # Precompute skill bitsets for matching
+            skill_bits.rebuild(students, internships)
+
+            if WATCH_DATA or MULTI_WORKER:
+                split = datawatch.split_lines(text)
+                if split is not None:
+                    base = {name: datawatch.base_from_lines(split[1].get(name, []), records)
+                            for name, records in (("students", students), ("internships", internships), ("blogs", blogs))}
+                    if None in base.values():
+                        base = None
+            del text
 
         except Exception as e:
             print("Failed to load data.json:", e)
             students, internships, blogs = [], [], []
     else:
         students, internships, blogs = [], [], []
-
+    snapshot.reset()
+    _student_ids.reset(s.get("id", 0) for s in students)
+    _internship_ids.reset(it.get("id", 0) for it in internships)
+    _internship_ids.observe(cold.max_internship_id())
+    listing_index.rebuild(internships)
+    application_rollups.rebuild(internships)
+    duplicates.rebuild(students)
+    similar_items.rebuild(students, internships)
+    _blog_ids.reset(b.get("id", 0) for b in blogs)
+    internship_search.clear()
+    for it in internships:
+        internship_search.add(it["id"], internship_text(it))
+    blog_search.clear()
+    for b in blogs:
+        blog_search.add(b["id"], blog_text(b))
+    # Resume keys are content hashes, so entries stay valid across reloads
+    for s in students:
+        index_resume(s)
+    if (WATCH_DATA or MULTI_WORKER) and base is None and seen is not None:
+        # Not written by us (or not one record per line): base the diff on
+        # the records as loaded instead
+        base = take_snapshot()
+    _data_watch.mark(seen, base)
+
+
+def take_snapshot():
+    """Immutable view of the data as it is now (see snapshot.py)"""
+    with metrics.timer("edil_snapshot_seconds"):
+        snap = snapshot.capture([
+            ("students", students, student_locks.for_record, None),
+            ("internships", internships, internship_locks.for_record, "apps"),
+            ("blogs", blogs, None, None),
+        ])
+    metrics.inc("edil_snapshot_encoded_total", snap.encoded)
+    return snap
+
+# Generation of the newest snapshot on disk; a save asked for before that
+# capture started is already covered by it
+_saved_seq = 0
 
 def save_data():
+    global data_version, _saved_seq
     tmp = DATA_FILE + ".tmp"
+    version = data_version + 1
+    t0 = time.perf_counter()
     try:
+        snap = take_snapshot()
         with open(tmp, "w", encoding="utf-8") as f:
-            json.dump({"students": students, "internships": internships, "blogs": blogs}, f, ensure_ascii=False, indent=2)
+            snap.write(f, version)
+            written = f.tell()
+        seen = datawatch.stamp(tmp)
         os.replace(tmp, DATA_FILE)
+        data_version = version
+        _saved_seq = snap.seq
+        _data_watch.mark(seen, snap)
+        if MULTI_WORKER:
+            shared_state.write_version(VERSION_FILE, version)
+        metrics.observe("edil_save_seconds", time.perf_counter() - t0)
+        metrics.observe("edil_save_bytes", written)
     except Exception as e:
+        metrics.inc("edil_save_failures_total")
         print("Failed to save data.json:", e)
 
 _save_lock = threading.Lock()
 def schedule_save():
+    if MULTI_WORKER:
+        # Data lock first (re-entrant: write requests already hold it) so
+        # lock order is always _data_lock -> _save_lock
+        with metrics.timer("edil_data_lock_wait_seconds"):
+            _data_lock.acquire()
+        try:
+            _save_under_lock()
+        finally:
+            _data_lock.release()
+        return
+    _save_under_lock()
+
+def _save_under_lock():
+    wanted = snapshot.tick()
+    t0 = time.perf_counter()
     with _save_lock:
+        metrics.observe("edil_save_lock_wait_seconds", time.perf_counter() - t0)
+        if _saved_seq > wanted:
+            # Another thread saved a snapshot taken after our change
+            metrics.inc("edil_save_coalesced_total")
+            return
         save_data()
 
+def refresh_if_stale():
+    """Reload data.json if another worker saved a newer version"""
+    if _version_watcher.is_stale(data_version) and not reload_changes():
+        with _reload_lock:
+            if _version_watcher.is_stale(data_version):
+                load_data()
+
+# --- Hot reload ---
+# Per list: record kind in events and indexes, lock per record, id source
+_RELOAD_LISTS = {
+    "students": ("student", student_locks.for_record, _student_ids),
+    "internships": ("internship", internship_locks.for_record, _internship_ids),
+    "blogs": ("blog", None, _blog_ids),
+}
+_FEED_SKIP = ("apps", "notifications")
+
+def _index_changed(kind, rec, old):
+    """Bring the indexes in line with a record that was added (old None) or changed"""
+    if kind == "blog":
+        blog_search.add(rec["id"], blog_text(rec))
+        return
+    index_record(rec, kind)
+    if kind == "student":
+        if old is not None:
+            duplicates.remove(old)
+        duplicates.add(rec)
+        index_resume(rec)
+    else:
+        if old is not None:
+            listing_index.remove(old)
+        listing_index.add(rec)
+        internship_search.add(rec["id"], internship_text(rec))
+        application_rollups.replace(old, rec)
+    similar_items.add(rec, kind)
+
+def _index_removed(kind, rec):
+    snapshot.forget(rec, "apps" if kind == "internship" else None)
+    if kind == "blog":
+        blog_search.remove(rec["id"])
+        return
+    skill_bits.forget_record(rec, kind)
+    if kind == "student":
+        duplicates.remove(rec)
+    else:
+        listing_index.remove(rec)
+        internship_search.remove(rec["id"])
+        application_rollups.replace(rec, None)
+    similar_items.remove(rec, kind)
+
+def _apply_list(name, records, added, updated, deleted, base, emit):
+    """Apply one list's diff (see datawatch.diff) in place; returns records touched"""
+    kind, lock_for, ids = _RELOAD_LISTS[name]
+    by_id = {rec.get("id"): rec for rec in records}
+    touched = 0
+    for rid in deleted:
+        rec = by_id.pop(rid, None)
+        if rec is None:
+            continue
+        try:
+            records.remove(rec)
+        except ValueError:
+            continue
+        _index_removed(kind, rec)
+        touched += 1
+        if emit:
+            changes.emit("delete", kind, rid)
+    for new in updated:
+        rec = by_id.get(new["id"])
+        if rec is None:
+            continue  # removed in memory since (e.g. merged): the edit has nothing to apply to
+        normalize_record(name, new)
+        with lock_for(rec) if lock_for else contextlib.nullcontext():
+            if new == rec:
+                continue
+            old = dict(rec)
+            rec.clear()
+            rec.update(new)
+            snapshot.touch(rec)
+        _index_changed(kind, rec, old)
+        touched += 1
+        if emit:
+            changed = {k: v for k, v in rec.items() if old.get(k) != v and k not in _FEED_SKIP}
+            changed.update((k, None) for k in old if k not in rec)
+            changes.emit("update", kind, rec["id"], changed)
+    for h, rec in added:
+        normalize_record(name, rec)
+        rid = rec.get("id")
+        if type(rid) is int and rid not in by_id:
+            ids.observe(rid)
+        else:
+            rec["id"] = ids.next()
+        by_id[rec["id"]] = base[h] = rec["id"]
+        if name == "students":
+            records.append(rec)
+        else:
+            records.insert(0, rec)  # newest first, like a new posting or blog
+        _index_changed(kind, rec, None)
+        touched += 1
+        if emit:
+            changes.emit("create", kind, rec["id"])
+    if name == "internships" and (added or deleted):
+        listing_index.reposition(records)
+    return touched
+
+def reload_changes():
+    """Apply what changed in data.json since this process last wrote or read it.
+
+    Returns False when there is nothing to diff against (the caller falls
+    back to load_data). Edits by hand are applied, announced on the change
+    feed and saved back with a new version (ids filled in); changes in a
+    newer version saved by another worker are applied quietly.
+    """
+    global data_version
+    with _data_lock if MULTI_WORKER else contextlib.nullcontext():
+        with _reload_lock:
+            if not _data_watch.changed():
+                return True
+            if _data_watch.base is None:
+                return False
+            t0 = time.perf_counter()
+            try:
+                # Saves wait while the file is diffed and the lists patched,
+                # so none can move the base or write a half-applied state
+                with _save_lock:
+                    seen, version, lists = datawatch.read(DATA_FILE)
+                    bases = _data_watch.bases()
+                    diffs = {name: datawatch.diff(lists[name], bases.get(name, {})) for name in _RELOAD_LISTS}
+                    external = version <= data_version
+                    touched = 0
+                    for name, records in (("students", students), ("internships", internships), ("blogs", blogs)):
+                        added, updated, deleted, base = diffs[name]
+                        touched += _apply_list(name, records, added, updated, deleted, base, external)
+                    _data_watch.mark(seen, {name: diffs[name][3] for name in diffs})
+                    data_version = max(data_version, version)
+            except Exception as e:
+                # Keep serving what we have; the next edit of the file is tried again
+                _data_watch.mark(datawatch.stamp(DATA_FILE), _data_watch.base)
+                metrics.inc("edil_reload_failures_total")
+                print("Failed to apply data.json changes:", e)
+                return True
+            metrics.observe("edil_reload_seconds", time.perf_counter() - t0)
+            metrics.inc("edil_reload_records_total", touched, source="edit" if external else "worker")
+        if external and touched:
+            schedule_save()
+    return True
+
 # --- Helpers ---
 def student_by_id(sid):
     try:
         sid = int(sid)
     except:
         return None
-    for s in students:
+    # Repeated lookups within one request are answered from a memo on g
+    memo = g.setdefault("_student_memo", {}) if has_app_context() else None
+    if memo is not None and sid in memo:
+        metrics.inc("edil_student_lookup_memo_hits_total")
+        return memo[sid]
+    metrics.inc("edil_student_lookups_total")
+    for n, s in enumerate(students, 1):
         try:
             if int(s.get("id")) == sid:
+                metrics.inc("edil_student_lookup_scanned_total", n)
+                if memo is not None:
+                    memo[sid] = s
                 return s
         except:
             continue
+    metrics.inc("edil_student_lookup_scanned_total", len(students))
     return None
 
+def current_student():
+    """The logged-in student for this request, resolved once per request"""
+    sid = session.get("current_student_id")
+    cached = g.get("_current_student")
+    if cached is None or cached[0] != sid:
+        cached = g._current_student = (sid, student_by_id(sid) if sid else None)
+    return cached[1]
+
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXT
 
+def save_resume(student, f):
+    """Store an uploaded resume (deduplicated by content) on the student"""
+    if not (f and f.filename and allowed_file(f.filename)):
+        return False
+    ext = f.filename.rsplit(".", 1)[1].lower()
+    key = uploads.store(f, ext)
+    with student_locks.for_record(student):
+        student['resume'] = key
+        student['resume_name'] = secure_filename(f.filename) or f"resume.{ext}"
+        snapshot.touch(student)
+    index_resume(student)  # new uploads are indexed by the extraction listener instead
+    return True
+
 def all_known_skills():
     skills = set()
     for s in students:
@@ -95,17 +477,48 @@ def all_known_skills():
             skills.add(sk)
     return sorted(skills)
 
+# Large list pages are streamed: rendered and sent in ~16 KB pieces
+STREAM_BUFFER = 16 * 1024
+
+def stream_page(source, **context):
+    """Render an inline template incrementally as a streamed HTML response"""
+    pieces = stream_template_string(source, **context)  # binds the request context now
+    
+    def chunks():
+        buf, size = [], 0
+        for piece in pieces:
+            buf.append(piece)
+            size += len(piece)
+            if size >= STREAM_BUFFER:
+                yield "".join(buf)
+                buf, size = [], 0
+        if buf:
+            yield "".join(buf)
+    return Response(chunks(), mimetype="text/html")
+
 def now_iso():
     return datetime.datetime.utcnow().isoformat()
 
+# Callables invoked as listener(student_id, notification) after each new
+# notification; used by the async server to push to open streams.
+notification_listeners = []
+
 def send_notification_to_student(sid, msg):
     st = student_by_id(sid)
     if not st:
         return False
     n = {"id": f"n{int(datetime.datetime.utcnow().timestamp()*1000)}", "msg": msg, "time": now_iso(), "read": False}
-    st.setdefault("notifications", []).append(n)
-    st["notifications_unread"] = st.get("notifications_unread", 0) + 1
+    with student_locks.for_record(st):
+        st.setdefault("notifications", []).append(n)
+        st["notifications_unread"] = st.get("notifications_unread", 0) + 1
+        snapshot.touch(st)
+    changes.emit("create", "notification", f"{st['id']}:{n['id']}", {"student": st["id"]})
     schedule_save()
+    for listener in notification_listeners:
+        try:
+            listener(st["id"], n)
+        except Exception as e:
+            print("Notification listener failed:", e)
     return True
 
 def calculate_profile_completion(student):
@@ -119,55 +532,538 @@ def calculate_profile_completion(student):
 
 def get_student_recommendations(student):
     """Get recommended internships for a student based on skills"""
-    st_skills = set([s.lower() for s in student.get("skills", [])])
+    # Case-insensitive, unlike allocation and the AI dashboard
+    st_mask = record_mask(student, "student", fold=True)
     recommendations = []
     
-    for idx, it in enumerate(internships):
-        it_skills = set([s.lower() for s in it.get("skills", [])])
-        overlap = st_skills & it_skills
+    for it in internships:
+        it_mask = record_mask(it, "internship", fold=True)
+        overlap = st_mask & it_mask
         
         if overlap:
-            match_score = int((len(overlap) / len(it_skills)) * 100) if it_skills else 0
+            match_score = int((overlap.bit_count() / it_mask.bit_count()) * 100)
             recommendations.append({
-                "iid": idx,
+                "iid": it["id"],
                 "company": it.get("company"),
                 "title": it.get("title"),
                 "match_score": match_score,
-                "matched_skills": list(overlap),
+                "matched_skills": mask_skills(overlap),
                 "openings": it.get("openings", 1)
             })
     
+    # Postings sharing no listed skill but related through skills that are
+    # usually seen together (a Django student sees Flask postings)
+    seen, related = {r["iid"] for r in recommendations}, 0
+    for iid, score in similar_items.similar(student, "student", "internship", RELATED_RECOMMENDATIONS * 4):
+        it = listing_index.by_id.get(iid)
+        if it is None or iid in seen:
+            continue
+        recommendations.append({
+            "iid": iid,
+            "company": it.get("company"),
+            "title": it.get("title"),
+            "match_score": int(score * 100),
+            "matched_skills": [],
+            "openings": it.get("openings", 1),
+            "related": True
+        })
+        related += 1
+        if related == RELATED_RECOMMENDATIONS:
+            break
+    
     return sorted(recommendations, key=lambda x: x["match_score"], reverse=True)
 
+def _internship_hits(found):
+    out = []
+    for iid, score in found:
+        it = listing_index.by_id.get(iid)
+        if it is not None:
+            out.append({"id": iid, "iid": iid, "company": it.get("company"),
+                        "title": it.get("title"), "skills": it.get("skills", []), "score": score})
+    return out
+
+def similar_internships(it, k=10):
+    """Internships closest to `it` by skills and title: [{"id", "iid", ..., "score"}]"""
+    with metrics.timer("edil_similar_query_seconds"):
+        return _internship_hits(similar_items.similar(it, "internship", "internship", k))
+
+def related_internships(student, k=10):
+    """Internships for a student by vector similarity, not only shared skills"""
+    with metrics.timer("edil_similar_query_seconds"):
+        return _internship_hits(similar_items.similar(student, "student", "internship", k))
+
+def record_application(it, student, when):
+    """Feed a new application to the change log and the chart rollups"""
+    changes.emit("create", "application", f"{it['id']}:{student['id']}", {"internship": it["id"], "student": student["id"]})
+    application_rollups.application(it, student["id"], when)
+
+def merge_students(keep, drop):
+    """Fold the duplicate student `drop` into `keep` and remove `drop`.
+
+    Applications and selections move to `keep` (one entry per internship
+    when both had applied), notifications are combined and `keep`'s empty
+    profile fields are filled from `drop`.
+    """
+    kid, did = keep["id"], drop["id"]
+    for it in list(internships):
+        if did not in it.get("app_ids", []) and did not in it.get("selected_ids", []):
+            continue
+        with internship_locks.for_record(it):
+            times = it.get("app_times") or []
+            ids, kept_times, seen = [], [], set()
+            for i, sid in enumerate(it.get("app_ids", [])):
+                sid = kid if sid == did else sid
+                if sid not in seen:
+                    seen.add(sid)
+                    ids.append(sid)
+                    kept_times.append(times[i] if i < len(times) else None)
+            apps, seen = [], set()
+            for s in it.get("apps", []):
+                s = keep if s.get("id") in (kid, did) else s
+                if s.get("id") not in seen:
+                    seen.add(s.get("id"))
+                    apps.append(s)
+            it["app_ids"], it["apps"] = ids, apps
+            if "app_times" in it:
+                it["app_times"] = kept_times
+            it["selected_ids"] = list(dict.fromkeys(kid if sid == did else sid for sid in it.get("selected_ids", [])))
+            snapshot.touch(it)
+        changes.emit("update", "internship", it["id"], {"app_ids": it["app_ids"], "selected_ids": it["selected_ids"]})
+
+    changed = {}
+    duplicates.remove(keep)
+    with student_locks.for_record(keep):
+        for field in ("name", "email", "education", "resume", "resume_name"):
+            if not keep.get(field) and drop.get(field):
+                keep[field] = changed[field] = drop[field]
+        skills = list(dict.fromkeys(keep.get("skills", []) + drop.get("skills", [])))
+        if skills != keep.get("skills", []):
+            keep["skills"] = changed["skills"] = skills
+        notes = sorted(keep.get("notifications", []) + drop.get("notifications", []), key=lambda n: n.get("time", ""))
+        keep["notifications"] = notes
+        keep["notifications_unread"] = sum(1 for n in notes if not n.get("read"))
+        snapshot.touch(keep)
+    index_record(keep, "student")
+
+    try:
+        students.remove(drop)
+    except ValueError:
+        pass
+    skill_bits.forget_record(drop, "student")
+    snapshot.forget(drop)
+    duplicates.remove(drop)
+    duplicates.add(keep)
+    similar_items.remove(drop, "student")
+    similar_items.add(keep, "student")
+    application_rollups.rebuild(internships)
+    cold.reassign_student(did, kid)
+    if changed:
+        changes.emit("update", "student", kid, changed)
+    changes.emit("delete", "student", did, {"merged_into": kid})
+    schedule_save()
+
+# --- Hot/cold tiers ---
+def set_internship_state(it, new_state):
+    """Open or close a posting by hand (allocation runs mark it allocated)"""
+    with internship_locks.for_record(it):
+        if archive.state(it) == new_state:
+            return False
+        it["status"], it["status_at"] = new_state, now_iso()
+        snapshot.touch(it)
+    changes.emit("update", "internship", it["id"], {"status": it["status"], "status_at": it["status_at"]})
+    schedule_save()
+    return True
+
+def archive_cold(now=None):
+    """Close stale open postings (if enabled), then move quiet closed postings and old read notifications to the archive"""
+    now = now or datetime.datetime.utcnow()
+    when = now.isoformat()
+    quiet = (now - datetime.timedelta(days=ARCHIVE_DAYS)).isoformat()
+    old_notes = (now - datetime.timedelta(days=NOTIFICATION_DAYS)).isoformat()
+    moved = {"internship": 0, "notification": 0}
+    t0 = time.perf_counter()
+    with _data_lock if MULTI_WORKER else contextlib.nullcontext():
+        refresh_if_stale()
+        # With EDIL_AUTO_CLOSE_DAYS set, open postings nobody touched for that
+        # long close now and are archived ARCHIVE_DAYS later like any other
+        closing = []
+        if AUTO_CLOSE_DAYS > 0:
+            stale = (now - datetime.timedelta(days=AUTO_CLOSE_DAYS)).isoformat()
+            closing = [it for it in list(internships)
+                       if archive.state(it) == "open" and archive.last_activity(it) < stale]
+        for it in closing:
+            with internship_locks.for_record(it):
+                it["status"], it["status_at"] = "closed", when
+                snapshot.touch(it)
+            changes.emit("update", "internship", it["id"], {"status": "closed", "status_at": when})
+
+        # Only closed postings leave: open and allocated ones are still worked on.
+        # Rows first, then out of memory; a posting changed in between is written again
+        quiet_its = []
+        for it in list(internships):
+            if archive.state(it) == "closed" and archive.last_activity(it) < quiet:
+                with internship_locks.for_record(it):
+                    quiet_its.append((it, snapshot.encode(it)))
+        if quiet_its:
+            cold.put_internships([json.loads(text) for _, text in quiet_its], when)
+            rewrite = []
+            for it, text in quiet_its:
+                with internship_locks.for_record(it):
+                    if snapshot.encode(it) != text:
+                        rewrite.append(json.loads(snapshot.encode(it)))
+                    internships.remove(it)
+                _index_removed("internship", it)
+                changes.emit("delete", "internship", it["id"], {"archived": True})
+            if rewrite:
+                cold.put_internships(rewrite, when)
+            listing_index.reposition(internships)
+            moved["internship"] = len(quiet_its)
+
+        # Notifications are appended oldest first: most students are skipped
+        # after looking at their first one
+        batch = []
+        for st in list(students):
+            notes = st.get("notifications")
+            if not notes or notes[0].get("time", "") >= old_notes:
+                continue
+            with student_locks.for_record(st):
+                old = [dict(n) for n in st.get("notifications", []) if n.get("read") and n.get("time", "") < old_notes]
+            if old:
+                batch.append((st, old))
+        if batch:
+            cold.put_notifications([(st["id"], old) for st, old in batch])
+            for st, old in batch:
+                gone = {(n.get("id"), n.get("time")) for n in old}
+                with student_locks.for_record(st):
+                    st["notifications"] = [n for n in st.get("notifications", [])
+                                           if not (n.get("read") and (n.get("id"), n.get("time")) in gone)]
+                    snapshot.touch(st)
+                moved["notification"] += len(old)
+            # One event for all of them: feed readers drop read notifications older than this
+            changes.emit("delete", "notification", "*", {"archived_before": old_notes})
+
+        if closing or any(moved.values()):
+            schedule_save()
+    metrics.observe("edil_archive_seconds", time.perf_counter() - t0)
+    for kind, n in moved.items():
+        metrics.inc("edil_archived_total", n, kind=kind)
+    return moved
+
+def restore_internship(iid):
+    """Bring an archived posting back into the hot list; it stays ARCHIVE_DAYS before it can go again"""
+    it = cold.internship(iid)
+    if it is None or iid in listing_index.by_id:
+        return None
+    normalize_record("internships", it)
+    it["status_at"] = now_iso()
+    internships.insert(0, it)
+    _index_changed("internship", it, None)
+    listing_index.reposition(internships)
+    changes.emit("create", "internship", iid)
+    schedule_save()
+    cold.delete_internship(iid)
+    return it
+
+# --- JSON API core ---
+# Framework-neutral logic behind the JSON endpoints. The Flask routes below
+# and the async server in asgi.py both call these and return (payload, status).
+def apply_for(sid, iid):
+    s = student_by_id(sid)
+    if not s:
+        return {"status":"not_logged_in"}, 200
+
+    # Postings are looked up by id: the archive sweep removes closed ones
+    # from the middle of the list, so positions shift under open pages
+    it = listing_index.by_id.get(iid)
+    if it is None:
+        return {"status":"error", "message":"internship not found"}, 404
+
+    if archive.state(it) == "closed":
+        return {"status":"closed", "message":"applications are closed"}, 200
+    when = now_iso()
+    if not add_application(it, s, when):
+        return {"status":"already", "message":"already applied"}, 200
+
+    record_application(it, s, when)
+    schedule_save()
+    
+    # Send notification to student
+    send_notification_to_student(s["id"], f"Your application for '{it['title']}' at {it['company']} has been submitted successfully.")
+    
+    return {"status":"ok", "message":"applied"}, 200
+
+def suggest_skills(q):
+    q = (q or "").strip().lower()
+    if not q:
+        return []
+    return [s for s in all_known_skills() if q in s.lower()][:25]
+
+def notifications_for(sid):
+    st = student_by_id(sid) if sid else None
+    if not st:
+        return []
+    return list(reversed(st.get("notifications", [])))
+
+def unread_count_for(sid):
+    st = student_by_id(sid) if sid else None
+    if not st:
+        return 0
+    return st.get("notifications_unread", 0)
+
+def toggle_notification(sid, nid):
+    if not sid or not nid:
+        return {"ok": False}, 400
+    
+    st = student_by_id(sid)
+    if not st:
+        return {"ok": False}, 404
+    
+    with student_locks.for_record(st):
+        found = None
+        for n in st.get("notifications", []):
+            if n.get("id") == nid:
+                found = n
+                break
+        
+        if not found:
+            return {"ok": False}, 404
+        
+        found["read"] = not bool(found.get("read"))
+        st["notifications_unread"] = sum(1 for x in st.get("notifications", []) if not x.get("read"))
+        snapshot.touch(st)
+    changes.emit("update", "notification", f"{st['id']}:{nid}", {"read": found["read"]})
+    schedule_save()
+    
+    return {"ok": True}, 200
+
+def delete_notification(sid, nid):
+    if not sid or not nid:
+        return {"ok": False}, 400
+    
+    st = student_by_id(sid)
+    if not st:
+        return {"ok": False}, 404
+    
+    with student_locks.for_record(st):
+        st["notifications"] = [n for n in st.get("notifications", []) if n.get("id") != nid]
+        st["notifications_unread"] = sum(1 for x in st.get("notifications", []) if not x.get("read"))
+        snapshot.touch(st)
+    changes.emit("delete", "notification", f"{st['id']}:{nid}")
+    schedule_save()
+    
+    return {"ok": True}, 200
+
+def mark_all_notifications(sid):
+    if not sid:
+        return {"ok": False}, 400
+    
+    st = student_by_id(sid)
+    if not st:
+        return {"ok": False}, 404
+    
+    with student_locks.for_record(st):
+        for n in st.get("notifications", []):
+            n["read"] = True
+        st["notifications_unread"] = 0
+        snapshot.touch(st)
+    changes.emit("update", "notification", f"{st['id']}:*", {"read": True})
+    schedule_save()
+    
+    return {"ok": True}, 200
+
+# --- Instrumentation hooks ---
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    start = g.pop("request_start", None)
+    if start is not None:
+        route, method, status = request.endpoint or "unmatched", request.method, response.status_code
+
+        # A streamed body is still being sent here: time the request when the server closes it
+        def done():
+            metrics.observe("edil_request_seconds", time.perf_counter() - start, route=route, method=method)
+            metrics.inc("edil_requests_total", route=route, method=method, status=status)
+        response.call_on_close(done)
+    return response
+
+@app.teardown_request
+def record_failed_request(exc=None):
+    # after_request does not run when a view raised
+    start = g.pop("request_start", None)
+    if start is not None:
+        route = request.endpoint or "unmatched"
+        metrics.observe("edil_request_seconds", time.perf_counter() - start, route=route, method=request.method)
+        metrics.inc("edil_requests_total", route=route, method=request.method, status=500)
+
+def _template_started(sender, template, context, **extra):
+    if metrics.enabled:
+        g.setdefault("template_starts", []).append(time.perf_counter())
+
+def _template_done(sender, template, context, **extra):
+    starts = g.get("template_starts")
+    if starts:
+        metrics.observe("edil_template_render_seconds", time.perf_counter() - starts.pop(),
+                        template=template.name or "<string>")
+
+before_render_template.connect(_template_started, app)
+template_rendered.connect(_template_done, app)
+
+# Opt-in: trust scrapers on this host. Only safe when no reverse proxy on
+# the same host forwards outside requests (they arrive from localhost too)
+METRICS_TRUST_LOCAL = os.environ.get("EDIL_METRICS_LOCAL", "0") == "1"
+
+@app.route("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition for admins and EDIL_METRICS_TOKEN bearers (and local scrapers, if enabled)"""
+    token = os.environ.get("EDIL_METRICS_TOKEN")
+    local = METRICS_TRUST_LOCAL and request.remote_addr in ("127.0.0.1", "::1")
+    if not (session.get("admin_logged_in") or local
+            or (token and request.headers.get("Authorization", "") == f"Bearer {token}")):
+        abort(401)
+    return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+# --- Profiling hooks ---
+# Admins can profile a single request with ?_profile=1; a sampled percentage
+# of all requests can be profiled from /admin/profiles.
+@app.before_request
+def maybe_start_profile():
+    if (request.args.get("_profile") and session.get("admin_logged_in")) or profiling.sampled():
+        g.profile = profiling.start()
+
+@app.after_request
+def note_profile_status(response):
+    if g.get("profile") is not None:
+        g.profile_status = response.status_code
+    return response
+
+@app.teardown_request
+def maybe_finish_profile(exc=None):
+    prof = g.pop("profile", None)
+    if prof is not None:
+        profiling.finish(prof, route=request.endpoint or "unmatched", method=request.method,
+                         path=request.full_path.rstrip("?"), status=g.pop("profile_status", 500))
+
+# --- Admission control ---
+# Search endpoints; listing pages only count as searches when a query is given
+SEARCH_ENDPOINTS = {"skill_suggest", "internship_listings", "blog_list", "admin.resume_search"}
+
+def admission_class():
+    if request.method == "POST":
+        return "write"
+    if request.endpoint == "skill_suggest" or (
+            request.endpoint in SEARCH_ENDPOINTS and (request.args.get("search") or request.args.get("q"))):
+        return "search"
+    return None
+
+@app.before_request
+def admit_request():
+    klass = admission_class()
+    if klass is None:
+        return None
+    client = admission.client_key(session.get("current_student_id"), request.remote_addr)
+    rejected = admission.admit(klass, client)
+    if rejected is None:
+        g.admitted = klass
+        return None
+    status, retry_after = rejected
+    msg = "Too many requests, please slow down." if status == 429 else "The server is busy, please try again shortly."
+    if request.is_json or request.endpoint == "skill_suggest" or request.accept_mimetypes.best == "application/json":
+        resp = jsonify({"ok": False, "message": msg})
+    else:
+        resp = Response(msg, mimetype="text/plain")
+    resp.status_code = status
+    resp.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return resp
+
+@app.teardown_request
+def release_admission(exc=None):
+    klass = g.pop("admitted", None)
+    if klass is not None:
+        admission.release(klass)
+
+# --- Multi-worker request hooks ---
+@app.before_request
+def sync_shared_state():
+    if WATCH_DATA:
+        _data_watch.start()
+    _archiver.start()
+    if not MULTI_WORKER:
+        return
+    if request.method == "POST":
+        # Single writer across processes: hold the data lock for the whole
+        # request so we mutate (and save) on top of the latest version.
+        with metrics.timer("edil_data_lock_wait_seconds"):
+            _data_lock.acquire()
+        g.holds_data_lock = True
+    refresh_if_stale()
+
+@app.teardown_request
+def release_shared_state(exc=None):
+    if g.pop("holds_data_lock", False):
+        _data_lock.release()
+
 # --- Template filter ---
 @app.template_filter('intersect')
 def intersect_filter(a, b):
-    return list(set(a) & set(b))
+    return mask_skills(skill_mask(a) & skill_mask(b))
 
 # --- Context Processor ---
 @app.context_processor
 def inject_globals():
     """Inject global variables for all templates"""
-    current_sid = session.get("current_student_id")
-    current_student = student_by_id(current_sid) if current_sid else None
+    student = current_student()
     
     unread_count = 0
-    if current_student:
-        unread_count = current_student.get("notifications_unread", 0)
+    if student:
+        unread_count = student.get("notifications_unread", 0)
     
     return {
-        'current_user': current_student,
+        'current_user': student,
         'unread_notifications_count': unread_count
     }
 
 # --- Routes ---
+@app.errorhandler(413)
+def upload_too_large(e):
+    msg = f'File too large. Resumes can be at most {RESUME_MAX_MB} MB.'
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({"ok": False, "message": msg}), 413
+    flash(msg, 'error')
+    return redirect(request.referrer or url_for('student_register'))
+
 @app.route('/uploads/<path:filename>')
 def uploaded_file(filename):
+    download_name = secure_filename(request.args.get("name", "")) or None
+    if uploads.is_key(filename):
+        # Content-addressed: the hash is a strong ETag and the URL never changes
+        path = uploads.key_path(filename)
+        if not os.path.exists(path):
+            abort(404)
+        return send_file(path, as_attachment=True, download_name=download_name or os.path.basename(path),
+                         etag=uploads.etag_for(filename), conditional=True, max_age=RESUME_CACHE_SECONDS)
+    # Legacy flat uploads/<sid>_<name> files
     safe = os.path.basename(filename)
-    path = os.path.join(UPLOAD_FOLDER, safe)
-    if not os.path.exists(path):
+    if not os.path.isfile(os.path.join(UPLOAD_FOLDER, safe)):
+        abort(404)
+    return send_from_directory(UPLOAD_FOLDER, safe, as_attachment=True, download_name=download_name, max_age=3600)
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Fingerprinted static files: cached forever, precompressed variant if accepted"""
+    path, encoding = assets.resolve(filename, request.headers.get("Accept-Encoding", ""))
+    if path is None:
         abort(404)
-    return send_from_directory(UPLOAD_FOLDER, safe, as_attachment=True)
+    resp = send_file(path, mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                     etag=f"{filename}:{encoding or 'identity'}", conditional=True, max_age=assets.MAX_AGE)
+    resp.headers["Cache-Control"] = f"public, max-age={assets.MAX_AGE}, immutable"
+    resp.headers["Vary"] = "Accept-Encoding"
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    return resp
 
 @app.route("/")
 def home():
@@ -192,23 +1088,36 @@ def student_dashboard():
         flash('Student not found', 'error')
         return redirect(url_for('internship_listings'))
     
-    # Calculate statistics
-    applications_count = sum(1 for it in internships if student['id'] in it.get('app_ids', []))
-    accepted_count = sum(1 for it in internships if student['id'] in it.get('selected_ids', []))
-    pending_count = applications_count - accepted_count
-    profile_completion = calculate_profile_completion(student)
-    
     # Get student's applications
     my_applications = []
     for it in internships:
         if student['id'] in it.get('app_ids', []):
-            status = 'Accepted' if student['id'] in it.get('selected_ids', []) else 'Pending'
+            if student['id'] in it.get('selected_ids', []):
+                status = 'Accepted'
+            elif archive.state(it) == 'closed' and not it.get('selected_at'):
+                status = 'Closed'
+            else:
+                status = 'Pending'
             my_applications.append({
                 'company': it['company'],
                 'position': it['title'],
                 'applied_date': it.get('created_at', '')[:10] if it.get('created_at') else 'N/A',
                 'status': status
             })
+    # Archived postings: accepted or not selected if an allocation ran, else just closed
+    for _, company, title, selected in cold.applications_of(student['id']):
+        my_applications.append({
+            'company': company,
+            'position': title,
+            'applied_date': 'N/A',
+            'status': 'Closed' if selected is None else ('Accepted' if selected else 'Rejected')
+        })
+
+    # Calculate statistics
+    applications_count = len(my_applications)
+    accepted_count = sum(1 for a in my_applications if a['status'] == 'Accepted')
+    pending_count = sum(1 for a in my_applications if a['status'] == 'Pending')
+    profile_completion = calculate_profile_completion(student)
     
     # Get recommendations
     recommended_internships = get_student_recommendations(student)[:3]
@@ -223,6 +1132,20 @@ def student_dashboard():
                          recommended_internships=recommended_internships)
 
 # --- Internship Listings ---
+def _search_scores(q):
+    """{id: score} of the internships matching the search; a query of stopwords
+    only is matched as a substring of title, company and skills instead"""
+    if fulltext.searchable(q):
+        return internship_search.scores(q)
+    q = q.lower()
+    return {it["id"]: 0.0 for it in list(internships)
+            if q in it.get('title', '').lower() or q in it.get('company', '').lower()
+            or any(q in skill.lower() for skill in it.get('skills', []))}
+
+def _search_ids(q):
+    """Ids of every internship matching the search (facet counts need all of them)"""
+    return set(_search_scores(q))
+
 @app.route("/internships")
 def internship_listings():
     """Modern internship listings page with search and filter functionality"""
@@ -231,54 +1154,41 @@ def internship_listings():
     skill_filter = request.args.get('skill', '').strip().lower()
     location_filter = request.args.get('location', '').strip().lower()
     duration_filter = request.args.get('duration', '').strip().lower()
-    sort_by = request.args.get('sort', 'recent')
+    city_filter = request.args.get('city', '').strip()
+    company_filter = request.args.get('company', '').strip().lower()
+    sort_by = request.args.get('sort') or ('relevance' if search_query else 'recent')
     
-    # Filter internships based on search query
-    filtered_internships = []
-    for idx, internship in enumerate(internships):
-        # Check if search query matches title, company, or skills
-        matches_search = True
-        if search_query:
-            title_match = search_query in internship.get('title', '').lower()
-            company_match = search_query in internship.get('company', '').lower()
-            skills_match = any(search_query in skill.lower() for skill in internship.get('skills', []))
-            matches_search = title_match or company_match or skills_match
-        
-        # Check if skill filter matches
-        matches_skill = True
-        if skill_filter:
-            matches_skill = any(skill_filter in skill.lower() for skill in internship.get('skills', []))
-        
-        # Check if location filter matches
-        matches_location = True
-        if location_filter:
-            location = internship.get('location', '').lower()
-            if location_filter == 'remote':
-                matches_location = 'remote' in location
-            elif location_filter == 'onsite':
-                matches_location = 'onsite' in location or 'on-site' in location
-            elif location_filter == 'hybrid':
-                matches_location = 'hybrid' in location
-        
-        # Check if duration filter matches
-        matches_duration = True
-        if duration_filter:
-            duration = internship.get('duration', '').lower()
-            if duration_filter == '1-3':
-                matches_duration = '1' in duration or '2' in duration or '3' in duration
-            elif duration_filter == '3-6':
-                matches_duration = '3' in duration or '4' in duration or '5' in duration or '6' in duration
-            elif duration_filter == '6+':
-                matches_duration = any(month in duration for month in ['7', '8', '9', '10', '11', '12', 'year'])
-        
-        if matches_search and matches_skill and matches_location and matches_duration:
-            # Add index for reference
-            internship_with_index = dict(internship)
-            internship_with_index['index'] = idx
-            filtered_internships.append(internship_with_index)
+    # Structured filters are answered from the listing indexes
+    filters = {
+        "location": normalize_location_type(location_filter),
+        "city": city_filter,
+        "duration": duration_filter if duration_filter in DURATION_BUCKETS else None,
+        "skill": skill_filter,
+        "company": company_filter,
+        "min_months": parse_duration(request.args.get('min_months') or None),
+        "max_months": parse_duration(request.args.get('max_months') or None),
+    }
+    ids = listing_index.query(**filters)
+    facets = listing_index.facet_counts(filters, search_query, _search_ids)
+    scores = None
+    if search_query:
+        scores = _search_scores(search_query)
+        ids = set(scores) if ids is None else ids & scores.keys()
+    if ids is None:
+        candidates = enumerate(internships)
+        scanned = len(internships)
+    else:
+        positions = listing_index.positions
+        candidates = sorted((positions[i], listing_index.by_id[i]) for i in ids if i in positions)
+        scanned = len(candidates)
+    metrics.inc("edil_listing_scanned_total", scanned)
+    
+    filtered_internships = [dict(internship) for _, internship in candidates]
     
     # Sort internships
-    if sort_by == 'recent':
+    if sort_by == 'relevance' and scores is not None:
+        filtered_internships.sort(key=lambda x: scores.get(x['id'], 0.0), reverse=True)
+    elif sort_by == 'recent':
         filtered_internships.sort(key=lambda x: x.get('created_at', ''), reverse=True)
     elif sort_by == 'company':
         filtered_internships.sort(key=lambda x: x.get('company', ''))
@@ -291,6 +1201,11 @@ def internship_listings():
                           skill_filter=skill_filter,
                           location_filter=location_filter,
                           duration_filter=duration_filter,
+                          city_filter=city_filter,
+                          company_filter=company_filter,
+                          facets=facets,
+                          top_skills=listing_index.top("skill", facets["skill"], 12),
+                          top_companies=listing_index.top("company", facets["company"], 8),
                           sort_by=sort_by)
 
 # --- Notifications ---
@@ -342,22 +1257,33 @@ def profile_edit():
         return jsonify({"ok": False}), 404
     
     # Update fields
+    changed = {}
     if 'firstName' in request.form and 'lastName' in request.form:
-        student['name'] = f"{request.form['firstName']} {request.form['lastName']}"
+        changed['name'] = f"{request.form['firstName']} {request.form['lastName']}"
     if 'email' in request.form:
-        student['email'] = request.form['email'].strip()
+        changed['email'] = request.form['email'].strip()
     if 'education' in request.form:
-        student['education'] = request.form['education'].strip()
+        changed['education'] = request.form['education'].strip()
+    if 'email' in changed and dedupe.normalize_email(changed['email']) != dedupe.normalize_email(student.get('email')):
+        owner = duplicates.claim_email(changed['email'], student['id'])
+        if owner is not None and owner != student['id']:
+            metrics.inc("edil_duplicate_registrations_total")
+            flash('An account with this email address already exists.', 'error')
+            return redirect(url_for('user_profile'))
+    duplicates.remove(student)
+    with student_locks.for_record(student):
+        student.update(changed)
+        snapshot.touch(student)
+    duplicates.add(student)
+    similar_items.add(student, "student")
     
     # Handle resume upload
-    if 'resume' in request.files:
-        f = request.files['resume']
-        if f and f.filename and allowed_file(f.filename):
-            fname = f"{current_sid}_" + secure_filename(f.filename)
-            save_path = os.path.join(UPLOAD_FOLDER, fname)
-            f.save(save_path)
-            student['resume'] = fname
+    if 'resume' in request.files and save_resume(student, request.files['resume']):
+        changed['resume'] = student['resume']
+        changed['resume_name'] = student['resume_name']
     
+    if changed:
+        changes.emit("update", "student", student["id"], changed)
     schedule_save()
     flash('Profile updated successfully!', 'success')
     return redirect(url_for('user_profile'))
@@ -373,16 +1299,15 @@ def student_register():
         skills = [s.strip() for s in skills.split(",") if s.strip()]
         
         # Generate new student ID
-        sid = (max([int(s.get("id", 0)) for s in students]) + 1) if students else 1
+        sid = _student_ids.next()
 
-        resume_filename = None
-        if 'resume' in request.files:
-            f = request.files['resume']
-            if f and f.filename and allowed_file(f.filename):
-                fname = f"{sid}_" + secure_filename(f.filename)
-                save_path = os.path.join(UPLOAD_FOLDER, fname)
-                f.save(save_path)
-                resume_filename = fname
+        # One account per email address (case and +tags ignored). The claim
+        # is atomic, so two sign-ups racing for an address cannot both get
+        # it; it is given back below if the student is never stored
+        if duplicates.claim_email(email, sid) is not None:
+            metrics.inc("edil_duplicate_registrations_total")
+            flash('An account with this email address already exists.', 'error')
+            return redirect(url_for('student_register'))
 
         student_obj = {
             "id": sid,
@@ -390,13 +1315,26 @@ def student_register():
             "email": email,
             "education": education,
             "skills": skills,
-            "resume": resume_filename,
+            "resume": None,
             "notifications": [],
             "notifications_unread": 0,
             "registered_at": now_iso()
         }
-        students.append(student_obj)
+        stored = False
+        try:
+            if 'resume' in request.files:
+                save_resume(student_obj, request.files['resume'])
+            students.append(student_obj)
+            stored = True
+        finally:
+            if not stored:
+                duplicates.remove(student_obj)
+        index_record(student_obj, "student")
+        duplicates.add(student_obj)
+        similar_items.add(student_obj, "student")
+        changes.emit("create", "student", sid)
         schedule_save()
+        sessions.regenerate(session)
         session['current_student_id'] = sid
         flash(f'Welcome {name}! Your registration is successful.', 'success')
         return redirect(url_for('student_dashboard'))
@@ -419,16 +1357,39 @@ def company_register():
         except:
             openings = 1
 
-        internships.insert(0, {
+        location_type = normalize_location_type(request.form.get("location_type"))
+        city = request.form.get("city", "").strip() or None
+        months = parse_duration(request.form.get("duration_months") or None)
+        location = {"remote": "Remote", "onsite": "On-site", "hybrid": "Hybrid"}.get(location_type, "")
+        if city:
+            location = f"{location} - {city}" if location else city
+
+        it = {
+            "id": _internship_ids.next(),
             "company": cname,
             "title": title,
             "skills": skills,
             "openings": openings,
+            "location": location,
+            "location_type": location_type,
+            "location_city": city,
+            "duration": f"{months:g} months" if months else "",
+            "duration_months": months,
             "apps": [],
             "app_ids": [],
+            "app_times": [],
             "selected_ids": [],
+            "status": "open",
             "created_at": now_iso()
-        })
+        }
+        structure_record(it)
+        internships.insert(0, it)
+        index_record(it, "internship")
+        listing_index.add(it)
+        listing_index.reposition(internships)
+        internship_search.add(it["id"], internship_text(it))
+        similar_items.add(it, "internship")
+        changes.emit("create", "internship", it["id"])
         schedule_save()
         flash('Internship posted successfully!', 'success')
         return redirect(url_for('internship_listings'))
@@ -445,12 +1406,13 @@ def apply_form():
         return redirect(url_for('internship_listings'))
     
     s = student_by_id(sid)
-    if s and 0 <= iid < len(internships):
-        it = internships[iid]
-        it.setdefault("app_ids", [])
-        if s["id"] not in it["app_ids"]:
-            it.setdefault("apps", []).append(s)
-            it["app_ids"].append(s["id"])
+    it = listing_index.by_id.get(iid)
+    if s and it is not None:
+        when = now_iso()
+        if archive.state(it) == "closed":
+            flash(f'{it["title"]} at {it["company"]} is no longer taking applications', 'warning')
+        elif add_application(it, s, when):
+            record_application(it, s, when)
             schedule_save()
             flash(f'Successfully applied to {it["title"]} at {it["company"]}!', 'success')
     
@@ -467,27 +1429,8 @@ def apply_ajax():
     if 'current_student_id' not in session:
         return jsonify({"status":"not_logged_in"}), 200
 
-    s = student_by_id(session.get('current_student_id'))
-    if not s:
-        return jsonify({"status":"not_logged_in"}), 200
-
-    if iid < 0 or iid >= len(internships):
-        return jsonify({"status":"error", "message":"internship not found"}), 404
-
-    it = internships[iid]
-    it.setdefault('app_ids', [])
-    
-    if s["id"] in it['app_ids']:
-        return jsonify({"status":"already", "message":"already applied"}), 200
-
-    it.setdefault('apps', []).append(s)
-    it['app_ids'].append(s["id"])
-    schedule_save()
-    
-    # Send notification to student
-    send_notification_to_student(s["id"], f"Your application for '{it['title']}' at {it['company']} has been submitted successfully.")
-    
-    return jsonify({"status":"ok", "message":"applied"}), 200
+    payload, code = apply_for(session.get('current_student_id'), iid)
+    return jsonify(payload), code
 
 # --- Login/Logout Endpoints ---
 @app.route("/login_student", methods=["POST"])
@@ -499,6 +1442,7 @@ def login_student():
         return jsonify({"ok": False}), 400
     
     if student_by_id(sid):
+        sessions.regenerate(session)
         session['current_student_id'] = sid
         return jsonify({"ok": True})
     
@@ -506,26 +1450,32 @@ def login_student():
 
 @app.route("/logout_student", methods=["POST"])
 def logout_student():
+    sessions.regenerate(session)
     session.pop('current_student_id', None)
     flash('You have been logged out successfully.', 'success')
     return jsonify({"ok": True})
 
 # --- Allocation ---
-@app.route("/allocate/<int:iid>", methods=["GET", "POST"])
-def allocate(iid):
-    if iid < 0 or iid >= len(internships):
-        flash('Internship not found', 'error')
-        return redirect(url_for('internship_listings'))
-
-    it = internships[iid]
-    req_skills = set(it.get("skills", []))
-    scored = sorted(it.get("apps", []), key=lambda s: len(req_skills & set(s.get("skills", []))), reverse=True)
-    selected = scored[:it.get("openings", 1)]
-    rejected = scored[it.get("openings", 1):]
-
-    # Persist selection
-    it['selected_ids'] = [int(s['id']) for s in selected]
-    it['selected_ids'] = list(dict.fromkeys(it.get('selected_ids', [])))
+def run_allocation(it):
+    """Select the best-matching applicants of a posting and notify everyone who applied"""
+    req_mask = record_mask(it, "internship")
+    with internship_locks.for_record(it):
+        scored = sorted(it.get("apps", []), key=lambda s: overlap_count(req_mask, record_mask(s, "student")), reverse=True)
+        selected = scored[:it.get("openings", 1)]
+        rejected = scored[it.get("openings", 1):]
+
+        # Persist selection
+        before, before_at = len(it.get('selected_ids', [])), it.get('selected_at')
+        # An admin-closed posting stays closed (and archivable); only an open one moves on
+        if archive.state(it) != "closed":
+            it['status'] = 'allocated'
+        it['selected_ids'] = [int(s['id']) for s in selected]
+        it['selected_ids'] = list(dict.fromkeys(it.get('selected_ids', [])))
+        it['selected_at'] = now_iso()
+        snapshot.touch(it)
+        application_rollups.allocation(it, before, before_at, len(it['selected_ids']), it['selected_at'])
+    changes.emit("update", "internship", it["id"], {"selected_ids": it["selected_ids"], "selected_at": it["selected_at"],
+                                                    "status": it["status"]})
 
     # Send notifications
     for s in selected:
@@ -535,16 +1485,40 @@ def allocate(iid):
         send_notification_to_student(s["id"], f"Thank you for your interest in '{it['title']}' at {it['company']}. Unfortunately, you were not selected this time.")
 
     schedule_save()
+    return selected, rejected
+
+@app.route("/allocate/<int:iid>", methods=["GET", "POST"])
+def allocate(iid):
+    """Allocation results of posting `iid` (its id). Viewing changes nothing:
+    a POST with action=run runs the allocation, any other POST adds feedback."""
+    it = listing_index.by_id.get(iid)
+    if it is None:
+        flash('Internship not found', 'error')
+        return redirect(url_for('internship_listings'))
 
     if request.method == "POST":
+        if request.form.get("action") == "run":
+            selected, _ = run_allocation(it)
+            flash(f'Allocation complete: {len(selected)} student(s) selected', 'success')
+            return redirect(url_for("allocate", iid=iid))
         feedback_data = request.form.get("feedback", "").strip()
         student_name = request.form.get("student_name")
         if feedback_data and student_name:
-            it.setdefault("feedbacks", []).append({"student": student_name, "feedback": feedback_data, "time": now_iso()})
+            fb = {"student": student_name, "feedback": feedback_data, "time": now_iso()}
+            with internship_locks.for_record(it):
+                it.setdefault("feedbacks", []).append(fb)
+                snapshot.touch(it)
+            changes.emit("create", "feedback", f"{it['id']}:{fb['time']}", {"internship": it["id"]})
             schedule_save()
             flash('Feedback submitted successfully', 'success')
         return redirect(url_for("allocate", iid=iid))
 
+    apps = list(it.get("apps", []))
+    by_id = {s.get("id"): s for s in apps}
+    selected = [by_id[sid] for sid in it.get("selected_ids", []) if sid in by_id]
+    # Before the first run nobody has been turned down
+    rejected = [s for s in apps if s.get("id") not in set(it.get("selected_ids", []))] if it.get("selected_at") else []
+
     total_selected = len(selected)
     total_rejected = len(rejected)
     total_applied = len(it.get('apps', []))
@@ -554,17 +1528,25 @@ def allocate(iid):
 <!doctype html>
 <html lang="en">
 <head><meta charset="utf-8"><title>Allocation Results</title>
-<script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<script src="{{ asset_url('vendor/chart.js/chart.umd.js') }}"></script>
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light">
 <div class="container py-4">
   <div class="d-flex justify-content-between align-items-center mb-4">
     <h3>Allocation Results for "{{ it['title'] }}"</h3>
-    <a href="{{ url_for('internship_listings') }}" class="btn btn-outline-primary">
-      <i class="bi bi-arrow-left me-2"></i>Back
-    </a>
+    <div class="d-flex gap-2">
+      <form method="post">
+        <input type="hidden" name="action" value="run">
+        <button class="btn btn-primary">
+          <i class="bi bi-shuffle me-2"></i>{{ 'Run Again' if it.get('selected_at') else 'Run Allocation' }}
+        </button>
+      </form>
+      <a href="{{ url_for('internship_listings') }}" class="btn btn-outline-primary">
+        <i class="bi bi-arrow-left me-2"></i>Back
+      </a>
+    </div>
   </div>
   
   <div class="row">
@@ -666,7 +1648,7 @@ def allocate(iid):
   {% endif %}
 </div>
 
-<script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/js/bootstrap.bundle.min.js"></script>
+<script src="{{ asset_url('vendor/bootstrap/bootstrap.bundle.min.js') }}"></script>
 <script>
 var ctx = document.getElementById('allocationChart').getContext('2d');
 new Chart(ctx, {
@@ -696,10 +1678,10 @@ new Chart(ctx, {
 # --- Students / Companies Listing ---
 @app.route("/students")
 def list_students():
-    return render_template_string("""
+    return stream_page("""
 <!doctype html><html lang="en"><head><meta charset="utf-8"><title>Students</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -741,7 +1723,7 @@ def list_students():
                 </td>
                 <td>
                   {% if s.get('resume') %}
-                    <a href="/uploads/{{ s.get('resume') }}" target="_blank" class="btn btn-sm btn-outline-primary">
+                    <a href="{{ url_for('uploaded_file', filename=s.get('resume'), name=s.get('resume_name')) }}" target="_blank" class="btn btn-sm btn-outline-primary">
                       <i class="bi bi-download"></i>
                     </a>
                   {% else %}
@@ -757,14 +1739,14 @@ def list_students():
     </div>
   </div>
 </body></html>
-""", students=students)
+""", students=list(students))
 
 @app.route("/companies")
 def companies_list():
     return render_template_string("""
 <!doctype html><html lang="en"><head><meta charset="utf-8"><title>Companies</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -819,10 +1801,20 @@ def companies_list():
 # --- Blog Routes ---
 @app.route("/blog")
 def blog_list():
+    q = request.args.get("q", "").strip()
+    if q and not fulltext.searchable(q):
+        entries = [(i, b) for i, b in enumerate(blogs) if q.lower() in blog_text(b).lower()][:100]
+    elif q:
+        hits = blog_search.search(q, limit=100)
+        wanted = {bid for bid, _ in hits}
+        positions = {b["id"]: i for i, b in enumerate(blogs) if b.get("id") in wanted}
+        entries = [(positions[bid], blogs[positions[bid]]) for bid, _ in hits if bid in positions]
+    else:
+        entries = list(enumerate(blogs))
     return render_template_string("""
 <!doctype html><html><head><meta charset="utf-8"><title>Blog</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -838,8 +1830,17 @@ def blog_list():
       </div>
     </div>
     
+    <form method="get" action="/blog" class="mb-4">
+      <div class="input-group">
+        <span class="input-group-text bg-white"><i class="bi bi-search"></i></span>
+        <input type="text" class="form-control" name="q" value="{{ q }}" placeholder="Search posts...">
+        <button class="btn btn-outline-primary" type="submit">Search</button>
+      </div>
+      {% if q %}<p class="text-muted small mt-2 mb-0">{{ entries|length }} result{{ 's' if entries|length != 1 else '' }} for "{{ q }}" &middot; <a href="/blog">clear</a></p>{% endif %}
+    </form>
+    
     <div class="row">
-      {% for b in blogs %}
+      {% for i, b in entries %}
         <div class="col-md-6 mb-4">
           <div class="card h-100">
             <div class="card-body">
@@ -848,7 +1849,7 @@ def blog_list():
                 By {{ b.get('author','Unknown') }} on {{ b.get('time','')[:10] }}
               </p>
               <p class="card-text">{{ b['body'][:200] }}{% if b['body']|length > 200 %}...{% endif %}</p>
-              <a href="/blog/view/{{ loop.index0 }}" class="btn btn-sm btn-outline-primary">
+              <a href="/blog/view/{{ i }}" class="btn btn-sm btn-outline-primary">
                 Read More <i class="bi bi-arrow-right ms-1"></i>
               </a>
             </div>
@@ -856,13 +1857,13 @@ def blog_list():
         </div>
       {% else %}
         <div class="col-12">
-          <div class="alert alert-info">No blog posts yet. Be the first to create one!</div>
+          <div class="alert alert-info">{% if q %}No posts match your search.{% else %}No blog posts yet. Be the first to create one!{% endif %}</div>
         </div>
       {% endfor %}
     </div>
   </div>
 </body></html>
-""", blogs=blogs)
+""", entries=entries, q=q)
 
 @app.route("/blog/new", methods=["GET","POST"])
 def blog_new():
@@ -871,19 +1872,23 @@ def blog_new():
         body = request.form.get("body","").strip()
         author = request.form.get("author","Anonymous").strip()
         
-        blogs.insert(0, {
+        b = {
+            "id": _blog_ids.next(),
             "title": title,
             "body": body,
             "author": author,
             "time": now_iso()
-        })
+        }
+        blogs.insert(0, b)
+        blog_search.add(b["id"], blog_text(b))
+        changes.emit("create", "blog", b["id"])
         schedule_save()
         flash('Blog post published successfully!', 'success')
         return redirect("/blog")
     
     return render_template_string("""
 <!doctype html><html><head><meta charset="utf-8"><title>New Blog Post</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet"></head>
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet"></head>
 <body class="bg-light p-4">
   <div class="container">
     <div class="card">
@@ -920,8 +1925,8 @@ def blog_view(bid):
     b = blogs[bid]
     return render_template_string("""
 <!doctype html><html><head><meta charset="utf-8"><title>{{ b['title'] }}</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -943,139 +1948,122 @@ def blog_view(bid):
 # --- Skill Suggestions ---
 @app.route("/skill_suggest")
 def skill_suggest():
-    q = (request.args.get("q") or "").strip().lower()
-    if not q:
-        return jsonify({"suggestions": []})
-    
-    all_sk = all_known_skills()
-    suggestions = [s for s in all_sk if q in s.lower()][:25]
-    return jsonify({"suggestions": suggestions})
+    return jsonify({"suggestions": suggest_skills(request.args.get("q"))})
 
 # --- Notifications API ---
 @app.route("/api/notifications/list")
 def api_notifications_list():
+    return jsonify({"notifications": notifications_for(session.get('current_student_id'))})
+
+@app.route("/api/notifications/archived")
+def api_notifications_archived():
+    """Older (archived) notifications, newest first; page with ?before=<time of the last one>"""
     sid = session.get('current_student_id')
     if not sid:
         return jsonify({"notifications": []})
-    
-    st = student_by_id(sid)
-    if not st:
-        return jsonify({"notifications": []})
-    
-    notifs = list(reversed(st.get("notifications", [])))
-    return jsonify({"notifications": notifs})
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 200)
+    except ValueError:
+        limit = 50
+    return jsonify({"notifications": cold.notifications(int(sid), request.args.get("before") or None, limit)})
 
 @app.route("/api/notifications/unread_count")
 def api_notifications_unread_count():
-    sid = session.get('current_student_id')
-    if not sid:
-        return jsonify({"unread": 0})
-    
-    st = student_by_id(sid)
-    if not st:
-        return jsonify({"unread": 0})
-    
-    return jsonify({"unread": st.get("notifications_unread", 0)})
+    return jsonify({"unread": unread_count_for(session.get('current_student_id'))})
 
 @app.route("/api/notifications/toggle_read", methods=["POST"])
 def api_notifications_toggle_read():
     data = request.get_json() or {}
-    nid = data.get("id")
-    sid = session.get('current_student_id')
-    
-    if not sid or not nid:
-        return jsonify({"ok": False}), 400
-    
-    st = student_by_id(sid)
-    if not st:
-        return jsonify({"ok": False}), 404
-    
-    found = None
-    for n in st.get("notifications", []):
-        if n.get("id") == nid:
-            found = n
-            break
-    
-    if not found:
-        return jsonify({"ok": False}), 404
-    
-    found["read"] = not bool(found.get("read"))
-    st["notifications_unread"] = sum(1 for x in st.get("notifications", []) if not x.get("read"))
-    schedule_save()
-    
-    return jsonify({"ok": True})
+    payload, code = toggle_notification(session.get('current_student_id'), data.get("id"))
+    return jsonify(payload), code
 
 @app.route("/api/notifications/delete", methods=["POST"])
 def api_notifications_delete():
     data = request.get_json() or {}
-    nid = data.get("id")
-    sid = session.get('current_student_id')
-    
-    if not sid or not nid:
-        return jsonify({"ok": False}), 400
-    
-    st = student_by_id(sid)
-    if not st:
-        return jsonify({"ok": False}), 404
-    
-    st["notifications"] = [n for n in st.get("notifications", []) if n.get("id") != nid]
-    st["notifications_unread"] = sum(1 for x in st.get("notifications", []) if not x.get("read"))
-    schedule_save()
-    
-    return jsonify({"ok": True})
+    payload, code = delete_notification(session.get('current_student_id'), data.get("id"))
+    return jsonify(payload), code
 
 @app.route("/api/notifications/mark_all", methods=["POST"])
 def api_notifications_mark_all():
-    sid = session.get('current_student_id')
-    if not sid:
-        return jsonify({"ok": False}), 400
-    
-    st = student_by_id(sid)
+    payload, code = mark_all_notifications(session.get('current_student_id'))
+    return jsonify(payload), code
+
+# --- Similar items API ---
+def _similar_k():
+    try:
+        return min(max(int(request.args.get("k", 10)), 1), 50)
+    except ValueError:
+        return 10
+
+@app.route("/api/internships/<int:internship_id>/similar")
+def api_similar_internships(internship_id):
+    """Internships like this one (by stable internship id), best first"""
+    it = listing_index.by_id.get(internship_id)
+    if it is None:
+        return jsonify({"error": "internship not found"}), 404
+    return jsonify({"internship": internship_id, "similar": similar_internships(it, _similar_k())})
+
+@app.route("/api/recommendations/related")
+def api_related_internships():
+    """Internships for the logged-in student, best first"""
+    st = current_student()
     if not st:
-        return jsonify({"ok": False}), 404
-    
-    for n in st.get("notifications", []):
-        n["read"] = True
-    st["notifications_unread"] = 0
-    schedule_save()
-    
-    return jsonify({"ok": True})
+        return jsonify({"error": "not logged in"}), 401
+    return jsonify({"student": st["id"], "related": related_internships(st, _similar_k())})
+
+# --- Change feed API ---
+@app.route("/api/changes")
+def api_changes():
+    """Change events after ?since=<seq>, oldest first; keep following `next` while `more`
+
+    Needs an admin session or, for other services, EDIL_CHANGES_TOKEN as a bearer token.
+    """
+    token = os.environ.get("EDIL_CHANGES_TOKEN")
+    if not session.get("admin_logged_in") and not (token and request.headers.get("Authorization", "") == f"Bearer {token}"):
+        return jsonify({"error": "admin login or EDIL_CHANGES_TOKEN required"}), 401
+    try:
+        since = max(int(request.args.get("since", 0)), 0)
+        limit = min(max(int(request.args.get("limit", 500)), 1), 1000)
+    except ValueError:
+        return jsonify({"error": "since and limit must be integers"}), 400
+    page = changes.since(since, limit)
+    if page is None:
+        # Older than the retained log: re-read everything, then follow from `latest`
+        return jsonify({"reset": True, "latest": changes.latest()}), 410
+    events, more = page
+    return jsonify({"changes": events, "next": events[-1]["seq"] if events else since, "more": more})
 
 # --- AI Dashboard ---
-@app.route("/ai_dashboard")
-def ai_dashboard():
-    top_k = 5
-    internship_matches = []
-    
-    for idx, it in enumerate(internships):
-        req = set(it.get("skills", []))
+def _ai_matches(internship_list, student_list, top_k=5):
+    """Top students per internship, computed one card at a time while streaming"""
+    masks = [(s, record_mask(s, "student")) for s in student_list]
+    for it in internship_list:
+        req = record_mask(it, "internship")
         scores = []
         
-        for s in students:
-            s_sk = set(s.get("skills", []))
-            overlap = len(req & s_sk)
-            if overlap > 0:
-                scores.append({
-                    "student_id": s["id"],
-                    "student_name": s["name"],
-                    "overlap": overlap,
-                    "skills": list(req & s_sk)
-                })
+        for s, mask in masks:
+            common = req & mask
+            if common:
+                scores.append((common.bit_count(), common, s))
         
-        scores_sorted = sorted(scores, key=lambda x: x["overlap"], reverse=True)[:top_k]
-        internship_matches.append({
-            "iid": idx,
+        top = heapq.nlargest(top_k, scores, key=lambda x: x[0])
+        yield {
+            "iid": it["id"],
             "company": it.get("company"),
             "title": it.get("title"),
-            "top": scores_sorted
-        })
-    
-    totals = {"students": len(students), "internships": len(internships)}
+            "top": [{"student_id": s["id"], "student_name": s["name"], "overlap": n, "skills": mask_skills(common)}
+                    for n, common, s in top]
+        }
+
+@app.route("/ai_dashboard")
+def ai_dashboard():
+    student_list, internship_list = list(students), list(internships)
+    totals = {"students": len(student_list), "internships": len(internship_list)}
     
-    return render_template_string("""
+    return stream_page("""
 <!doctype html><html><head><meta charset="utf-8"><title>AI Matching Dashboard</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -1141,7 +2129,7 @@ def ai_dashboard():
     {% endfor %}
   </div>
 </body></html>
-""", internship_matches=internship_matches, totals=totals)
+""", internship_matches=_ai_matches(internship_list, student_list), totals=totals)
 
 # --- Recommendations ---
 @app.route("/recommendations")
@@ -1159,8 +2147,8 @@ def recommendations():
     
     return render_template_string("""
 <!doctype html><html><head><meta charset="utf-8"><title>Recommendations</title>
-<link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.2/dist/css/bootstrap.min.css" rel="stylesheet">
-<link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap-icons@1.11.1/font/bootstrap-icons.css">
+<link href="{{ asset_url('vendor/bootstrap/bootstrap.min.css') }}" rel="stylesheet">
+<link rel="stylesheet" href="{{ asset_url('vendor/bootstrap-icons/bootstrap-icons.css') }}">
 </head>
 <body class="bg-light p-4">
   <div class="container">
@@ -1179,7 +2167,11 @@ def recommendations():
               <div class="card-body">
                 <h5 class="card-title">{{ r.title }}</h5>
                 <h6 class="card-subtitle mb-3 text-muted">{{ r.company }}</h6>
+                {% if r.related %}
+                <p class="text-muted">Related to your skills</p>
+                {% else %}
                 <p><strong>Matched Skills:</strong> {{ r.matched_skills|join(', ') }}</p>
+                {% endif %}
                 <div class="d-flex justify-content-between align-items-center">
                   <span class="badge bg-success">{{ r.match_score }}% match</span>
                   <form method="post" action="/apply">
@@ -1203,7 +2195,18 @@ def recommendations():
 """, recs=recs)
 
 # Ensure data is loaded at startup
-load_data()
+with prefork.phase("load"):
+    load_data()
+if prefork.enabled:
+    # Encode the snapshot cache once in the master, so the workers share it
+    # instead of each encoding every record on its first save
+    with prefork.phase("warm"):
+        take_snapshot()
+else:
+    # Pre-forked workers start their own threads on their first request
+    if WATCH_DATA:
+        _data_watch.start()
+    _archiver.start()
 
 # --- Entry point ---
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+# archive.py - Cold tier for postings and notifications nobody works on any more
+#
+# Internships have a lifecycle: open -> allocated (an allocation run picked
+# students) -> closed (by an admin or, when EDIL_AUTO_CLOSE_DAYS is set,
+# automatically once nobody touched an open posting for that long). Closed
+# postings that have been quiet for a while, and read notifications past a
+# certain age, are moved out of the in-memory lists (and so out of every
+# save) into a SQLite file next to data.json. Records there are only read on demand: a student's past
+# applications, older notifications, the admin archive page. The file is
+# not created, or even opened, until something is archived.
+#
+# Rows keep the full record as zlib-compressed JSON plus the few columns the
+# queries need. Archiving writes the rows first and only then drops the
+# records from memory, so a crash in between leaves a record in both tiers
+# (archived again by the next sweep), never in neither. Archived postings
+# also leave the application rollups (admin charts cover the hot set).
+import json, os, sqlite3, threading, time, zlib
+
+STATES = ("open", "closed", "allocated")
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS internships (id INTEGER PRIMARY KEY, company TEXT, title TEXT,"
+    " state TEXT, archived_at TEXT, data BLOB NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS applications (student_id INTEGER, internship_id INTEGER, selected INTEGER,"
+    " PRIMARY KEY (student_id, internship_id)) WITHOUT ROWID",
+    "CREATE TABLE IF NOT EXISTS notifications (student_id INTEGER, nid TEXT, time TEXT, data BLOB NOT NULL,"
+    " PRIMARY KEY (student_id, time, nid)) WITHOUT ROWID",
+)
+
+
+def state(it):
+    """Lifecycle state of an internship; postings saved before states existed are derived"""
+    st = it.get("status")
+    if st in STATES:
+        return st
+    return "allocated" if it.get("selected_at") else "open"
+
+
+def last_activity(it):
+    """ISO time of the newest thing that happened to a posting"""
+    times = it.get("app_times") or []
+    return max([t for t in (it.get("created_at"), it.get("selected_at"), it.get("status_at"),
+                            times[-1] if times else None) if t] or [""])
+
+
+def _pack(rec):
+    return zlib.compress(json.dumps(rec, ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class Archive:
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _conn(self):
+        # One connection per thread and process: a worker forked from a
+        # preloading master leaves the master's connection alone
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                for stmt in _SCHEMA:
+                    db.execute(stmt)
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    # --- Writing ---
+    def put_internships(self, records, when):
+        with self._conn() as db:
+            db.executemany("INSERT OR REPLACE INTO internships VALUES (?, ?, ?, ?, ?, ?)",
+                           [(it["id"], it.get("company", ""), it.get("title", ""), state(it), when, _pack(it))
+                            for it in records])
+            rows = []
+            for it in records:
+                selected = set(it.get("selected_ids", []))
+                ran = bool(it.get("selected_at"))  # else nobody was accepted or turned down
+                rows.extend((sid, it["id"], int(sid in selected) if ran else None) for sid in it.get("app_ids", []))
+            db.executemany("INSERT OR REPLACE INTO applications VALUES (?, ?, ?)", rows)
+
+    def put_notifications(self, batch):
+        """batch: [(student id, [notification])]"""
+        with self._conn() as db:
+            db.executemany("INSERT OR IGNORE INTO notifications VALUES (?, ?, ?, ?)",
+                           [(sid, n.get("id", ""), n.get("time", ""), _pack(n)) for sid, notes in batch for n in notes])
+
+    def delete_internship(self, iid):
+        with self._conn() as db:
+            db.execute("DELETE FROM internships WHERE id = ?", (iid,))
+            db.execute("DELETE FROM applications WHERE internship_id = ?", (iid,))
+
+    def reassign_student(self, old, new):
+        """Archived applications and notifications of `old` now belong to `new` (merged students)"""
+        if not self.exists():
+            return
+        with self._conn() as db:
+            db.execute("UPDATE OR IGNORE applications SET student_id = ? WHERE student_id = ?", (new, old))
+            db.execute("DELETE FROM applications WHERE student_id = ?", (old,))
+            db.execute("UPDATE OR IGNORE notifications SET student_id = ? WHERE student_id = ?", (new, old))
+            db.execute("DELETE FROM notifications WHERE student_id = ?", (old,))
+
+    # --- Reading ---
+    def max_internship_id(self):
+        """Largest archived id, so new postings never reuse one (0 without an archive)"""
+        if not self.exists():
+            return 0
+        return self._conn().execute("SELECT MAX(id) FROM internships").fetchone()[0] or 0
+
+    def internship(self, iid):
+        if not self.exists():
+            return None
+        row = self._conn().execute("SELECT data FROM internships WHERE id = ?", (iid,)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def search_internships(self, q="", limit=50, offset=0):
+        """(total, [summary dict]) of archived postings whose company or title contains q"""
+        if not self.exists():
+            return 0, []
+        like = "%" + q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        where = "WHERE company LIKE ? ESCAPE '\\' OR title LIKE ? ESCAPE '\\'"
+        db = self._conn()
+        total = db.execute(f"SELECT COUNT(*) FROM internships {where}", (like, like)).fetchone()[0]
+        rows = db.execute(f"SELECT id, company, title, state, archived_at FROM internships {where}"
+                          " ORDER BY archived_at DESC, id DESC LIMIT ? OFFSET ?", (like, like, limit, offset))
+        return total, [dict(zip(("id", "company", "title", "state", "archived_at"), r)) for r in rows]
+
+    def applications_of(self, sid):
+        """[(internship id, company, title, selected)] of a student's archived applications
+
+        selected is 1 or 0, or None when the posting closed without an allocation.
+        """
+        if not self.exists():
+            return []
+        return self._conn().execute(
+            "SELECT a.internship_id, i.company, i.title, a.selected FROM applications a"
+            " JOIN internships i ON i.id = a.internship_id WHERE a.student_id = ?"
+            " ORDER BY i.archived_at DESC", (sid,)).fetchall()
+
+    def notifications(self, sid, before=None, limit=50):
+        """A student's archived notifications, newest first, older than `before` (ISO time)"""
+        if not self.exists():
+            return []
+        rows = self._conn().execute(
+            "SELECT data FROM notifications WHERE student_id = ? AND time < ? ORDER BY time DESC LIMIT ?",
+            (sid, before or "\uffff", limit))
+        return [_unpack(r[0]) for r in rows]
+
+    def counts(self):
+        if not self.exists():
+            return {"internships": 0, "notifications": 0}
+        db = self._conn()
+        return {"internships": db.execute("SELECT COUNT(*) FROM internships").fetchone()[0],
+                "notifications": db.execute("SELECT COUNT(*) FROM notifications").fetchone()[0]}
+
+
+class Sweeper:
+    """Calls run() every `interval` seconds on a daemon thread"""
+
+    def __init__(self, interval, run):
+        self.interval = interval
+        self.run = run
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        # Threads do not survive a fork: each worker starts its own on first use
+        if self.interval <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="archive-sweep", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.run()
+            except Exception as e:
+                print("Archive sweep failed:", e)
@@ -0,0 +1,451 @@
+# asgi.py - Async (ASGI) serving mode
+#
+#   uvicorn asgi:application --workers 1
+#   hypercorn asgi:application
+#
+# The small JSON endpoints are served natively: the event loop parses the
+# request, admits it and sends the response, while the work itself is awaited
+# on a thread pool - writes because they lock and save to disk, reads because
+# they scan the lists (student lookups, skill suggestions) - so a large data
+# set never stalls the loop and one process can hold thousands of idle or
+# slow connections. Every other route is handed to the Flask app through a
+# WSGI bridge. The extra
+# /api/notifications/stream endpoint pushes new notifications as
+# server-sent events. Streams only see notifications created in the same
+# process; in multi-worker mode clients should fall back to polling.
+# Native handlers are timed into the same request metrics as Flask routes;
+# a request picked for profiling goes through the WSGI bridge instead, so
+# the Flask hooks profile it like any other.
+import asyncio, contextvars, functools, json, os, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import app as portal
+import admission, metrics, profiling, sessions
+
+flask_app = portal.app
+_pool = ThreadPoolExecutor(max_workers=int(os.environ.get("EDIL_ASGI_THREADS", "16")),
+                           thread_name_prefix="edil-asgi")
+_loop = None
+_streams = {}  # student id -> set of asyncio.Queue
+STREAM_HEARTBEAT = 15
+SPOOL_MAX = 1024 * 1024  # request bodies above this go to a temp file
+STREAM_AHEAD = 8  # chunks a WSGI response may produce ahead of the client
+
+
+async def run_sync(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_pool, functools.partial(fn, *args))
+
+
+def _locked_write(fn, *args):
+    """Run a mutating core function the way the Flask hooks would"""
+    if not portal.MULTI_WORKER:
+        return fn(*args)
+    with portal._data_lock:
+        portal.refresh_if_stale()
+        return fn(*args)
+
+
+async def refresh_shared_state():
+    if portal.MULTI_WORKER and portal._version_watcher.is_stale(portal.data_version):
+        await run_sync(portal.refresh_if_stale)
+
+
+# --- Session cookie (same format as the Flask app's session interface) ---
+def _server_side():
+    iface = flask_app.session_interface
+    return iface if isinstance(iface, sessions.ServerSideSessionInterface) else None
+
+
+def _serializer():
+    return flask_app.session_interface.get_signing_serializer(flask_app)
+
+
+def load_session(headers):
+    raw = headers.get(b"cookie")
+    if not raw:
+        return {}
+    cookie = SimpleCookie()
+    try:
+        cookie.load(raw.decode("latin-1"))
+    except Exception:
+        return {}
+    morsel = cookie.get(flask_app.config["SESSION_COOKIE_NAME"])
+    if not morsel:
+        return {}
+    if _server_side():
+        return _server_side().load_value(flask_app, morsel.value)
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return dict(_serializer().loads(morsel.value, max_age=max_age))
+    except Exception:
+        return {}
+
+
+def session_cookie_header(sess):
+    if _server_side():
+        value = _server_side().store_value(flask_app, sess)
+    else:
+        value = _serializer().dumps(dict(sess))
+    name = flask_app.config["SESSION_COOKIE_NAME"]
+    return (b"set-cookie", f"{name}={value}; HttpOnly; Path=/; SameSite=Lax".encode("latin-1"))
+
+
+# --- Response helpers ---
+async def send_json(send, payload, status=200, extra_headers=()):
+    body = json.dumps(payload).encode("utf-8")
+    headers = [(b"content-type", b"application/json"),
+               (b"content-length", str(len(body)).encode())]
+    headers.extend(extra_headers)
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect":
+            break
+        chunks.append(msg.get("body", b""))
+        if not msg.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def read_json(receive):
+    try:
+        return json.loads(await read_body(receive) or b"{}") or {}
+    except ValueError:
+        return {}
+
+
+# --- Native async handlers ---
+async def h_apply_ajax(scope, receive, send, sess):
+    data = await read_json(receive)
+    try:
+        iid = int(data.get("iid"))
+    except (TypeError, ValueError):
+        return await send_json(send, {"status":"error", "message":"invalid internship id"}, 400)
+    if "current_student_id" not in sess:
+        return await send_json(send, {"status":"not_logged_in"})
+    payload, code = await run_sync(_locked_write, portal.apply_for, sess["current_student_id"], iid)
+    await send_json(send, payload, code)
+
+
+async def h_login_student(scope, receive, send, sess):
+    data = await read_json(receive)
+    try:
+        sid = int(data.get("sid"))
+    except (TypeError, ValueError):
+        return await send_json(send, {"ok": False}, 400)
+    if await run_sync(portal.student_by_id, sid):
+        sessions.regenerate(sess)
+        sess["current_student_id"] = sid
+        return await send_json(send, {"ok": True}, 200, [session_cookie_header(sess)])
+    await send_json(send, {"ok": False}, 404)
+
+
+async def h_skill_suggest(scope, receive, send, sess):
+    q = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("q", [""])[0]
+    await send_json(send, {"suggestions": await run_sync(portal.suggest_skills, q)})
+
+
+async def h_notifications_list(scope, receive, send, sess):
+    await send_json(send, {"notifications": await run_sync(portal.notifications_for, sess.get("current_student_id"))})
+
+
+async def h_unread_count(scope, receive, send, sess):
+    await send_json(send, {"unread": await run_sync(portal.unread_count_for, sess.get("current_student_id"))})
+
+
+def _notification_write(core):
+    async def handler(scope, receive, send, sess):
+        data = await read_json(receive)
+        payload, code = await run_sync(_locked_write, core, sess.get("current_student_id"), data.get("id"))
+        await send_json(send, payload, code)
+    return handler
+
+
+async def h_mark_all(scope, receive, send, sess):
+    await read_body(receive)
+    payload, code = await run_sync(_locked_write, portal.mark_all_notifications, sess.get("current_student_id"))
+    await send_json(send, payload, code)
+
+
+async def h_notifications_stream(scope, receive, send, sess):
+    sid = sess.get("current_student_id")
+    st = await run_sync(portal.student_by_id, sid) if sid else None
+    if not st:
+        return await send_json(send, {"ok": False}, 401)
+    sid = st["id"]
+    await read_body(receive)
+
+    queue = asyncio.Queue(maxsize=100)
+    _streams.setdefault(sid, set()).add(queue)
+    await send({"type": "http.response.start", "status": 200,
+                "headers": [(b"content-type", b"text/event-stream"),
+                            (b"cache-control", b"no-cache")]})
+    first = f"event: unread\ndata: {st.get('notifications_unread', 0)}\n\n"
+    await send({"type": "http.response.body", "body": first.encode(), "more_body": True})
+
+    disconnect = asyncio.ensure_future(receive())
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({getter, disconnect}, timeout=STREAM_HEARTBEAT,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                getter.cancel()
+                break
+            if getter in done:
+                event = f"event: notification\ndata: {json.dumps(getter.result())}\n\n"
+            else:
+                getter.cancel()
+                event = ": keepalive\n\n"
+            await send({"type": "http.response.body", "body": event.encode(), "more_body": True})
+    finally:
+        disconnect.cancel()
+        subs = _streams.get(sid)
+        if subs:
+            subs.discard(queue)
+            if not subs:
+                _streams.pop(sid, None)
+
+
+def _publish(sid, notification):
+    for queue in list(_streams.get(sid, ())):
+        try:
+            queue.put_nowait(notification)
+        except asyncio.QueueFull:
+            pass
+
+
+def _on_notification(sid, notification):
+    # Called from whichever thread created the notification
+    if _loop is not None and sid in _streams:
+        _loop.call_soon_threadsafe(_publish, sid, notification)
+
+
+portal.notification_listeners.append(_on_notification)
+
+ASYNC_ROUTES = {
+    ("POST", "/apply_ajax"): (h_apply_ajax, True),
+    ("POST", "/login_student"): (h_login_student, True),
+    ("GET", "/skill_suggest"): (h_skill_suggest, False),
+    ("GET", "/api/notifications/list"): (h_notifications_list, False),
+    ("GET", "/api/notifications/unread_count"): (h_unread_count, False),
+    ("POST", "/api/notifications/toggle_read"): (_notification_write(portal.toggle_notification), True),
+    ("POST", "/api/notifications/delete"): (_notification_write(portal.delete_notification), True),
+    ("POST", "/api/notifications/mark_all"): (h_mark_all, True),
+    ("GET", "/api/notifications/stream"): (h_notifications_stream, False),
+}
+
+
+def _endpoint(method, path):
+    """Flask endpoint name of a native route, so metrics line up with the WSGI ones"""
+    try:
+        return flask_app.url_map.bind("localhost").match(path, method)[0]
+    except Exception:
+        return path.strip("/").replace("/", "_").replace("api_", "", 1)
+
+
+ENDPOINTS = {key: _endpoint(*key) for key in ASYNC_ROUTES}
+
+# Native routes that also exist as Flask views (the stream has no WSGI twin)
+_PROFILABLE = {key for key, name in ENDPOINTS.items() if name in flask_app.view_functions}
+
+
+def _wants_profile(scope, sess):
+    """Same rule as the Flask hook: an admin's ?_profile=1, or the sampled share"""
+    qs = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return bool(qs.get("_profile") and sess.get("admin_logged_in")) or profiling.sampled()
+
+
+# --- WSGI bridge for every other route ---
+def build_environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": portal.MULTI_WORKER,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope.get("headers", []):
+        key = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if key == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif key == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+        else:
+            key = "HTTP_" + key
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def spool_body(receive):
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX)
+    while True:
+        msg = await receive()
+        if msg["type"] == "http.disconnect":
+            break
+        chunk = msg.get("body", b"")
+        if chunk:
+            body.write(chunk)
+        if not msg.get("more_body"):
+            break
+    body.seek(0)
+    return body
+
+
+def _drain_wsgi(environ, start_response, emit, credits, cancelled):
+    """Call the app, iterate its response and close it, all on this thread
+
+    Flask keeps its app and request context in contextvars, and a streamed
+    response (stream_with_context) pushes them when it starts and pops them
+    when it ends: every step has to run in one context, so the response is
+    never resumed from another thread. Each chunk waits for a credit, which
+    the event loop hands back once the client took a chunk.
+    """
+    result = flask_app(environ, start_response)
+    try:
+        for chunk in result:
+            if cancelled.is_set():
+                break
+            if chunk:
+                credits.acquire()
+                emit(chunk)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+
+
+async def call_wsgi(scope, receive, send):
+    body = await spool_body(receive)
+    environ = build_environ(scope, body)
+    started = {}
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    credits = threading.Semaphore(STREAM_AHEAD)
+    cancelled = threading.Event()
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers]
+        return lambda data: None
+
+    def emit(item):
+        loop.call_soon_threadsafe(queue.put_nowait, item)
+
+    def produce():
+        try:
+            _drain_wsgi(environ, start_response, emit, credits, cancelled)
+        finally:
+            body.close()
+            emit(None)
+
+    # One pool thread per request, running in a copy of this context
+    done = loop.run_in_executor(_pool, contextvars.copy_context().run, produce)
+    try:
+        head_sent = False
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                await done  # re-raises whatever the app raised
+            if not head_sent:
+                await send({"type": "http.response.start", "status": started["status"], "headers": started["headers"]})
+                head_sent = True
+            if chunk is None:
+                break
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            credits.release()
+        await send({"type": "http.response.body", "body": b""})
+    finally:
+        # The client went away: let the producer stop at its next chunk
+        cancelled.set()
+        credits.release()
+
+
+# --- ASGI entry point ---
+async def lifespan(receive, send):
+    global _loop
+    while True:
+        msg = await receive()
+        if msg["type"] == "lifespan.startup":
+            _loop = asyncio.get_running_loop()
+            await send({"type": "lifespan.startup.complete"})
+        elif msg["type"] == "lifespan.shutdown":
+            _pool.shutdown(wait=True)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    global _loop
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+    if _loop is None:
+        _loop = asyncio.get_running_loop()
+
+    key = (scope["method"], scope["path"])
+    route = ASYNC_ROUTES.get(key)
+    if route is None:
+        return await call_wsgi(scope, receive, send)
+
+    handler, writes = route
+    headers = dict(scope.get("headers", []))
+    sess = load_session(headers)
+    if key in _PROFILABLE and _wants_profile(scope, sess):
+        return await call_wsgi(scope, receive, send)
+    start = time.perf_counter() if metrics.enabled else None
+    status = []
+
+    async def send_timed(msg):
+        if msg["type"] == "http.response.start":
+            status.append(msg["status"])
+        await send(msg)
+
+    try:
+        await _admit_and_handle(scope, receive, send_timed, sess, handler, writes)
+    finally:
+        if start is not None:
+            route_name, method = ENDPOINTS[key], scope["method"]
+            metrics.observe("edil_request_seconds", time.perf_counter() - start, route=route_name, method=method)
+            metrics.inc("edil_requests_total", route=route_name, method=method, status=status[0] if status else 500)
+
+
+async def _admit_and_handle(scope, receive, send, sess, handler, writes):
+    klass = "write" if writes else ("search" if scope["path"] == "/skill_suggest" else None)
+    if klass is not None:
+        client = admission.client_key(sess.get("current_student_id"), (scope.get("client") or ("",))[0])
+        # Waiting for a write slot blocks, so it happens on the pool
+        rejected = await run_sync(admission.admit, klass, client) if klass == "write" else admission.admit(klass, client)
+        if rejected is not None:
+            status, retry_after = rejected
+            msg = "Too many requests, please slow down." if status == 429 else "The server is busy, please try again shortly."
+            return await send_json(send, {"ok": False, "message": msg}, status,
+                                   [(b"retry-after", str(max(1, int(retry_after + 0.999))).encode())])
+    try:
+        if not writes:
+            await refresh_shared_state()
+        await handler(scope, receive, send, sess)
+    finally:
+        if klass is not None:
+            admission.release(klass)
@@ -0,0 +1,243 @@
+# assets.py - Fingerprinted, precompressed static assets
+#
+# `python assets.py build` (run it on deploy, after changing anything under
+# static/) takes every file under static/ and writes to static/dist/:
+#   css/style.3fa2b1c4d5.css        minified, content-hashed copy
+#   css/style.3fa2b1c4d5.css.gz     gzip -9 (text types only)
+#   css/style.3fa2b1c4d5.css.br     brotli, when the brotli package is installed
+#   manifest.json                   source name -> fingerprinted name
+# url() references inside CSS are rewritten to the fingerprinted names, so
+# icon fonts keep resolving. The /assets/ route serves dist files with a
+# one-year immutable Cache-Control and picks the .br/.gz variant from
+# Accept-Encoding; templates link through asset_url(name). The app only reads
+# the manifest: without a build, or when static/ changed since the last one,
+# files are served from static/ directly. "Changed" means a source's content
+# hash differs from the one recorded in the manifest (a checkout or copy that
+# only touches mtimes does not count; an edit that keeps the size does).
+#
+# Third-party files (Bootstrap, Bootstrap Icons, Chart.js) are committed under
+# static/vendor/, so pages never load anything from a CDN. `python assets.py
+# vendor` re-downloads the pinned versions below when upgrading them.
+import gzip, hashlib, json, os, re, sys, threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST = os.path.join(DIST_DIR, "manifest.json")
+MAX_AGE = 365 * 24 * 3600
+
+COMPRESS_EXT = {"css", "js", "svg", "json", "map", "txt", "html"}
+MINIFY_EXT = {"css", "js"}
+
+_CDN = "https://cdn.jsdelivr.net/npm/"
+VENDOR = {
+    "vendor/bootstrap/bootstrap.min.css": _CDN + "bootstrap@5.3.8/dist/css/bootstrap.min.css",
+    "vendor/bootstrap/bootstrap.bundle.min.js": _CDN + "bootstrap@5.3.8/dist/js/bootstrap.bundle.min.js",
+    "vendor/bootstrap-icons/bootstrap-icons.css": _CDN + "bootstrap-icons@1.11.3/font/bootstrap-icons.css",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff2": _CDN + "bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff2",
+    "vendor/bootstrap-icons/fonts/bootstrap-icons.woff": _CDN + "bootstrap-icons@1.11.3/font/fonts/bootstrap-icons.woff",
+    "vendor/chart.js/chart.umd.js": _CDN + "chart.js@4.4.0/dist/chart.umd.js",
+}
+
+_manifest = {}
+_build_lock = threading.Lock()
+
+
+# --- Minifying ---
+def minify_css(text):
+    text = re.sub(r"/\*.*?\*/", "", text, flags=re.S)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+    text = re.sub(r":\s+", ":", text)  # a space *before* ":" is a descendant selector
+    return text.replace(";}", "}").strip()
+
+
+def minify_js(text):
+    """Conservative: drops comment-only lines and indentation, never touches code"""
+    text = re.sub(r"^\s*/\*.*?\*/\s*$", "", text, flags=re.S | re.M)
+    out = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith("//"):
+            out.append(line)
+    return "\n".join(out) + "\n"
+
+
+# --- Building ---
+def _sources():
+    """Relative names of every file under static/ except the build output"""
+    names = []
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root) == DIST_DIR:
+            dirs[:] = []
+            continue
+        dirs[:] = [d for d in dirs if os.path.join(root, d) != DIST_DIR]
+        for fn in files:
+            if not fn.startswith(".") and "." in fn:
+                names.append(os.path.relpath(os.path.join(root, fn), STATIC_DIR).replace(os.sep, "/"))
+    # CSS last, so the files it references already have fingerprinted names
+    return sorted(names, key=lambda n: (n.endswith(".css"), n))
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _stamp(names):
+    """Source name -> sha256 of its content, as recorded in the manifest"""
+    out = {}
+    for n in names:
+        with open(os.path.join(STATIC_DIR, n), "rb") as f:
+            out[n] = _digest(f.read())
+    return out
+
+
+def _rewrite_urls(css, name, mapping):
+    folder = os.path.dirname(name)
+
+    def repl(m):
+        ref = m.group(2)
+        if re.match(r"^(data:|https?:|//|#)", ref):
+            return m.group(0)
+        path = ref.split("?", 1)[0]
+        target = os.path.normpath(os.path.join(folder, path)).replace(os.sep, "/")
+        if target not in mapping:
+            return m.group(0)
+        built = os.path.relpath(mapping[target], folder or ".").replace(os.sep, "/")
+        return f"url({m.group(1)}{built}{m.group(1)})"
+
+    return re.sub(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)", repl, css)
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def build():
+    """Write fingerprinted/compressed copies of static/ and a new manifest"""
+    with _build_lock:
+        names = _sources()
+        mapping, sources = {}, {}
+        for name in names:
+            with open(os.path.join(STATIC_DIR, name), "rb") as f:
+                data = f.read()
+            sources[name] = _digest(data)
+            ext = name.rsplit(".", 1)[-1].lower() if "." in name else ""
+            if ext in MINIFY_EXT:
+                text = data.decode("utf-8")
+                if ext == "css":
+                    text = _rewrite_urls(text, name, mapping)
+                if ".min." not in name:
+                    text = minify_css(text) if ext == "css" else minify_js(text)
+                data = text.encode("utf-8")
+            digest = _digest(data)[:10]
+            stem, dot, ext_part = name.rpartition(".")
+            built = f"{stem}.{digest}.{ext_part}" if dot else f"{name}.{digest}"
+            mapping[name] = built
+            out = os.path.join(DIST_DIR, built)
+            if os.path.exists(out):
+                continue
+            _write(out, data)
+            if ext in COMPRESS_EXT:
+                _write(out + ".gz", gzip.compress(data, 9, mtime=0))
+                if brotli is not None:
+                    _write(out + ".br", brotli.compress(data))
+
+        previous = read_manifest().get("files", {})
+        _write(MANIFEST, json.dumps({"files": mapping, "sources": sources}, indent=2).encode("utf-8"))
+        _prune(set(mapping.values()) | set(previous.values()))
+        _manifest.clear()
+        _manifest.update(mapping)
+        return mapping
+
+
+def _prune(keep):
+    """Drop dist files from builds before the previous one"""
+    for root, _, files in os.walk(DIST_DIR):
+        for fn in files:
+            path = os.path.join(root, fn)
+            rel = os.path.relpath(path, DIST_DIR).replace(os.sep, "/")
+            base = re.sub(r"\.(gz|br)$", "", rel)
+            if rel != "manifest.json" and not rel.endswith(".tmp") and base not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def read_manifest():
+    try:
+        with open(MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def init():
+    """Load the manifest written by `python assets.py build`"""
+    missing = [name for name in VENDOR if not os.path.exists(os.path.join(STATIC_DIR, name))]
+    if missing:
+        print("ERROR: vendored assets missing (run `python assets.py vendor`):", ", ".join(missing))
+    m = read_manifest()
+    _manifest.clear()
+    if not m:
+        return _manifest
+    if m.get("sources") != _stamp(_sources()):
+        print("static/ changed since the last `python assets.py build`, serving static/ directly")
+        return _manifest
+    _manifest.update(m.get("files", {}))
+    return _manifest
+
+
+# --- Runtime ---
+def asset_url(name):
+    """URL for a static asset: fingerprinted if built, else plain static/"""
+    from flask import url_for
+    built = _manifest.get(name)
+    if built:
+        return url_for("asset", filename=built)
+    return url_for("static", filename=name)
+
+
+def resolve(filename, accept_encoding):
+    """(path, content_encoding) of the best dist variant, or (None, None)"""
+    path = os.path.normpath(os.path.join(DIST_DIR, filename))
+    if not path.startswith(DIST_DIR + os.sep) or not os.path.isfile(path):
+        return None, None
+    accept = accept_encoding.lower()
+    if brotli is not None and "br" in accept and os.path.exists(path + ".br"):
+        return path + ".br", "br"
+    if "gzip" in accept and os.path.exists(path + ".gz"):
+        return path + ".gz", "gzip"
+    return path, None
+
+
+def vendor():
+    """Download the pinned third-party files into static/vendor/"""
+    from urllib.request import urlopen
+    for name, url in VENDOR.items():
+        print("fetching", url)
+        with urlopen(url, timeout=30) as resp:
+            data = resp.read()
+        _write(os.path.join(STATIC_DIR, name), data)
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if cmd == "vendor":
+        vendor()
+        cmd = "build"
+    if cmd == "build":
+        files = build()
+        print(f"built {len(files)} assets into {DIST_DIR}")
+    else:
+        sys.exit("usage: python assets.py [build|vendor]")
@@ -0,0 +1,3 @@
+# bench - Benchmarks for the internship portal
+#
+# Run from the ED-IL directory, e.g. `python -m bench.skill_overlap`.
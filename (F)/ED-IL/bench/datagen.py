@@ -0,0 +1,151 @@
+# bench/datagen.py - Synthetic dataset generator
+#
+# Produces a data.json-compatible dict with students, internships,
+# applications, notifications and blogs. Skill popularity follows a Zipf
+# distribution, so a handful of skills (Python, SQL, ...) dominate the way
+# they do in real postings.
+#
+# Usage: python -m bench.datagen --scale 10k --out /tmp/data.json
+import argparse, datetime, json, random
+
+from bench.skill_overlap import SKILL_POOL
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+FIRST = ["Aarav", "Diya", "Ishaan", "Ananya", "Kabir", "Meera", "Rohan", "Sara", "Vivaan", "Priya",
+         "Arjun", "Kavya", "Alice", "Bob", "Carlos", "Dana", "Elena", "Farid", "Grace", "Hiro"]
+LAST = ["Sharma", "Patel", "Iyer", "Reddy", "Khan", "Gupta", "Singh", "Nair", "Das", "Mehta",
+        "Smith", "Garcia", "Chen", "Okafor", "Novak", "Silva", "Kim", "Müller", "Rossi", "Ali"]
+EDUCATION = ["B.Tech - CS", "B.Tech - IT", "B.Sc - CS", "BCA", "MCA", "M.Tech - AI", "B.E - ECE", "B.Sc - Maths"]
+COMPANIES = ["Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Tyrell", "Cyberdyne",
+             "Soylent", "Aperture", "Massive", "Vandelay", "Pied Piper", "Dunder", "Oscorp", "Gringotts"]
+ROLES = ["Backend", "Frontend", "Full Stack", "Data Science", "Machine Learning", "Cloud", "DevOps", "Mobile",
+         "Security", "Game", "QA", "Embedded", "Blockchain", "Data Engineering"]
+CITIES = ["Bengaluru", "Pune", "Hyderabad", "Mumbai", "Delhi", "Chennai", "Kolkata"]
+DURATIONS = ["1 month", "2 months", "3 months", "4 months", "6 months", "9 months", "12 months"]
+WORDS = ("intern portal career skills project team learn build deploy data model cloud code review "
+         "mentor growth interview resume company offer campus placement startup product design").split()
+
+
+def zipf_weights(n, s=1.1):
+    return [1.0 / (i + 1) ** s for i in range(n)]
+
+
+class Generator:
+    def __init__(self, seed=42):
+        self.rng = random.Random(seed)
+        self.skill_weights = zipf_weights(len(SKILL_POOL))
+        self.t0 = datetime.datetime(2025, 1, 1)
+
+    def skills(self, lo, hi):
+        k = self.rng.randint(lo, hi)
+        picked = set()
+        while len(picked) < k:
+            picked.add(self.rng.choices(SKILL_POOL, self.skill_weights)[0])
+        return sorted(picked)
+
+    def when(self, days=300):
+        return (self.t0 + datetime.timedelta(seconds=self.rng.randrange(days * 86400))).isoformat()
+
+    def student(self, sid):
+        first, last = self.rng.choice(FIRST), self.rng.choice(LAST)
+        return {
+            "id": sid,
+            "name": f"{first} {last}",
+            "email": f"{first.lower()}.{last.lower()}{sid}@example.com",
+            "education": self.rng.choice(EDUCATION),
+            "skills": self.skills(1, 6),
+            "resume": None,
+            "notifications": [],
+            "notifications_unread": 0,
+            "registered_at": self.when(),
+        }
+
+    def internship(self):
+        company = self.rng.choice(COMPANIES)
+        location = self.rng.choice(["Remote", "On-site", "Hybrid"])
+        if location != "Remote":
+            location = f"{location} - {self.rng.choice(CITIES)}"
+        return {
+            "company": f"{company} {self.rng.choice(['Labs', 'Corp', 'Tech', 'Systems'])}",
+            "title": f"{self.rng.choice(ROLES)} Intern",
+            "skills": self.skills(1, 4),
+            "location": location,
+            "duration": self.rng.choice(DURATIONS),
+            "openings": self.rng.randint(1, 5),
+            "apps": [],
+            "app_ids": [],
+            "app_times": [],
+            "selected_ids": [],
+            "created_at": self.when(),
+        }
+
+    def blog(self):
+        return {
+            "title": " ".join(self.rng.choices(WORDS, k=5)).title(),
+            "body": " ".join(self.rng.choices(WORDS, k=self.rng.randint(40, 200))),
+            "author": f"{self.rng.choice(FIRST)} {self.rng.choice(LAST)}",
+            "time": self.when(),
+        }
+
+    def notify(self, st, msg):
+        n = {"id": f"n{st['id']}-{len(st['notifications'])}", "msg": msg, "time": self.when(), "read": self.rng.random() < 0.5}
+        st["notifications"].append(n)
+        if not n["read"]:
+            st["notifications_unread"] += 1
+
+
+def generate(n_students, n_internships=None, apps_per_student=3, n_blogs=None, seed=42):
+    """Build a dataset dict in the data.json format"""
+    g = Generator(seed)
+    n_internships = n_internships or max(10, n_students // 20)
+    n_blogs = n_blogs if n_blogs is not None else max(5, n_students // 200)
+
+    students = [g.student(i + 1) for i in range(n_students)]
+    internships = [g.internship() for _ in range(n_internships)]
+    blogs = [g.blog() for _ in range(n_blogs)]
+
+    # Popular postings attract more applications (Zipf over internships too)
+    weights = zipf_weights(n_internships, 0.8)
+    order = list(range(n_internships))
+    g.rng.shuffle(order)
+    for st in students:
+        k = g.rng.randint(0, apps_per_student * 2)
+        for idx in set(g.rng.choices(order, weights, k=k)):
+            it = internships[idx]
+            it["apps"].append(st)
+            it["app_ids"].append(st["id"])
+            it["app_times"].append(g.when())
+            g.notify(st, f"Your application for '{it['title']}' at {it['company']} has been submitted successfully.")
+    for it in internships:
+        if it["app_ids"] and g.rng.random() < 0.3:
+            it["selected_ids"] = it["app_ids"][:it["openings"]]
+            it["selected_at"] = g.when()
+
+    return {"version": 1, "students": students, "internships": internships, "blogs": blogs}
+
+
+def parse_scale(value):
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate a synthetic data.json")
+    ap.add_argument("--scale", default="1k", help="number of students or one of " + ", ".join(SCALES))
+    ap.add_argument("--internships", type=int, default=None)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    data = generate(parse_scale(args.scale), args.internships, seed=args.seed)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    print(f"wrote {len(data['students'])} students, {len(data['internships'])} internships, "
+          f"{sum(len(i['app_ids']) for i in data['internships'])} applications to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# bench/loadtest.py - Scenario load test against the real Flask app
+#
+# Generates a synthetic dataset, points the app at it (EDIL_DATA_FILE) and
+# drives scripted scenarios through Flask's test client:
+#   browse     /internships with random search/filter/sort combinations
+#   suggest    /skill_suggest as a user types skill prefixes
+#   apply      login + /apply_ajax bursts
+#   allocate   POST /allocate/<id> (runs the allocation)
+#   admin      /admin/dashboard and /admin/applications
+# Reports throughput, p50 and p99 per scenario and writes a JSON result file.
+#
+# Usage: python -m bench.loadtest --scale 10k [--scenarios browse,apply] [--threads 8]
+import argparse, json, os, platform, random, shutil, statistics, sys, tempfile, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import datagen
+from bench.skill_overlap import SKILL_POOL
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BASE_DIR, "bench", "results")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+# --- Scenarios ---
+# Each scenario is a function(client, rng, ctx) performing one "user action"
+# (possibly several HTTP requests) and returning the number of requests made.
+def sc_browse(client, rng, ctx):
+    params = {}
+    if rng.random() < 0.4:
+        params["search"] = rng.choice(["intern", "data", "cloud", "ai", "web", "security"])
+    if rng.random() < 0.5:
+        params["skill"] = rng.choice(SKILL_POOL[:12]).lower()
+    if rng.random() < 0.3:
+        params["location"] = rng.choice(["remote", "onsite", "hybrid"])
+    if rng.random() < 0.3:
+        params["duration"] = rng.choice(["1-3", "3-6", "6+"])
+    params["sort"] = rng.choice(["recent", "company", "title"])
+    ctx.expect(client.get("/internships", query_string=params), 200)
+    return 1
+
+
+def sc_suggest(client, rng, ctx):
+    word = rng.choice(SKILL_POOL).lower()
+    n = 0
+    for i in range(1, min(len(word), 5) + 1):
+        ctx.expect(client.get("/skill_suggest", query_string={"q": word[:i]}), 200)
+        n += 1
+    return n
+
+
+def sc_apply(client, rng, ctx):
+    sid = rng.randint(1, ctx.n_students)
+    ctx.expect(client.post("/login_student", json={"sid": sid}), 200)
+    for _ in range(3):
+        ctx.expect(client.post("/apply_ajax", json={"iid": rng.choice(ctx.internship_ids)}), 200)
+    return 4
+
+
+def sc_allocate(client, rng, ctx):
+    ctx.expect(client.post(f"/allocate/{rng.choice(ctx.internship_ids)}", data={"action": "run"}), 302)
+    return 1
+
+
+def sc_admin(client, rng, ctx):
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    ctx.expect(client.get("/admin/dashboard"), 200)
+    ctx.expect(client.get("/admin/applications"), 200)
+    return 2
+
+
+SCENARIOS = {
+    "browse": sc_browse,
+    "suggest": sc_suggest,
+    "apply": sc_apply,
+    "allocate": sc_allocate,
+    "admin": sc_admin,
+}
+
+
+class Context:
+    def __init__(self, n_students, internship_ids):
+        self.n_students = n_students
+        self.internship_ids = internship_ids
+        self.n_internships = len(internship_ids)
+        self.errors = 0
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def expect(self, response, status):
+        if response.status_code != status:
+            with self._lock:
+                if response.status_code in (429, 503):
+                    self.shed += 1
+                else:
+                    self.errors += 1
+        return response
+
+
+def run_scenario(flask_app, name, fn, iterations, threads, seed, ctx):
+    def one(i):
+        rng = random.Random(seed * 1_000_003 + i)
+        client = flask_app.test_client()
+        t0 = time.perf_counter()
+        n = fn(client, rng, ctx)
+        return time.perf_counter() - t0, n
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(one, range(iterations)))
+    wall = time.perf_counter() - t0
+
+    latencies = sorted(r[0] for r in results)
+    requests = sum(r[1] for r in results)
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "requests": requests,
+        "threads": threads,
+        "wall_seconds": wall,
+        "actions_per_second": iterations / wall if wall else 0.0,
+        "requests_per_second": requests / wall if wall else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Scenario load test for the internship portal")
+    ap.add_argument("--scale", default="1k", help="students: a number or one of " + ", ".join(datagen.SCALES))
+    ap.add_argument("--internships", type=int, default=None)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS))
+    ap.add_argument("--iterations", type=int, default=200, help="actions per scenario")
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--data", default=None, help="use an existing data.json instead of generating one")
+    ap.add_argument("--out", default=None, help="result JSON path (default bench/results/<scale>-<time>.json)")
+    ap.add_argument("--admission", action="store_true",
+                    help="keep rate limiting/load shedding on (429/503 are then counted as shed, not errors)")
+    args = ap.parse_args()
+
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in names if s not in SCENARIOS]
+    if unknown:
+        ap.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    workdir = tempfile.mkdtemp(prefix="edil-bench-")
+    data_file = os.path.join(workdir, "data.json")
+    t0 = time.perf_counter()
+    if args.data:
+        shutil.copy(args.data, data_file)
+    else:
+        data = datagen.generate(datagen.parse_scale(args.scale), args.internships, seed=args.seed)
+        with open(data_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        del data
+    gen_seconds = time.perf_counter() - t0
+
+    os.environ["EDIL_DATA_FILE"] = data_file
+    os.environ["EDIL_ADMISSION"] = "1" if args.admission else "0"
+    sys.path.insert(0, BASE_DIR)
+    t0 = time.perf_counter()
+    import app as portal
+    load_seconds = time.perf_counter() - t0
+
+    ctx = Context(len(portal.students), [it["id"] for it in portal.internships])
+    print(f"dataset: {ctx.n_students} students, {ctx.n_internships} internships "
+          f"(generated {gen_seconds:.2f}s, app import+load {load_seconds:.2f}s)")
+    print(f"{'scenario':<10} {'actions':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+
+    results = []
+    for i, name in enumerate(names):
+        r = run_scenario(portal.app, name, SCENARIOS[name], args.iterations, args.threads, args.seed + i, ctx)
+        results.append(r)
+        print(f"{name:<10} {r['iterations']:>8} {r['requests_per_second']:>10.1f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f}")
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "students": ctx.n_students,
+        "internships": ctx.n_internships,
+        "threads": args.threads,
+        "seed": args.seed,
+        "generate_seconds": gen_seconds,
+        "load_seconds": load_seconds,
+        "errors": ctx.errors,
+        "shed": ctx.shed,
+        "results": results,
+    }
+    out = args.out
+    if not out:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, f"{args.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"errors: {ctx.errors}; shed: {ctx.shed}; results written to {out}")
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
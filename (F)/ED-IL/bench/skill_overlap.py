@@ -0,0 +1,104 @@
+# bench/skill_overlap.py - Micro-benchmarks for the skill overlap kernels
+#
+# Compares the old set-per-comparison approach against the bitset kernels in
+# skill_bits. Usage: python -m bench.skill_overlap [--students N] [--internships M]
+import argparse, random, timeit
+
+import skill_bits
+
+SKILL_POOL = [
+    "Python", "Java", "JavaScript", "SQL", "React", "Node.js", "AWS", "Docker",
+    "Kubernetes", "Machine Learning", "TensorFlow", "PyTorch", "C++", "C#", "Go",
+    "Rust", "Flask", "Django", "HTML", "CSS", "Unity", "Blockchain", "Solidity",
+    "Cybersecurity", "Linux", "Git", "Figma", "Kotlin", "Swift", "R", "Excel",
+    "Tableau", "Spark", "Hadoop", "MongoDB", "PostgreSQL", "GraphQL", "TypeScript",
+]
+
+
+def make_records(n, rng, lo=1, hi=6):
+    return [{"id": i, "skills": rng.sample(SKILL_POOL, rng.randint(lo, hi))} for i in range(n)]
+
+
+# --- Reference (set-based) kernels ---
+def set_overlap_all(students, internships):
+    total = 0
+    for it in internships:
+        req = set(s.lower() for s in it["skills"])
+        for st in students:
+            total += len(req & set(s.lower() for s in st["skills"]))
+    return total
+
+
+def set_matched_all(students, internships):
+    out = 0
+    for it in internships:
+        req = set(it["skills"])
+        for st in students:
+            out += len(list(req & set(st["skills"])))
+    return out
+
+
+# --- Bitset kernels ---
+def bit_overlap_all(students, internships):
+    total = 0
+    st_masks = [skill_bits.record_mask(st, "student", fold=True) for st in students]
+    for it in internships:
+        req = skill_bits.record_mask(it, "internship", fold=True)
+        for m in st_masks:
+            total += (req & m).bit_count()
+    return total
+
+
+def bit_matched_all(students, internships):
+    out = 0
+    st_masks = [skill_bits.record_mask(st, "student") for st in students]
+    for it in internships:
+        req = skill_bits.record_mask(it, "internship")
+        for m in st_masks:
+            common = req & m
+            if common:
+                out += len(skill_bits.mask_skills(common))
+    return out
+
+
+def run(label, fn, repeat):
+    best = min(timeit.repeat(fn, number=1, repeat=repeat))
+    print(f"  {label:<28} {best * 1000:9.2f} ms")
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Skill overlap kernel micro-benchmarks")
+    ap.add_argument("--students", type=int, default=2000)
+    ap.add_argument("--internships", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    students = make_records(args.students, rng)
+    internships = make_records(args.internships, rng, 1, 4)
+
+    # Sanity check: both kernels must agree before we time anything
+    skill_bits.rebuild(students, internships)
+    assert set_overlap_all(students, internships) == bit_overlap_all(students, internships)
+
+    pairs = args.students * args.internships
+    print(f"{args.students} students x {args.internships} internships = {pairs} comparisons")
+
+    print("overlap count")
+    a = run("sets", lambda: set_overlap_all(students, internships), args.repeat)
+    b = run("bitsets (cached masks)", lambda: bit_overlap_all(students, internships), args.repeat)
+    print(f"  speedup {a / b:.1f}x")
+
+    print("matched skill list")
+    a = run("sets", lambda: set_matched_all(students, internships), args.repeat)
+    b = run("bitsets (cached masks)", lambda: bit_matched_all(students, internships), args.repeat)
+    print(f"  speedup {a / b:.1f}x")
+
+    print("mask construction")
+    run("skill_mask per record", lambda: [skill_bits.skill_mask(st["skills"]) for st in students], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
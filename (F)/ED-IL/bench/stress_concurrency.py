@@ -0,0 +1,110 @@
+# bench/stress_concurrency.py - Parallel apply/register stress run
+#
+# Fires thousands of concurrent /apply_ajax and /student/register requests
+# (including deliberate duplicate applies) at the real app through Flask's
+# test client, on a scratch copy of data.json, then checks the invariants:
+#   * every student ID is unique and every registration got one,
+#   * no internship lists a student twice, apps and app_ids agree,
+#   * exactly one "ok" per distinct (student, internship) pair,
+#   * what was saved to disk matches memory.
+#
+# Usage: python -m bench.stress_concurrency [--applies N] [--registrations N] [--threads N]
+import argparse, json, os, random, shutil, sys, tempfile, time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Concurrent apply/register stress test")
+    ap.add_argument("--applies", type=int, default=3000)
+    ap.add_argument("--registrations", type=int, default=1000)
+    ap.add_argument("--threads", type=int, default=32)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="edil-stress-")
+    data_file = os.path.join(workdir, "data.json")
+    shutil.copy(os.path.join(BASE_DIR, "data.json"), data_file)
+    os.environ["EDIL_DATA_FILE"] = data_file
+    os.environ["EDIL_ADMISSION"] = "0"  # this test wants every request through
+    sys.path.insert(0, BASE_DIR)
+    import app as portal
+
+    rng = random.Random(args.seed)
+    flask_app = portal.app
+    start_students = len(portal.students)
+    student_ids = [s["id"] for s in portal.students]
+    internship_ids = [it["id"] for it in portal.internships]
+
+    # Few students x few internships so many applies collide on purpose
+    jobs = [("apply", rng.choice(student_ids), rng.choice(internship_ids)) for _ in range(args.applies)]
+    jobs += [("register", i, None) for i in range(args.registrations)]
+    rng.shuffle(jobs)
+
+    def run(job):
+        kind, a, b = job
+        client = flask_app.test_client()
+        if kind == "apply":
+            with client.session_transaction() as sess:
+                sess["current_student_id"] = a
+            r = client.post("/apply_ajax", json={"iid": b})
+            return kind, (a, b), r.get_json()["status"]
+        r = client.post("/student/register", data={"name": f"stress-{a}", "skills": "Python, Go"})
+        return kind, a, r.status_code
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(run, jobs))
+    elapsed = time.perf_counter() - t0
+
+    failures = []
+
+    def check(cond, msg):
+        if not cond:
+            failures.append(msg)
+
+    # Registrations
+    ids = [s["id"] for s in portal.students]
+    check(len(ids) == len(set(ids)), f"duplicate student ids: {[k for k, v in Counter(ids).items() if v > 1][:10]}")
+    check(len(portal.students) == start_students + args.registrations,
+          f"expected {start_students + args.registrations} students, got {len(portal.students)}")
+    reg_codes = Counter(code for kind, _, code in results if kind == "register")
+    check(set(reg_codes) == {302}, f"unexpected register responses: {dict(reg_codes)}")
+
+    # Applications
+    ok_pairs = Counter(pair for kind, pair, status in results if kind == "apply" and status == "ok")
+    attempted = {pair for kind, pair, _ in results if kind == "apply"}
+    check(all(v == 1 for v in ok_pairs.values()), "a (student, internship) pair was accepted twice")
+    by_id = {it["id"]: it for it in portal.internships}
+    for iid, it in by_id.items():
+        app_ids = it.get("app_ids", [])
+        check(len(app_ids) == len(set(app_ids)), f"internship {iid} has duplicate app_ids")
+        check(len(it.get("apps", [])) == len(app_ids), f"internship {iid} apps/app_ids length mismatch")
+    for sid, iid in attempted:
+        check(sid in by_id[iid].get("app_ids", []), f"student {sid} missing from internship {iid}")
+
+    # Persistence
+    portal.schedule_save()
+    with open(data_file, encoding="utf-8") as f:
+        saved = json.load(f)
+    check(len(saved["students"]) == len(portal.students), "saved student count differs from memory")
+    check([it.get("app_ids", []) for it in saved["internships"]] ==
+          [it.get("app_ids", []) for it in portal.internships], "saved applications differ from memory")
+
+    total = len(jobs)
+    print(f"{total} requests on {args.threads} threads in {elapsed:.2f}s ({total / elapsed:.0f} req/s)")
+    print(f"  applies: {args.applies} attempted, {sum(ok_pairs.values())} accepted, {len(attempted)} distinct pairs")
+    print(f"  registrations: {args.registrations}, students now {len(portal.students)}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    if failures:
+        print("FAILED invariants:")
+        for msg in failures[:20]:
+            print("  -", msg)
+        sys.exit(1)
+    print("all invariants hold")
+
+
+if __name__ == "__main__":
+    main()
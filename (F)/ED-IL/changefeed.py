@@ -0,0 +1,171 @@
+# changefeed.py - Versioned change events for incremental sync
+#
+# Every mutation appends one compact event to a JSON-lines file next to
+# data.json; the newest MEMORY_EVENTS are also kept in memory. Events carry
+# a sequence number that only grows, so a consumer remembers the last seq it
+# saw and asks for what came after it (`/api/changes?since=<seq>`), paying
+# O(changes) instead of re-reading the dataset.
+#
+#   {"seq": 42, "time": "...", "op": "create", "type": "application",
+#    "id": "7:12", "data": {"internship": 7, "student": 12}}
+#   {"seq": 43, "time": "...", "op": "update", "type": "student",
+#    "id": 12, "fields": ["phone", "skills"]}
+#
+# op is create / update / delete. Events say what changed, never the values:
+# data holds only references to other records (REF_KEYS) and updates list the
+# names of the fields that changed, so emails, resumes and message bodies
+# never reach the log; a consumer fetches the records it cares about.
+# With several workers the file is the shared source of truth: appends happen
+# under a file lock and each process reads the lines others appended before
+# answering. The file is trimmed to its newest KEEP_EVENTS when it grows past
+# MAX_EVENTS; a cursor older than what is kept gets a "reset" answer and must
+# resync from a full read.
+import datetime, json, os, threading
+from collections import deque
+
+import shared_state
+
+MEMORY_EVENTS = int(os.environ.get("EDIL_CHANGES_MEMORY", "10000"))
+MAX_EVENTS = int(os.environ.get("EDIL_CHANGES_MAX", "200000"))
+KEEP_EVENTS = MAX_EVENTS // 2
+REF_KEYS = ("internship", "student", "merged_into", "archived", "archived_before")
+
+
+def _redact(ev):
+    """Keep only references in data; other keys of an update become field names"""
+    data = ev.pop("data", None)
+    if not data:
+        return ev
+    refs = {k: v for k, v in data.items() if k in REF_KEYS}
+    if refs:
+        ev["data"] = refs
+    if ev["op"] == "update":
+        fields = sorted(set(ev.get("fields", ())) | {k for k in data if k not in REF_KEYS})
+        if fields:
+            ev["fields"] = fields
+    return ev
+
+
+class ChangeLog:
+    def __init__(self, path, memory_events=MEMORY_EVENTS):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_lock = shared_state.FileLock(path + ".lock")
+        self._recent = deque(maxlen=memory_events)
+        self._stamp = None      # (inode, bytes read) of the file
+        self._last = 0          # newest seq known
+        self._oldest = 1        # oldest seq still in the file
+        self._count = 0         # events in the file
+
+    # --- File sync ---
+    def _catch_up(self):
+        """Read events other processes appended (or reload after a trim)"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if self._stamp and self._stamp[0] == st.st_ino and self._stamp[1] == st.st_size:
+            return
+        restart = not self._stamp or self._stamp[0] != st.st_ino or st.st_size < self._stamp[1]
+        if restart:
+            self._recent.clear()
+            self._count = 0
+            self._oldest = 0
+        offset = 0 if restart else self._stamp[1]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1  # a line still being written is read next time
+        for line in data[:end].splitlines():
+            try:
+                ev = _redact(json.loads(line))
+            except (ValueError, KeyError, AttributeError):
+                continue
+            if not self._oldest:
+                self._oldest = ev["seq"]
+            self._recent.append(ev)
+            self._last = max(self._last, ev["seq"])
+            self._count += 1
+        if not self._oldest:
+            self._oldest = self._last + 1
+        self._stamp = (st.st_ino, offset + end)
+
+    def _trim(self):
+        """Rewrite the file with only its newest KEEP_EVENTS"""
+        with open(self.path, "rb") as f:
+            lines = f.read().splitlines(keepends=True)
+        kept = lines[-KEEP_EVENTS:]
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.writelines(kept)
+        os.replace(tmp, self.path)
+        self._stamp = None
+        self._catch_up()
+
+    # --- Writing ---
+    def emit(self, op, kind, eid, data=None):
+        """Append one event; returns its seq (0 if it could not be stored)
+
+        data may be the changed part of a record: only its references and,
+        for updates, its keys are stored.
+        """
+        with self._lock, self._file_lock:
+            try:
+                self._catch_up()
+                ev = {"seq": self._last + 1, "time": datetime.datetime.utcnow().isoformat(),
+                      "op": op, "type": kind, "id": eid}
+                if data:
+                    ev["data"] = data
+                _redact(ev)
+                line = (json.dumps(ev, ensure_ascii=False) + "\n").encode("utf-8")
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+                self._catch_up()
+                if self._count > MAX_EVENTS:
+                    self._trim()
+                return ev["seq"]
+            except Exception as e:
+                print("Failed to record change:", e)
+                return 0
+
+    # --- Reading ---
+    def latest(self):
+        with self._lock:
+            self._catch_up()
+            return self._last
+
+    def since(self, cursor, limit):
+        """(events after `cursor`, more?) or None when `cursor` is too old"""
+        with self._lock:
+            self._catch_up()
+            if cursor < self._oldest - 1 and self._count:
+                return None
+            if self._recent and cursor >= self._recent[0]["seq"] - 1:
+                source = self._recent
+            else:
+                source = self._read_all()
+            out = []
+            for ev in source:
+                if ev["seq"] > cursor:
+                    if len(out) == limit:
+                        return out, True
+                    out.append(ev)
+            return out, False
+
+    def _read_all(self):
+        # Only for cursors older than the in-memory window
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read(self._stamp[1] if self._stamp else -1)
+        except OSError:
+            return []
+        out = []
+        for line in data.splitlines():
+            try:
+                out.append(_redact(json.loads(line)))
+            except (ValueError, KeyError, AttributeError):
+                continue
+        return out
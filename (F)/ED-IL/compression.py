@@ -0,0 +1,131 @@
+# compression.py - Negotiated response compression (WSGI middleware)
+#
+# Compresses text responses with brotli (when the brotli package is
+# installed) or gzip, according to the client's Accept-Encoding. Responses
+# with a known length below MIN_BYTES are left alone; streamed responses
+# (no Content-Length) are compressed chunk by chunk with a sync flush after
+# each one, so every chunk still reaches the client as soon as it is
+# rendered. Responses that already carry a Content-Encoding (precompressed
+# assets), partial content and event streams pass through untouched.
+import os, zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MIN_BYTES = int(os.environ.get("EDIL_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.environ.get("EDIL_COMPRESS_LEVEL", "6"))
+BROTLI_QUALITY = 4  # dynamic pages: fast settings compress about as well as gzip -9
+
+COMPRESSIBLE = ("text/html", "text/plain", "text/css", "text/csv", "text/xml", "application/json",
+                "application/javascript", "text/javascript", "application/xml", "image/svg+xml")
+
+
+def negotiate(accept_encoding):
+    """'br', 'gzip' or None for an Accept-Encoding header"""
+    offered = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            offered[name] = q
+    if brotli is not None and offered.get("br", 0) > 0:
+        return "br"
+    if offered.get("gzip", offered.get("*", 0)) > 0:
+        return "gzip"
+    return None
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def chunk(self, data, flush):
+        out = self._z.compress(data)
+        return out + self._z.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._z.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def chunk(self, data, flush):
+        out = self._c.process(data)
+        return out + self._c.flush() if flush else out
+
+    def finish(self):
+        return self._c.finish()
+
+
+class CompressionMiddleware:
+    def __init__(self, app, min_bytes=MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    def _wants(self, status, headers):
+        if not status.startswith("200"):
+            return False
+        h = {k.lower(): v for k, v in headers}
+        if "content-encoding" in h or "no-transform" in h.get("cache-control", ""):
+            return False
+        ctype = h.get("content-type", "").split(";")[0].strip().lower()
+        if ctype not in COMPRESSIBLE:
+            return False
+        length = h.get("content-length")
+        return length is None or int(length) >= self.min_bytes
+
+    def __call__(self, environ, start_response):
+        encoding = negotiate(environ.get("HTTP_ACCEPT_ENCODING"))
+        if encoding is None or environ.get("REQUEST_METHOD") == "HEAD":
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def _start_response(status, headers, exc_info=None):
+            if self._wants(status, headers):
+                state["streamed"] = not any(k.lower() == "content-length" for k, _ in headers)
+                out = []
+                vary = None
+                for k, v in headers:
+                    lk = k.lower()
+                    if lk in ("content-length", "accept-ranges"):
+                        continue
+                    if lk == "etag" and not v.startswith("W/"):
+                        v = "W/" + v  # the compressed bytes differ from the identity body
+                    if lk == "vary":
+                        vary = v
+                        continue
+                    out.append((k, v))
+                out.append(("Content-Encoding", encoding))
+                out.append(("Vary", f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"))
+                headers = out
+                state["compress"] = True
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, _start_response)
+        if not state.get("compress"):
+            return body
+        return self._compress(body, _Brotli() if encoding == "br" else _Gzip(), state["streamed"])
+
+    @staticmethod
+    def _compress(body, compressor, streamed):
+        try:
+            for data in body:
+                if data:
+                    out = compressor.chunk(data, streamed)
+                    if out:
+                        yield out
+            yield compressor.finish()
+        finally:
+            close = getattr(body, "close", None)
+            if close is not None:
+                close()
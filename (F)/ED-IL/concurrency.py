@@ -0,0 +1,81 @@
+# concurrency.py - Fine-grained locking for request handlers
+#
+# The save lock in app.py only serialises writes to disk. These helpers
+# protect the in-memory mutations themselves without a global lock:
+#   * LockStripes hands out one of N locks per record, so applies to
+#     different internships never contend,
+#   * IdAllocator gives out unique, increasing integer IDs,
+#   * add_application is a compare-and-set insert into an internship.
+import threading
+
+import snapshot
+
+
+class LockStripes:
+    """Fixed pool of locks; a record always maps to the same stripe"""
+
+    def __init__(self, n=64):
+        self._locks = [threading.Lock() for _ in range(n)]
+
+    def for_record(self, rec):
+        # Records are plain dicts, so stripe on object identity
+        return self._locks[(id(rec) >> 4) % len(self._locks)]
+
+    def for_key(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class IdAllocator:
+    """Thread-safe monotonically increasing ID source"""
+
+    def __init__(self, start=1):
+        self._lock = threading.Lock()
+        self._next = start
+
+    def reset(self, existing_ids):
+        """Continue after the largest ID already in use"""
+        top = 0
+        for x in existing_ids:
+            try:
+                top = max(top, int(x))
+            except (TypeError, ValueError):
+                continue
+        with self._lock:
+            self._next = top + 1
+
+    def observe(self, value):
+        """Never hand out `value` (an ID assigned elsewhere, e.g. in data.json)"""
+        with self._lock:
+            self._next = max(self._next, int(value) + 1)
+
+    def next(self):
+        with self._lock:
+            value = self._next
+            self._next += 1
+            return value
+
+
+internship_locks = LockStripes()
+student_locks = LockStripes()
+
+
+def add_application(it, student, when=None):
+    """Append a student to an internship unless already applied.
+
+    `when` (an ISO timestamp) is kept in it["app_times"], aligned with
+    it["app_ids"]. Returns True if this call inserted the application,
+    False if the student had already applied (including a racing
+    concurrent apply).
+    """
+    with internship_locks.for_record(it):
+        app_ids = it.setdefault("app_ids", [])
+        if student["id"] in app_ids:
+            return False
+        times = it.setdefault("app_times", [])
+        if len(times) < len(app_ids):
+            times.extend([None] * (len(app_ids) - len(times)))  # applied before times were kept
+        it.setdefault("apps", []).append(student)
+        app_ids.append(student["id"])
+        times.append(when)
+        snapshot.touch(it)
+        return True
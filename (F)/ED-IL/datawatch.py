@@ -0,0 +1,169 @@
+# datawatch.py - Pick up edits to data.json without a restart
+#
+# Operators sometimes edit data.json by hand (add a posting, fix a typo), and
+# with several workers every save by one worker is an edit for the others.
+# Instead of re-parsing and re-indexing the whole file, only the records that
+# changed are applied:
+#   - detection: a thread polls the file's (mtime, size, inode) every
+#     WATCH_INTERVAL seconds (the stdlib has no inotify; a stat is cheap).
+#     The stamp of the file this process last wrote or read is remembered,
+#     so its own saves are not mistaken for edits,
+#   - diff: data.json holds one record per line (snapshot.py). A base maps
+#     the hash of every line this process last wrote or read to its record
+#     id; a line found in the base is unchanged and is never parsed, so a
+#     one-line edit parses one record. A file no longer in that layout (say,
+#     re-indented by an editor) is parsed whole and its records re-encoded
+#     to compare them,
+#   - three-way: only lines that differ from the base count as changes, and
+#     only records in the base can be deleted, so records created in memory
+#     since the last save are kept.
+# The caller applies the result to the live lists and indexes (app.py).
+import json, os, re, threading, time
+
+import snapshot
+
+WATCH_INTERVAL = float(os.environ.get("EDIL_WATCH_INTERVAL", "2"))
+LISTS = ("students", "internships", "blogs")
+
+_HEAD_RE = re.compile(r'\{"version": (\d+),?$')
+_LIST_RE = re.compile(r'"(\w+)": \[(\])?\}?,?$')
+
+
+def stamp(path):
+    """(mtime, size, inode) of a file, or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def split_lines(text):
+    """(version, {name: [record line]}) of a file in the layout Snapshot.write uses, else None"""
+    lines = text.split("\n")
+    head = _HEAD_RE.match(lines[0])
+    if head is None:
+        return None
+    out, cur = {}, None
+    for line in lines[1:]:
+        if cur is not None:
+            if line.startswith("]"):
+                cur = None
+            elif line.startswith("{"):
+                cur.append(line[:-1] if line.endswith(",") else line)
+            else:
+                return None
+            continue
+        m = _LIST_RE.match(line)
+        if m:
+            cur = out[m.group(1)] = []
+            if m.group(2):
+                cur = None
+        elif line not in ("}", ""):
+            return None
+    return int(head.group(1)), out
+
+
+def base_from_lines(lines, records):
+    """Base for a file just loaded: its lines zipped with the records read from them"""
+    if len(lines) != len(records):
+        return None
+    return {hash(line): rec.get("id") for line, rec in zip(lines, records)}
+
+
+def base_from_snapshot(snap):
+    return {name: {hash(text): rid for text, rid in snap.texts(name)} for name in snap.names()}
+
+
+def read(path):
+    """(stamp, version, {name: [(line hash, line text or None, record or None)]}) of the file"""
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        text = f.read().decode("utf-8")
+    found = (st.st_mtime_ns, st.st_size, st.st_ino)
+    split = split_lines(text)
+    if split is not None:
+        version, lines = split
+        return found, version, {name: [(hash(line), line, None) for line in lines.get(name, [])]
+                                for name in LISTS}
+    d = json.loads(text)
+    lists = {}
+    for name in LISTS:
+        lists[name] = [(hash(snapshot.encode(rec)), None, rec) for rec in d.get(name) or []]
+    return found, int(d.get("version", 0)), lists
+
+
+def diff(entries, base):
+    """(added, updated, deleted ids, new base) of one list against its base
+
+    Records are parsed only for lines not in the base. A changed line whose
+    id is in the base updates that record; one without an id, with an
+    unknown id or repeating an id is added. Ids in the base but on no line
+    were deleted. The new base maps each line to its record's id (None for
+    added records: the caller fills them in once ids are assigned).
+    """
+    seen, changed, new_base = set(), [], {}
+    for h, line, rec in entries:
+        rid = base.get(h)
+        if rid is not None and rid not in seen:
+            seen.add(rid)
+            new_base[h] = rid
+            continue
+        changed.append((h, json.loads(line) if rec is None else rec))
+    known = set(base.values())
+    added, updated = [], []
+    for h, rec in changed:
+        if not isinstance(rec, dict):
+            raise ValueError("record is not an object: %.60r" % (rec,))
+        rid = rec.get("id")
+        if isinstance(rid, int) and rid in known and rid not in seen:
+            seen.add(rid)
+            new_base[h] = rid
+            updated.append(rec)
+        else:
+            added.append((h, rec))
+    return added, updated, known - seen, new_base
+
+
+class Watcher:
+    """Polls a file and calls on_change() when it differs from what we last wrote or read"""
+
+    def __init__(self, path, on_change, interval=WATCH_INTERVAL):
+        self.path = path
+        self.on_change = on_change
+        self.interval = interval
+        self.seen = None        # stamp of the file as this process last wrote or read it
+        self.base = None        # name -> {line hash: record id} for that file (or a Snapshot)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def mark(self, seen, base):
+        self.seen, self.base = seen, base
+
+    def bases(self):
+        """The base per list, converting a Snapshot the first time it is needed"""
+        if isinstance(self.base, snapshot.Snapshot):
+            self.base = base_from_snapshot(self.base)
+        return self.base
+
+    def changed(self):
+        st = stamp(self.path)
+        return st is not None and st != self.seen
+
+    def start(self):
+        # Threads do not survive a fork: each worker starts its own on first use
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="data-watch", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                if self.changed():
+                    self.on_change()
+            except Exception as e:
+                print("Failed to apply data.json changes:", e)
@@ -0,0 +1,253 @@
+# dedupe.py - Duplicate student detection
+#
+# Two layers:
+#   - an exact index of normalized emails, checked (and claimed atomically)
+#     at registration, so the same address cannot register twice,
+#   - a MinHash / LSH index over name + email + skills for near-duplicates
+#     (typos, a second address, reordered skills), used by the admin report.
+#
+# Each student becomes a set of features (character trigrams of the name and
+# email, plus skill words). Its MinHash signature summarises that set in
+# NUM_HASHES values such that two signatures agree in a position with
+# probability equal to the Jaccard similarity of the feature sets. The
+# signature is cut into BANDS bands of ROWS values and each band is hashed
+# into a bucket: records sharing any bucket are candidates, so finding them
+# costs one dict lookup per band instead of comparing every pair. With 8
+# bands of 4 rows a pair at similarity 0.8 shares a bucket ~98% of the time,
+# one at 0.3 ~6%, and candidates are then confirmed by their exact feature
+# similarity.
+#
+# Signatures use one-permutation hashing: each feature is hashed once and
+# lands in one of NUM_HASHES bins by its low bits, each bin keeping its
+# smallest value; empty bins borrow from the next filled bin. That is one
+# hash per feature instead of NUM_HASHES, which matters in pure Python (a
+# 100k-student index builds in seconds). The hashes are Python's str hash,
+# salted per process, so signatures are never stored, only rebuilt.
+import operator, re, threading
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+THRESHOLD = 0.75
+SLACK = 0.2   # candidates whose signatures estimate below THRESHOLD - SLACK are not scored
+MAX_BUCKET = 20  # a bucket shared by more records is too generic to mean "duplicate"
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+_BIN_BITS = NUM_HASHES.bit_length() - 1   # NUM_HASHES is a power of two
+_MASK = (1 << 64) - 1
+
+
+def normalize_email(email):
+    """Lowercased address without a +tag: 'A.B+x@Mail.com' -> 'a.b@mail.com'"""
+    email = (email or "").strip().lower()
+    local, at, domain = email.partition("@")
+    if not at or not local or not domain:
+        return None
+    return local.split("+", 1)[0] + "@" + domain
+
+
+def _trigrams(prefix, text):
+    text = f" {' '.join(text.split())} "
+    return {prefix + text[i:i + 3] for i in range(len(text) - 2)} if len(text) > 3 else set()
+
+
+def features(student):
+    """The set a student is compared by"""
+    out = _trigrams("n:", (student.get("name") or "").lower())
+    email = normalize_email(student.get("email"))
+    if email:
+        local, _, domain = email.partition("@")
+        out |= _trigrams("e:", local)
+        out.add("d:" + domain)
+    for sk in student.get("skills") or []:
+        for word in _WORD_RE.findall(str(sk).lower()):
+            out.add("s:" + word)
+    return out
+
+
+def signature(feats):
+    """MinHash signature (NUM_HASHES values) of a feature set"""
+    if not feats:
+        return None
+    bins = [None] * NUM_HASHES
+    for f in feats:
+        h = hash(f) & _MASK
+        b, v = h & (NUM_HASHES - 1), h >> _BIN_BITS
+        if bins[b] is None or v < bins[b]:
+            bins[b] = v
+    # Densify: an empty bin takes the next filled bin's value (wrapping),
+    # tagged with the distance so it does not match that bin itself
+    nxt, dist = None, 0
+    for i in range(2 * NUM_HASHES - 1, -1, -1):
+        j = i % NUM_HASHES
+        if bins[j] is not None and not isinstance(bins[j], tuple):
+            nxt, dist = bins[j], 0
+        elif i < NUM_HASHES and bins[j] is None:
+            bins[j] = (nxt, dist)
+        dist += 1
+    return tuple(bins)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+class DuplicateIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._emails = {}                          # normalized email -> set of student ids
+        self._buckets = [{} for _ in range(BANDS)] # band hash -> student id, or set of ids
+        self._sigs = {}                            # student id -> its signature
+
+    @staticmethod
+    def _band_keys(sig):
+        return [hash(sig[b * ROWS:(b + 1) * ROWS]) for b in range(BANDS)]
+
+    # --- Maintenance ---
+    def rebuild(self, students):
+        with self._lock:
+            self.clear()
+            for s in students:
+                self._add(s)
+
+    def _add(self, student):
+        sid = student.get("id")
+        email = normalize_email(student.get("email"))
+        if email:
+            self._emails.setdefault(email, set()).add(sid)
+        sig = signature(features(student))
+        if sig is None:
+            return
+        self._sigs[sid] = sig
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            held = bucket.get(key)
+            if held is None:
+                bucket[key] = sid  # most buckets hold a single id; no set for those
+            elif isinstance(held, set):
+                held.add(sid)
+            elif held != sid:
+                bucket[key] = {held, sid}
+
+    def add(self, student):
+        with self._lock:
+            self._add(student)
+
+    def remove(self, student):
+        sid = student.get("id")
+        with self._lock:
+            email = normalize_email(student.get("email"))
+            ids = self._emails.get(email)
+            if ids is not None:
+                ids.discard(sid)
+                if not ids:
+                    del self._emails[email]
+            sig = self._sigs.pop(sid, None)
+            for bucket, key in zip(self._buckets, self._band_keys(sig) if sig else ()):
+                held = bucket.get(key)
+                if held == sid:
+                    del bucket[key]
+                elif isinstance(held, set):
+                    held.discard(sid)
+                    if len(held) == 1:
+                        bucket[key] = next(iter(held))
+
+    def claim_email(self, email, sid):
+        """Register `email` for `sid` unless taken; returns the owner's id or None"""
+        email = normalize_email(email)
+        if not email:
+            return None
+        with self._lock:
+            owners = self._emails.get(email)
+            if owners:
+                return min(owners)
+            self._emails[email] = {sid}
+            return None
+
+    # --- Queries ---
+    def by_email(self, email):
+        with self._lock:
+            return set(self._emails.get(normalize_email(email), ()))
+
+    def candidates(self, student):
+        """Ids sharing at least one LSH bucket with `student` (excluding itself)"""
+        sig = signature(features(student))
+        if sig is None:
+            return set()
+        out = set()
+        with self._lock:
+            for bucket, key in zip(self._buckets, self._band_keys(sig)):
+                held = bucket.get(key)
+                if isinstance(held, set):
+                    if len(held) <= MAX_BUCKET:
+                        out |= held
+                elif held is not None:
+                    out.add(held)
+        out.discard(student.get("id"))
+        return out
+
+    def report(self, lookup, threshold=THRESHOLD):
+        """Groups of likely duplicates: [{"ids": [...], "pairs": [(a, b, score, reason)]}]
+
+        `lookup(id)` returns the student record. Exact email matches always
+        count; other candidate pairs need feature similarity >= threshold.
+        """
+        with self._lock:
+            pairs = {}
+            for ids in self._emails.values():
+                if len(ids) > 1:
+                    ordered = sorted(ids)
+                    for other in ordered[1:]:
+                        pairs[(ordered[0], other)] = "email"
+            # Signature agreement estimates similarity cheaply; only pairs
+            # that could reach the threshold get an exact score below
+            floor = (threshold - SLACK) * NUM_HASHES
+            sigs, seen, candidate_pairs = self._sigs, set(), []
+            for bucket in self._buckets:
+                for held in bucket.values():
+                    if isinstance(held, set) and 1 < len(held) <= MAX_BUCKET:
+                        ordered = sorted(held)
+                        for i, a in enumerate(ordered):
+                            for b in ordered[i + 1:]:
+                                if (a, b) in seen:
+                                    continue
+                                seen.add((a, b))
+                                if sum(map(operator.eq, sigs[a], sigs[b])) >= floor:
+                                    candidate_pairs.append((a, b))
+
+        feats = {}
+
+        def feats_of(sid):
+            if sid not in feats:
+                rec = lookup(sid)
+                feats[sid] = features(rec) if rec else set()
+            return feats[sid]
+
+        scored = []
+        for a, b in set(candidate_pairs) | set(pairs):
+            score = jaccard(feats_of(a), feats_of(b))
+            reason = pairs.get((a, b))
+            if reason or score >= threshold:
+                scored.append((a, b, round(score, 3), reason or "similar"))
+
+        # Union-find: pairs that share a record end up in one group
+        parent = {}
+
+        def find(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for a, b, _, _ in scored:
+            parent[find(a)] = find(b)
+        groups = {}
+        for a, b, score, reason in scored:
+            g = groups.setdefault(find(a), {"ids": set(), "pairs": []})
+            g["ids"] |= {a, b}
+            g["pairs"].append((a, b, score, reason))
+        out = [{"ids": sorted(g["ids"]), "pairs": sorted(g["pairs"], key=lambda p: -p[2])}
+               for g in groups.values()]
+        return sorted(out, key=lambda g: (-max(p[2] for p in g["pairs"]), g["ids"]))
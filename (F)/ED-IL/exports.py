@@ -0,0 +1,220 @@
+# exports.py - Streaming CSV / XLSX exports for the admin
+#
+# Exports are generators end to end: the row functions walk the in-memory
+# lists and yield one tuple per row, and the writers turn rows into bytes
+# FLUSH_ROWS at a time. Nothing ever holds the whole export, so a million
+# applications cost the same memory as ten (plus one id -> student dict).
+#
+# XLSX needs no spreadsheet library: a workbook is a zip of a few small XML
+# parts and one worksheet, which is streamed through zipfile using inline
+# strings, so there is no shared-string table to build up front.
+import csv, io, re, zipfile
+
+FLUSH_ROWS = 500
+STATUSES = ("accepted", "rejected", "pending")
+
+APPLICATION_COLUMNS = ("internship_id", "company", "title", "student_id", "student_name", "email",
+                       "applied_at", "status")
+ALLOCATION_COLUMNS = ("internship_id", "company", "title", "openings", "applications", "selected",
+                      "allocated_at", "selected_students")
+STUDENT_COLUMNS = ("student_id", "name", "email", "education", "skills", "registered_at",
+                   "applications", "accepted")
+
+
+# --- Rows ---
+def _internships(index, internships, internship=None, company=None):
+    """Internships to export, using the listing index for the filters"""
+    if internship is not None:
+        it = index.by_id.get(internship)
+        return [it] if it else []
+    if company:
+        ids = index.query(company=company) or set()
+        return [it for it in list(internships) if it.get("id") in ids]
+    return list(internships)
+
+
+def _status(it, sid, selected):
+    if sid in selected:
+        return "accepted"
+    return "rejected" if it.get("selected_at") else "pending"
+
+
+def application_rows(index, internships, students_by_id, internship=None, company=None,
+                     status=None, start=None, end=None):
+    """One row per application; start/end are ISO dates matched against applied_at"""
+    for it in _internships(index, internships, internship, company):
+        selected = set(it.get("selected_ids", []))
+        times = it.get("app_times") or []
+        for i, sid in enumerate(list(it.get("app_ids", []))):
+            when = times[i] if i < len(times) else None
+            if (start or end) and not when:
+                continue
+            if start and when[:10] < start:
+                continue
+            if end and when[:10] > end:
+                continue
+            st = _status(it, sid, selected)
+            if status and st != status:
+                continue
+            student = students_by_id.get(sid) or {}
+            yield (it.get("id"), it.get("company", ""), it.get("title", ""), sid, student.get("name", ""),
+                   student.get("email", ""), when or "", st)
+
+
+def allocation_rows(index, internships, students_by_id, internship=None, company=None, start=None, end=None):
+    """One row per allocated internship; start/end filter on allocated_at"""
+    for it in _internships(index, internships, internship, company):
+        when = it.get("selected_at")
+        if not when and not it.get("selected_ids"):
+            continue
+        if (start or end) and not when:
+            continue
+        if (start and when[:10] < start) or (end and when[:10] > end):
+            continue
+        names = [students_by_id.get(sid, {}).get("name", str(sid)) for sid in it.get("selected_ids", [])]
+        yield (it.get("id"), it.get("company", ""), it.get("title", ""), it.get("openings", 1),
+               len(it.get("app_ids", [])), len(names), when or "", "; ".join(names))
+
+
+def student_rows(students, internships, start=None, end=None):
+    """One row per student; start/end filter on registered_at"""
+    applied, accepted = {}, {}
+    for it in list(internships):
+        for sid in it.get("app_ids", []):
+            applied[sid] = applied.get(sid, 0) + 1
+        for sid in it.get("selected_ids", []):
+            accepted[sid] = accepted.get(sid, 0) + 1
+    for s in list(students):
+        when = s.get("registered_at") or ""
+        if (start and when[:10] < start) or (end and (not when or when[:10] > end)):
+            continue
+        sid = s.get("id")
+        yield (sid, s.get("name", ""), s.get("email", ""), s.get("education", ""),
+               ", ".join(s.get("skills", [])), when, applied.get(sid, 0), accepted.get(sid, 0))
+
+
+# --- CSV ---
+def _cell(value):
+    # Spreadsheets run text starting with = + - @ as a formula, and skip a
+    # leading tab or carriage return before looking (OWASP CSV injection)
+    if isinstance(value, str) and value[:1] in ("=", "+", "-", "@", "\t", "\r"):
+        return "'" + value
+    return value
+
+
+def csv_stream(columns, rows):
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    buf.write("\ufeff")  # so Excel reads the file as UTF-8
+    w.writerow(columns)
+    n = 0
+    for row in rows:
+        w.writerow([_cell(v) for v in row])
+        n += 1
+        if n % FLUSH_ROWS == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue().encode("utf-8")
+
+
+# --- XLSX ---
+class _Sink:
+    """Write-only file for zipfile; the generator drains it between rows"""
+
+    def __init__(self):
+        self._parts = []
+        self._pos = 0
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+_XML_BAD = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def _xml(text):
+    text = _XML_BAD.sub("", str(text))
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _xlsx_row(values):
+    cells = []
+    for v in values:
+        if isinstance(v, bool) or v is None:
+            v = "" if v is None else str(v)
+        if isinstance(v, (int, float)):
+            cells.append(f"<c><v>{v}</v></c>")
+        else:
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{_xml(v)}</t></is></c>')
+    return "<row>" + "".join(cells) + "</row>"
+
+
+_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/></Relationships>'),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/></Relationships>'),
+}
+
+
+def xlsx_stream(columns, rows, sheet="Export"):
+    sink = _Sink()
+    zf = zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED)
+    for name, text in _PARTS.items():
+        zf.writestr(name, text)
+    zf.writestr("xl/workbook.xml", (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        f'<sheets><sheet name="{_xml(sheet[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'))
+    yield sink.take()
+
+    # Size unknown up front, so the sheet is written with zip64 sizes
+    with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as f:
+        f.write(('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                 '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                 + _xlsx_row(columns)).encode("utf-8"))
+        batch = []
+        for row in rows:
+            batch.append(_xlsx_row(row))
+            if len(batch) == FLUSH_ROWS:
+                f.write("".join(batch).encode("utf-8"))
+                batch = []
+                data = sink.take()
+                if data:
+                    yield data
+        f.write(("".join(batch) + "</sheetData></worksheet>").encode("utf-8"))
+    zf.close()
+    yield sink.take()
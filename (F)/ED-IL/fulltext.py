@@ -0,0 +1,229 @@
+# fulltext.py - Embedded full-text search with BM25 ranking
+#
+# An Index maps terms to postings {doc_key: weight}, where weight is the
+# BM25 term-frequency component (k1, b, document length) precomputed at
+# insert time. A query then only multiplies by each term's idf and sums, so
+# ranking a term costs one dict pass over its postings. Weights depend on
+# the average document length; they are refreshed when it drifts by more
+# than NORM_DRIFT since the last refresh.
+#
+# The last query word is treated as a prefix ("pyth" finds "python") unless
+# the query ends with a space, so search-as-you-type keeps working. Scored
+# results are kept in a small LRU per normalized query and dropped whenever
+# the index changes, since the same query is usually asked several times per
+# page (listing, facet counts, pagination).
+import bisect, math, re, threading
+from collections import Counter, OrderedDict
+
+K1 = 1.2
+B = 0.75
+NORM_DRIFT = 0.1
+MAX_PREFIX_TERMS = 50
+RESULT_CACHE_SIZE = 128
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*")
+# No word that doubles as a field or degree here: "it" (IT), "is" (Information
+# Systems), "or" (Operations Research) stay searchable
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in its of on our the this to was were will with you your".split())
+
+
+def tokenize(text):
+    """Lowercased word tokens without stopwords; keeps c++ / c# intact"""
+    if not text:
+        return []
+    return [t for t in _TOKEN_RE.findall(str(text).lower()) if t not in STOPWORDS]
+
+
+def searchable(query):
+    """Whether a query has a word the index can look up; callers fall back
+    to a plain substring filter for the rest ("the", "&", ...)"""
+    return bool(tokenize(query))
+
+
+class Index:
+    """Inverted index with incremental add/remove and BM25 search"""
+
+    def __init__(self, k1=K1, b=B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._results = OrderedDict()
+            self.postings = {}      # term -> {key: weight}
+            self._doc_tf = {}       # key -> Counter of terms
+            self._doc_len = {}      # key -> token count
+            self._total_len = 0
+            self._norm_avgdl = 0.0
+            self._terms = None      # sorted vocabulary for prefix lookups, built lazily
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def __contains__(self, key):
+        return key in self._doc_len
+
+    def _avgdl(self):
+        return self._total_len / len(self._doc_len) if self._doc_len else 0.0
+
+    def _weight(self, tf, dl, avgdl):
+        norm = self.k1 * (1 - self.b + self.b * dl / avgdl) if avgdl else self.k1
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def add(self, key, text):
+        """Index (or re-index) one document"""
+        tokens = tokenize(text)
+        with self._lock:
+            self._results.clear()
+            if key in self._doc_len:
+                self.remove(key)
+            tf = Counter(tokens)
+            dl = len(tokens)
+            self._doc_tf[key] = tf
+            self._doc_len[key] = dl
+            self._total_len += dl
+            if not self._norm_avgdl:
+                self._norm_avgdl = self._avgdl()
+            for term, n in tf.items():
+                postings = self.postings.get(term)
+                if postings is None:
+                    postings = self.postings[term] = {}
+                    self._terms = None
+                postings[key] = self._weight(n, dl, self._norm_avgdl)
+
+    def remove(self, key):
+        with self._lock:
+            tf = self._doc_tf.pop(key, None)
+            if tf is None:
+                return
+            self._results.clear()
+            self._total_len -= self._doc_len.pop(key)
+            for term in tf:
+                postings = self.postings[term]
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+                    self._terms = None
+
+    def _renormalize(self):
+        avgdl = self._avgdl()
+        if not avgdl or abs(avgdl - self._norm_avgdl) <= NORM_DRIFT * avgdl:
+            return
+        self._norm_avgdl = avgdl
+        for key, tf in self._doc_tf.items():
+            dl = self._doc_len[key]
+            for term, n in tf.items():
+                self.postings[term][key] = self._weight(n, dl, avgdl)
+
+    def _expand(self, prefix):
+        if self._terms is None:
+            self._terms = sorted(self.postings)
+        i = bisect.bisect_left(self._terms, prefix)
+        out = []
+        while i < len(self._terms) and self._terms[i].startswith(prefix) and len(out) < MAX_PREFIX_TERMS:
+            out.append(self._terms[i])
+            i += 1
+        return out
+
+    def _group_scores(self, terms, n_docs):
+        """Scores for one query word; with prefix expansion the best term counts"""
+        group = None
+        for term in terms:
+            postings = self.postings[term]
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            if group is None:
+                group = {key: idf * w for key, w in postings.items()}
+                continue
+            for key, w in postings.items():
+                s = idf * w
+                if s > group.get(key, 0.0):
+                    group[key] = s
+        return group
+
+    def _restrict(self, result, terms, n_docs):
+        """Add one query word's scores to `result`, dropping keys it lacks"""
+        weighted = []
+        for term in terms:
+            postings = self.postings[term]
+            weighted.append((postings, math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))))
+        out = {}
+        for key, score in result.items():
+            best = 0.0
+            for postings, idf in weighted:
+                w = postings.get(key)
+                if w is not None and idf * w > best:
+                    best = idf * w
+            if best:
+                out[key] = score + best
+        return out
+
+    def _entry(self, query):
+        """Cached [scores, ranked] for a query (ranked is filled on demand)"""
+        words = tokenize(query)
+        if not words:
+            return [{}, []]
+        prefix_last = not str(query).endswith(" ")
+        cache_key = (" ".join(words), prefix_last)
+        with self._lock:
+            hit = self._results.get(cache_key)
+            if hit is not None:
+                self._results.move_to_end(cache_key)
+                return hit
+            self._renormalize()
+            n_docs = len(self._doc_len)
+            groups = []
+            for word in dict.fromkeys(words):
+                if prefix_last and word == words[-1]:
+                    terms = self._expand(word)
+                else:
+                    terms = [word] if word in self.postings else []
+                if not terms:
+                    groups = None
+                    break
+                groups.append(terms)
+
+            result = {}
+            if groups:
+                # Start from the rarest word; common words are then only
+                # looked up for the documents that are still candidates
+                groups.sort(key=lambda terms: sum(len(self.postings[t]) for t in terms))
+                result = self._group_scores(groups[0], n_docs)
+                for terms in groups[1:]:
+                    if not result:
+                        break
+                    result = self._restrict(result, terms, n_docs)
+            entry = [result, None]
+            self._results[cache_key] = entry
+            if len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+            return entry
+
+    def scores(self, query):
+        """{key: score} for documents matching every query word (AND)"""
+        return self._entry(query)[0]
+
+    def search(self, query, limit=None):
+        """[(key, score)] best first"""
+        entry = self._entry(query)
+        if entry[1] is None:
+            entry[1] = sorted(entry[0].items(), key=lambda kv: kv[1], reverse=True)
+        return entry[1] if limit is None else entry[1][:limit]
+
+    def keys(self, query):
+        """Matching keys without ranking order"""
+        return set(self.scores(query))
+
+
+def snippet(text, query, width=160):
+    """A window of `text` around the first query word, for result lists"""
+    if not text:
+        return ""
+    words = tokenize(query) or [str(query).lower().strip()]
+    low = text.lower()
+    pos = min([p for p in (low.find(w) for w in words) if p >= 0] or [0])
+    start = max(0, pos - width // 4)
+    out = " ".join(text[start:start + width].split())
+    return ("…" if start else "") + out + ("…" if start + width < len(text) else "")
@@ -0,0 +1,35 @@
+# gunicorn.conf.py - Multi-process deployment
+#
+#   gunicorn -c gunicorn.conf.py app:app
+#
+# Workers coordinate through data.json.lock (single writer) and
+# data.json.version (change notification), see shared_state.py.
+import multiprocessing, os
+
+os.environ.setdefault("EDIL_MULTIWORKER", "1")
+
+bind = os.environ.get("EDIL_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("EDIL_WORKERS", multiprocessing.cpu_count()))
+threads = int(os.environ.get("EDIL_THREADS", "4"))
+worker_class = "gthread"
+
+# Load and index data.json once in the master; workers share it copy-on-write
+# (see prefork.py). EDIL_PRELOAD=0 makes every worker load its own copy.
+os.environ.setdefault("EDIL_PRELOAD", "1")
+preload_app = os.environ["EDIL_PRELOAD"] == "1"
+if preload_app:
+    import prefork
+    prefork.enable()
+
+
+def when_ready(server):
+    if preload_app:
+        import prefork
+        prefork.freeze()
+        prefork.report("master ready")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        import prefork
+        prefork.after_fork()
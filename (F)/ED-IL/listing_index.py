@@ -0,0 +1,249 @@
+# listing_index.py - Structured location/duration fields and listing indexes
+#
+# Postings carry free-text "location" and "duration" strings. At load and at
+# posting time they are parsed into structured fields stored on the record:
+#   location_type   "remote" | "onsite" | "hybrid" | None
+#   location_city   e.g. "Pune" or None
+#   duration_months numeric months (upper bound for ranges) or None
+# ListingIndex keeps those fields in a sorted duration index for range
+# queries plus posting sets per location type, city, duration bucket and
+# skill, so listing filters are set intersections instead of string scans.
+# The same posting sets give facet counts (how many results each filter value
+# would yield), cached per normalized query until the index changes.
+import bisect, re, threading
+from collections import OrderedDict, defaultdict
+
+LOCATION_TYPES = ("remote", "onsite", "hybrid")
+FACETS = ("location", "duration", "skill", "company")
+FACET_CACHE_SIZE = 256
+
+# Listing page duration buckets: (low, low_inclusive, high) in months
+DURATION_BUCKETS = {
+    "1-3": (0, True, 3),
+    "3-6": (3, True, 6),
+    "6+": (6, False, None),
+}
+
+_UNIT_MONTHS = {"week": 12 / 52, "wk": 12 / 52, "month": 1, "mo": 1, "year": 12, "yr": 12}
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(?:\s*(?:-|to|–)\s*(\d+(?:\.\d+)?))?\s*(weeks?|wks?|months?|mos?|years?|yrs?)?", re.I)
+
+
+# --- Parsing ---
+def parse_duration(text):
+    """Duration text -> months (float), or None if it cannot be read"""
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    m = _DURATION_RE.search(text)
+    if not m:
+        return 12.0 if "year" in text else None
+    value = float(m.group(2) or m.group(1))
+    unit = (m.group(3) or "month").lower().rstrip("s")
+    return round(value * _UNIT_MONTHS.get(unit, 1), 2)
+
+
+def parse_location(text):
+    """Location text -> (location_type, city)"""
+    if not text:
+        return None, None
+    raw = str(text).strip()
+    low = raw.lower()
+    kind = None
+    if "remote" in low or "work from home" in low or "wfh" in low:
+        kind = "remote"
+    elif "hybrid" in low:
+        kind = "hybrid"
+    elif "onsite" in low or "on-site" in low or "on site" in low or "office" in low:
+        kind = "onsite"
+    city = re.sub(r"(?i)\b(remote|hybrid|on[- ]?site|in[- ]office|office|work from home|wfh)\b", "", raw)
+    city = city.strip(" -,/()|")
+    if city and kind is None:
+        kind = "onsite"  # a bare city means the work is at that place
+    return kind, (city or None)
+
+
+def normalize_location_type(value):
+    value = (value or "").strip().lower().replace("-", "").replace(" ", "")
+    return value if value in LOCATION_TYPES else None
+
+
+def structure_record(it):
+    """Fill the structured fields on an internship from its text fields"""
+    kind, city = parse_location(it.get("location"))
+    if it.get("location_type") not in LOCATION_TYPES:
+        it["location_type"] = kind
+    if not it.get("location_city"):
+        it["location_city"] = city
+    if it.get("duration_months") is None:
+        it["duration_months"] = parse_duration(it.get("duration"))
+    return it
+
+
+def duration_buckets(months):
+    """All buckets a duration falls into (3 months is both 1-3 and 3-6)"""
+    if months is None:
+        return []
+    out = []
+    for name, (lo, lo_incl, hi) in DURATION_BUCKETS.items():
+        above = months >= lo if lo_incl else months > lo
+        if above and (hi is None or months <= hi):
+            out.append(name)
+    return out
+
+
+# --- Index ---
+class ListingIndex:
+    """Range and facet indexes over internships, keyed by internship id"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._facet_cache = OrderedDict()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._facet_cache.clear()
+            self.labels = {}          # (facet, key) -> display spelling
+            self.by_id = {}
+            self.positions = {}       # internship id -> index in the internships list
+            self._months = []         # sorted [(months, id)]
+            self.location = defaultdict(set)
+            self.city = defaultdict(set)
+            self.duration = defaultdict(set)
+            self.skill = defaultdict(set)
+            self.company = defaultdict(set)
+
+    def rebuild(self, internships):
+        with self._lock:
+            self.clear()
+            for it in internships:
+                self.add(it)
+            self.reposition(internships)
+
+    def reposition(self, internships):
+        """Refresh id -> list position after the list was reordered"""
+        with self._lock:
+            self.positions = {it["id"]: i for i, it in enumerate(internships)}
+
+    def add(self, it):
+        iid = it["id"]
+        with self._lock:
+            self._facet_cache.clear()
+            self.by_id[iid] = it
+            months = it.get("duration_months")
+            if months is not None:
+                bisect.insort(self._months, (months, iid))
+            for b in duration_buckets(months):
+                self.duration[b].add(iid)
+            if it.get("location_type"):
+                self.location[it["location_type"]].add(iid)
+            if it.get("location_city"):
+                self.city[it["location_city"].lower()].add(iid)
+            for sk in it.get("skills", []):
+                self._post(self.skill, "skill", sk, iid)
+            if it.get("company"):
+                self._post(self.company, "company", it["company"], iid)
+
+    def _post(self, postings, facet, value, iid):
+        key = value.strip().lower()
+        postings[key].add(iid)
+        self.labels.setdefault((facet, key), value.strip())
+
+    def remove(self, it):
+        iid = it["id"]
+        with self._lock:
+            if self.by_id.pop(iid, None) is None:
+                return
+            self._facet_cache.clear()
+            months = it.get("duration_months")
+            if months is not None:
+                i = bisect.bisect_left(self._months, (months, iid))
+                if i < len(self._months) and self._months[i] == (months, iid):
+                    del self._months[i]
+            for postings in (self.duration, self.location, self.city, self.skill, self.company):
+                for key in [k for k, ids in postings.items() if iid in ids]:
+                    postings[key].discard(iid)
+                    if not postings[key]:
+                        del postings[key]
+
+    def months_between(self, lo=None, hi=None, lo_inclusive=True):
+        """Ids whose duration lies in [lo, hi] (lo exclusive if asked); O(log n + k)"""
+        with self._lock:
+            months = self._months
+            if lo is None:
+                start = 0
+            elif lo_inclusive:
+                start = bisect.bisect_left(months, (lo, float("-inf")))
+            else:
+                start = bisect.bisect_right(months, (lo, float("inf")))
+            end = len(months) if hi is None else bisect.bisect_right(months, (hi, float("inf")))
+            return {iid for _, iid in months[start:end]}
+
+    def _filter_sets(self, filters, skip=None):
+        """Posting sets for every active filter except `skip`"""
+        sets = []
+        for facet in ("location", "city", "duration", "skill", "company"):
+            value = filters.get(facet)
+            if value and facet != skip:
+                key = value if facet in ("location", "duration") else value.strip().lower()
+                sets.append(getattr(self, facet).get(key, set()))
+        lo, hi = filters.get("min_months"), filters.get("max_months")
+        if lo is not None or hi is not None:
+            sets.append(self.months_between(lo, hi))
+        return sets
+
+    @staticmethod
+    def _intersect(sets, base=None):
+        if base is not None:
+            sets = sets + [base]
+        if not sets:
+            return None
+        sets = sorted(sets, key=len)
+        return set(sets[0]).intersection(*sets[1:])
+
+    def query(self, **filters):
+        """Ids matching every given filter, or None when no filter applies
+
+        Filters: location, city, duration, skill, company, min_months, max_months.
+        """
+        with self._lock:
+            return self._intersect(self._filter_sets(filters))
+
+    def facet_counts(self, filters, search="", search_ids=None):
+        """Result counts per facet value for a query, plus the total
+
+        Each facet is counted against all the other active filters but not
+        its own, so a count says how many results picking that value gives.
+        `search_ids(search)` returns the ids matching the free-text search;
+        it only runs on a cache miss.
+        """
+        key = (search,) + tuple(sorted((k, v) for k, v in filters.items() if v not in (None, "")))
+        with self._lock:
+            hit = self._facet_cache.get(key)
+            if hit is not None:
+                self._facet_cache.move_to_end(key)
+                return hit
+            base = search_ids(search) if search and search_ids else None
+            matched = self._intersect(self._filter_sets(filters), base)
+            out = {"total": len(self.by_id) if matched is None else len(matched)}
+            for facet in FACETS:
+                within = self._intersect(self._filter_sets(filters, skip=facet), base)
+                counts = {}
+                for value, ids in getattr(self, facet).items():
+                    n = len(ids) if within is None else len(ids & within)
+                    if n:
+                        counts[value] = n
+                out[facet] = counts
+            self._facet_cache[key] = out
+            if len(self._facet_cache) > FACET_CACHE_SIZE:
+                self._facet_cache.popitem(last=False)
+            return out
+
+    def top(self, facet, counts, limit=10):
+        """[(key, label, count)] for the largest values of a facet"""
+        ranked = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(k, self.labels.get((facet, k), k), n) for k, n in ranked]
@@ -0,0 +1,212 @@
+# metrics.py - Lightweight in-process instrumentation
+#
+# Counters and histograms with labels, exported in the Prometheus text
+# format on /metrics and summarised on /admin/metrics. /metrics answers an
+# admin session or a bearer token equal to EDIL_METRICS_TOKEN (for
+# Prometheus). EDIL_METRICS_LOCAL=1 also lets in any request from localhost,
+# which is only safe with no reverse proxy on the same host. Set
+# EDIL_METRICS=0 to turn every recording call into an immediate return.
+import os, threading, time
+
+enabled = os.environ.get("EDIL_METRICS", "1") == "1"
+
+# Latency buckets in seconds (1 ms .. 10 s)
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+_lock = threading.Lock()
+_families = {}
+
+
+class Family:
+    def __init__(self, name, kind, help_text, buckets=None):
+        self.name = name
+        self.kind = kind
+        self.help = help_text
+        self.buckets = buckets
+        self.series = {}  # label tuple -> value (counter) or [counts, sum, count]
+
+
+def counter(name, help_text):
+    _families[name] = Family(name, "counter", help_text)
+
+
+def histogram(name, help_text, buckets=TIME_BUCKETS):
+    _families[name] = Family(name, "histogram", help_text, buckets)
+
+
+def gauge(name, help_text):
+    _families[name] = Family(name, "gauge", help_text)
+
+
+# Callables run before every export, to refresh gauges that are sampled
+# rather than recorded as they happen
+collectors = []
+
+
+def inc(name, amount=1, **labels):
+    if not enabled:
+        return
+    fam = _families[name]
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        fam.series[key] = fam.series.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    if not enabled:
+        return
+    fam = _families[name]
+    with _lock:
+        fam.series[tuple(sorted(labels.items()))] = value
+
+
+def observe(name, value, **labels):
+    if not enabled:
+        return
+    fam = _families[name]
+    key = tuple(sorted(labels.items()))
+    with _lock:
+        s = fam.series.get(key)
+        if s is None:
+            s = fam.series[key] = [[0] * len(fam.buckets), 0.0, 0]
+        for i, bound in enumerate(fam.buckets):
+            if value <= bound:
+                s[0][i] += 1
+                break
+        s[1] += value
+        s[2] += 1
+
+
+class timer:
+    """Context manager observing elapsed seconds into a histogram"""
+
+    __slots__ = ("name", "labels", "start")
+
+    def __init__(self, name, **labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter() if enabled else 0.0
+        return self
+
+    def __exit__(self, *exc):
+        if enabled:
+            observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+
+def reset():
+    with _lock:
+        for fam in _families.values():
+            fam.series.clear()
+
+
+# --- Export ---
+def _fmt_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    parts = []
+    for k, v in items:
+        v = str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _fmt_bound(b):
+    return repr(float(b))
+
+
+def _run_collectors():
+    for collect in collectors:
+        try:
+            collect()
+        except Exception as e:
+            print("Metrics collector failed:", e)
+
+
+def render_prometheus():
+    _run_collectors()
+    lines = []
+    with _lock:
+        for fam in _families.values():
+            lines.append(f"# HELP {fam.name} {fam.help}")
+            lines.append(f"# TYPE {fam.name} {fam.kind}")
+            for key, val in sorted(fam.series.items()):
+                if fam.kind != "histogram":
+                    lines.append(f"{fam.name}{_fmt_labels(key)} {val}")
+                    continue
+                counts, total, n = val
+                running = 0
+                for bound, c in zip(fam.buckets, counts):
+                    running += c
+                    lines.append(f"{fam.name}_bucket{_fmt_labels(key, [('le', _fmt_bound(bound))])} {running}")
+                lines.append(f"{fam.name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {n}")
+                lines.append(f"{fam.name}_sum{_fmt_labels(key)} {total}")
+                lines.append(f"{fam.name}_count{_fmt_labels(key)} {n}")
+    return "\n".join(lines) + "\n"
+
+
+def _quantile(buckets, counts, n, q):
+    if not n:
+        return 0.0
+    target = q * n
+    running = 0
+    for bound, c in zip(buckets, counts):
+        running += c
+        if running >= target:
+            return bound
+    return float("inf")
+
+
+def summary():
+    """Rows for the admin page: one per series, with p50/p99 for histograms"""
+    _run_collectors()
+    rows = []
+    with _lock:
+        for fam in _families.values():
+            for key, val in sorted(fam.series.items()):
+                labels = ", ".join(f"{k}={v}" for k, v in key)
+                if fam.kind != "histogram":
+                    rows.append({"name": fam.name, "labels": labels, "kind": fam.kind, "count": val})
+                    continue
+                counts, total, n = val
+                rows.append({
+                    "name": fam.name, "labels": labels, "kind": "histogram", "count": n,
+                    "mean": total / n if n else 0.0,
+                    "p50": _quantile(fam.buckets, counts, n, 0.5),
+                    "p99": _quantile(fam.buckets, counts, n, 0.99),
+                })
+    return rows
+
+
+# --- Portal metric families ---
+histogram("edil_request_seconds", "Request latency by route")
+counter("edil_requests_total", "Requests by route and status")
+histogram("edil_save_lock_wait_seconds", "Time spent waiting for the save lock")
+histogram("edil_data_lock_wait_seconds", "Time spent waiting for the cross-worker data lock")
+histogram("edil_save_seconds", "Duration of save_data")
+histogram("edil_save_bytes", "Bytes written per save_data", SIZE_BUCKETS)
+counter("edil_save_failures_total", "save_data failures")
+histogram("edil_snapshot_seconds", "Time to capture a data snapshot")
+counter("edil_snapshot_encoded_total", "Records re-encoded by snapshot captures (unchanged ones are reused)")
+counter("edil_save_coalesced_total", "Saves skipped because a newer snapshot was already written")
+histogram("edil_template_render_seconds", "Template render time")
+counter("edil_student_lookups_total", "student_by_id calls")
+counter("edil_student_lookup_scanned_total", "Student records scanned by student_by_id")
+counter("edil_student_lookup_memo_hits_total", "student_by_id calls answered from the per-request memo")
+counter("edil_listing_scanned_total", "Internships scanned by listing filters")
+counter("edil_admission_rejected_total", "Requests rejected by admission control, by class and reason")
+histogram("edil_admission_wait_seconds", "Time admitted requests waited for an in-flight slot")
+gauge("edil_startup_seconds", "Startup time by phase (load, warm, freeze)")
+gauge("edil_process_memory_bytes", "Memory of this process: rss, pss and uss (unique to it)")
+gauge("edil_gc_frozen_objects", "Objects moved to the permanent GC generation before forking")
+counter("edil_duplicate_registrations_total", "Registrations or email changes refused because the email is taken")
+histogram("edil_duplicate_report_seconds", "Time to build the admin duplicate-students report")
+histogram("edil_similar_query_seconds", "Time to answer a similar-items query")
+histogram("edil_reload_seconds", "Time to diff data.json and apply the changed records")
+counter("edil_reload_records_total", "Records added, changed or deleted by reloads, by source (edit or worker)")
+counter("edil_reload_failures_total", "Edits to data.json that could not be applied")
+histogram("edil_archive_seconds", "Duration of an archive sweep")
+counter("edil_archived_total", "Records moved to the archive, by kind (internship or notification)")
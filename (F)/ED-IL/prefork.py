@@ -0,0 +1,141 @@
+# prefork.py - Load the dataset once and share it with forked workers
+#
+# With EDIL_PRELOAD=1 (the gunicorn.conf.py default) gunicorn.conf.py calls
+# enable() and app.py is imported in the gunicorn master, so data.json is
+# parsed and indexed once. The workers forked from it start with the whole
+# dataset in copy-on-write pages. To keep those pages shared:
+#   - begin() disables the collector while the master loads, so no garbage
+#     is freed into holes that a worker would later fill (and copy),
+#   - freeze() (just before the first fork) runs one full collection, moves
+#     every surviving object into the permanent generation so the workers'
+#     collections never write to their headers, and gives free heap back to
+#     the OS where glibc's malloc_trim is available,
+#   - after_fork() turns the collector back on in each worker.
+# Nothing here happens unless enable() was called: under `python app.py`,
+# uvicorn or the tests no hook would turn the collector back on, so setting
+# EDIL_PRELOAD there has no effect. Anything that opens a file handle or
+# connection while the master loads must reopen it after the fork (see
+# Archive._conn and SQLiteStore._conn, which check the pid).
+# Reference counting still dirties the pages of records a worker touches, so
+# hot records end up copied; the bulk of a large dataset stays shared.
+#
+# memory() reads /proc/<pid>/smaps_rollup (Linux): rss, pss and uss, the
+# memory unique to that process. `python prefork.py <master pid>` prints it
+# for the master and each worker.
+import ctypes, ctypes.util, gc, os, sys, time
+from contextlib import contextmanager
+
+import metrics
+
+enabled = False     # set by enable(), from gunicorn.conf.py
+
+_phases = {}        # startup phase -> seconds
+_frozen = False
+
+
+def enable():
+    """Called by gunicorn.conf.py when the app is preloaded in its master"""
+    global enabled
+    enabled = True
+
+
+def begin():
+    if enabled:
+        gc.disable()
+
+
+@contextmanager
+def phase(name):
+    """Time one startup step (reported by report() and on /metrics)"""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases[name] = _phases.get(name, 0.0) + time.perf_counter() - t0
+
+
+def _malloc_trim():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+        return bool(libc.malloc_trim(0))
+    except (OSError, AttributeError):
+        return False
+
+
+def freeze():
+    """Collect, freeze and trim once, right before the first worker is forked"""
+    global _frozen
+    if _frozen:
+        return
+    with phase("freeze"):
+        gc.collect()
+        gc.freeze()
+        _malloc_trim()
+    _frozen = True
+
+
+def after_fork():
+    if enabled:
+        gc.enable()
+
+
+def memory(pid="self"):
+    """{'rss', 'pss', 'uss'} in bytes, or {} where smaps_rollup is unavailable"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            fields = {}
+            for line in f:
+                name, _, rest = line.partition(":")
+                parts = rest.split()
+                if len(parts) == 2 and parts[1] == "kB":
+                    fields[name] = int(parts[0]) * 1024
+    except OSError:
+        return {}
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+
+def report(label="startup"):
+    """One log line with the startup phases and this process's memory"""
+    steps = ", ".join(f"{k} {v:.2f}s" for k, v in _phases.items())
+    mem = memory()
+    mb = ", ".join(f"{k} {v / 1e6:.0f} MB" for k, v in mem.items())
+    print(f"{label} (pid {os.getpid()}): {steps or 'no phases'}; "
+          f"{gc.get_freeze_count()} objects frozen; {mb or 'memory n/a'}", flush=True)
+
+
+def _collect():
+    for name, seconds in _phases.items():
+        metrics.set_gauge("edil_startup_seconds", seconds, phase=name)
+    for kind, value in memory().items():
+        metrics.set_gauge("edil_process_memory_bytes", value, kind=kind)
+    metrics.set_gauge("edil_gc_frozen_objects", gc.get_freeze_count())
+
+
+metrics.collectors.append(_collect)
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children", "r") as f:
+            return [int(x) for x in f.read().split()]
+    except OSError:
+        return []
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python prefork.py <master pid>")
+    master = int(sys.argv[1])
+    total = {"rss": 0, "pss": 0, "uss": 0}
+    print(f"{'pid':>8} {'role':<7} {'rss MB':>8} {'pss MB':>8} {'uss MB':>8}")
+    for pid in [master] + _children(master):
+        mem = memory(pid)
+        if not mem:
+            continue
+        for k in total:
+            total[k] += mem[k]
+        role = "master" if pid == master else "worker"
+        print(f"{pid:>8} {role:<7} {mem['rss'] / 1e6:>8.1f} {mem['pss'] / 1e6:>8.1f} {mem['uss'] / 1e6:>8.1f}")
+    # PSS adds up to the real footprint: shared pages are split between sharers
+    print(f"{'total':>8} {'':<7} {total['rss'] / 1e6:>8.1f} {total['pss'] / 1e6:>8.1f} {total['uss'] / 1e6:>8.1f}")
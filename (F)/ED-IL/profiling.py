@@ -0,0 +1,147 @@
+# profiling.py - On-demand request profiling
+#
+# A request is profiled when an admin adds ?_profile=1 to the URL, or when
+# it falls into the sampled percentage set on /admin/profiles. Each profiled
+# request runs under cProfile plus a stack sampler thread, and the result is
+# kept in a bounded ring of recent profiles. Admins can download a profile as
+# a pstats file (python -m pstats, snakeviz) or as collapsed stacks
+# (flamegraph.pl, speedscope).
+import cProfile, collections, itertools, marshal, math, os, random, sys, threading, time
+
+RING_SIZE = int(os.environ.get("EDIL_PROFILE_RING", "50"))
+SAMPLE_INTERVAL = 0.001  # seconds between stack samples
+
+sample_percent = 0.0
+
+_ring = collections.deque(maxlen=RING_SIZE)
+_ring_lock = threading.Lock()
+_ids = itertools.count(1)
+# cProfile can only be active once per thread; one profiled request per thread
+_active = threading.local()
+
+
+def set_sample_percent(value):
+    """Clamp to 0..100; ValueError for text that is not a finite number (nan would sample everything)"""
+    global sample_percent
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError("sample percent must be a finite number: %r" % (value,))
+    sample_percent = max(0.0, min(100.0, value))
+
+
+set_sample_percent(os.environ.get("EDIL_PROFILE_SAMPLE", "0"))
+
+
+def sampled():
+    """Whether this request falls into the sampled percentage"""
+    return sample_percent > 0 and random.random() * 100 < sample_percent
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack into collapsed-stack counts"""
+
+    def __init__(self, target_ident, interval=SAMPLE_INTERVAL):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.target = target_ident
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        while not self._halt.wait(self.interval):
+            frame = sys._current_frames().get(self.target)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+
+class Session:
+    def __init__(self):
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.start = time.perf_counter()
+
+    def begin(self):
+        self.sampler.start()
+        self.profiler.enable()
+
+    def finish(self, **meta):
+        self.profiler.disable()
+        self.sampler.stop()
+        self.profiler.create_stats()
+        entry = dict(meta)
+        entry.update({
+            "id": next(_ids),
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "duration_ms": (time.perf_counter() - self.start) * 1000,
+            "stats": self.profiler.stats,
+            "collapsed": dict(self.sampler.counts),
+            "samples": sum(self.sampler.counts.values()),
+        })
+        with _ring_lock:
+            _ring.append(entry)
+        return entry
+
+
+def start():
+    """Begin profiling the current request; returns None if one is running"""
+    if getattr(_active, "session", None) is not None:
+        return None
+    try:
+        session = Session()
+        session.begin()
+    except ValueError:  # another profiler is already active on this thread
+        return None
+    _active.session = session
+    return session
+
+
+def finish(session, **meta):
+    _active.session = None
+    return session.finish(**meta)
+
+
+def recent():
+    with _ring_lock:
+        return list(reversed(_ring))
+
+
+def get(pid):
+    with _ring_lock:
+        for entry in _ring:
+            if entry["id"] == pid:
+                return entry
+    return None
+
+
+def clear():
+    with _ring_lock:
+        _ring.clear()
+
+
+def pstats_bytes(entry):
+    """Marshalled stats dict: the same format cProfile's dump_stats writes"""
+    return marshal.dumps(entry["stats"])
+
+
+def collapsed_text(entry):
+    return "".join(f"{stack} {n}\n" for stack, n in sorted(entry["collapsed"].items()))
+
+
+def top_functions(entry, limit=15):
+    """Heaviest functions by cumulative time, for the admin table"""
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, callers) in entry["stats"].items():
+        rows.append({"func": f"{func} ({os.path.basename(filename)}:{line})", "calls": nc,
+                     "tottime_ms": tt * 1000, "cumtime_ms": ct * 1000})
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:limit]
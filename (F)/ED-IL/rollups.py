@@ -0,0 +1,140 @@
+# rollups.py - Precomputed application time series for admin charts
+#
+# Applications and allocation selections are counted into hourly and daily
+# buckets as they happen, per internship, company and skill (plus an "all"
+# total), so a chart reads one small series instead of walking every
+# application on each page view. The counters are rebuilt from the stored
+# timestamps when data.json is loaded:
+#   - each application's time is kept in it["app_times"], aligned with
+#     it["app_ids"]; applications saved before that field existed have no
+#     time and are left out of the series,
+#   - selections are dated by the allocation run that made them
+#     (it["selected_at"]); re-running an allocation moves the internship's
+#     selections to the new run instead of counting them twice.
+# Hourly buckets older than HOURLY_DAYS are dropped; daily ones are kept.
+import datetime, heapq, threading
+from collections import deque
+
+HOURLY_DAYS = 14
+RECENT = 50
+METRICS = ("applied", "selected")
+DIMENSIONS = ("all", "internship", "company", "skill")
+PRUNE_EVERY = 1000  # additions between sweeps of old hourly buckets
+
+
+def _keys(it):
+    yield "all", ""
+    yield "internship", it.get("id")
+    yield "company", it.get("company") or ""
+    for sk in dict.fromkeys(s.strip().lower() for s in it.get("skills", []) if s and s.strip()):
+        yield "skill", sk
+
+
+def bucket_range(granularity, start, end):
+    """Every bucket label from `start` to `end` (datetimes), oldest first"""
+    if granularity == "hour":
+        step, fmt = datetime.timedelta(hours=1), "%Y-%m-%dT%H"
+        t = start.replace(minute=0, second=0, microsecond=0)
+    else:
+        step, fmt = datetime.timedelta(days=1), "%Y-%m-%d"
+        t = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    out = []
+    while t <= end:
+        out.append(t.strftime(fmt))
+        t += step
+    return out
+
+
+class Rollups:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._series = {}   # (metric, granularity, dim, key) -> {bucket: count}
+            self._totals = {}   # (metric, dim) -> {key: count}
+            self.recent = deque(maxlen=RECENT)  # (time, internship id, student id), newest last
+            self._adds = 0
+
+    def _add(self, metric, it, when, n):
+        if not when or not n:
+            return
+        for dim, key in _keys(it):
+            for granularity, bucket in (("day", when[:10]), ("hour", when[:13])):
+                series = self._series.setdefault((metric, granularity, dim, key), {})
+                count = series.get(bucket, 0) + n
+                if count:
+                    series[bucket] = count
+                else:
+                    series.pop(bucket, None)
+            totals = self._totals.setdefault((metric, dim), {})
+            totals[key] = totals.get(key, 0) + n
+        self._adds += 1
+        if self._adds % PRUNE_EVERY == 0:
+            self._prune()
+
+    def _prune(self):
+        cutoff = (datetime.datetime.utcnow() - datetime.timedelta(days=HOURLY_DAYS)).strftime("%Y-%m-%dT%H")
+        for (metric, granularity, dim, key), series in list(self._series.items()):
+            if granularity == "hour":
+                for bucket in [b for b in series if b < cutoff]:
+                    del series[bucket]
+                if not series:
+                    del self._series[(metric, granularity, dim, key)]
+
+    # --- Maintenance ---
+    def rebuild(self, internships):
+        self.clear()
+        latest = []
+        with self._lock:
+            for it in internships:
+                times = it.get("app_times") or []
+                for i, sid in enumerate(it.get("app_ids", [])):
+                    when = times[i] if i < len(times) else None
+                    self._add("applied", it, when, 1)
+                    # Untimed applications only make the recent list, by posting date
+                    latest.append((when or it.get("created_at") or "", it.get("id"), sid))
+                self._add("selected", it, it.get("selected_at"), len(it.get("selected_ids", [])))
+            self._prune()
+            self.recent.extend(reversed(heapq.nlargest(RECENT, latest, key=lambda r: r[0])))
+
+    def application(self, it, sid, when):
+        with self._lock:
+            self._add("applied", it, when, 1)
+            self.recent.append((when, it.get("id"), sid))
+
+    def allocation(self, it, before, before_at, after, after_at):
+        """An allocation run replaced `before` selections (made at before_at) by `after`"""
+        with self._lock:
+            self._add("selected", it, before_at, -before)
+            self._add("selected", it, after_at, after)
+
+    def replace(self, before, after):
+        """Swap an internship's counts from `before` to `after` (either may be None)"""
+        with self._lock:
+            for it, sign in ((before, -1), (after, 1)):
+                if it is None:
+                    continue
+                times = it.get("app_times") or []
+                for when in times[:len(it.get("app_ids", []))]:
+                    self._add("applied", it, when, sign)
+                self._add("selected", it, it.get("selected_at"), sign * len(it.get("selected_ids", [])))
+
+    # --- Reading ---
+    def series(self, metric, granularity, dim, key, buckets):
+        """Counts for each label in `buckets` (see bucket_range)"""
+        with self._lock:
+            series = self._series.get((metric, granularity, dim, key), {})
+            return [series.get(b, 0) for b in buckets]
+
+    def top(self, metric, dim, n=5):
+        """[(key, total)] with the most events overall"""
+        with self._lock:
+            totals = self._totals.get((metric, dim), {})
+            return heapq.nlargest(n, ((k, v) for k, v in totals.items() if v), key=lambda kv: kv[1])
+
+    def latest(self, n=10):
+        """Newest applications as (time, internship id, student id)"""
+        with self._lock:
+            return list(self.recent)[-n:][::-1]
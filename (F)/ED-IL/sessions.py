@@ -0,0 +1,190 @@
+# sessions.py - Server-side session store
+#
+# The session cookie carries only a random session id; the data lives in a
+# store. Responses only write to the store (and only send Set-Cookie) when
+# the session changed, instead of re-signing the whole session every time.
+#
+#   EDIL_SESSION_BACKEND=sqlite   SQLite file shared by all workers, survives
+#                                 restarts (default)
+#   EDIL_SESSION_BACKEND=memory   in-process LRU: one process only (each worker
+#                                 would have its own), lost on restart; refused
+#                                 when several workers are configured
+#   EDIL_SESSION_BACKEND=cookie   Flask's signed cookie sessions
+#
+# Logging in or out calls regenerate(): the next save moves the data to a new
+# session id and drops the old one, so an id planted before login (session
+# fixation) is worthless afterwards.
+import os, re, secrets, sqlite3, threading, time
+from collections import OrderedDict
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SecureCookieSession, SessionInterface
+
+SID_RE = re.compile(r"^[A-Za-z0-9_-]{43}$")
+TTL = int(os.environ.get("EDIL_SESSION_TTL", str(7 * 24 * 3600)))
+MAX_ENTRIES = int(os.environ.get("EDIL_SESSION_MAX", "100000"))
+
+
+# --- Stores ---
+class MemoryStore:
+    """LRU of sid -> (expires, data) kept in this process"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[sid]
+                return None
+            self._data.move_to_end(sid)
+            return entry[1]
+
+    def save(self, sid, data, ttl):
+        with self._lock:
+            self._data[sid] = (time.time() + ttl, data)
+            self._data.move_to_end(sid)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+
+class SQLiteStore:
+    """Sessions in a SQLite file, so every worker process sees them"""
+
+    PURGE_EVERY = 500  # saves between sweeps of expired rows
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._saves = 0
+
+    def _conn(self):
+        # Opened on first use, per thread and per process: the store is
+        # created in a preloading master, but only the workers use it
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db:
+                db.execute("CREATE TABLE IF NOT EXISTS sessions"
+                           " (sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)")
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def load(self, sid):
+        row = self._conn().execute("SELECT data, expires FROM sessions WHERE sid = ?", (sid,)).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def save(self, sid, data, ttl):
+        with self._conn() as db:
+            db.execute("INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)",
+                       (sid, data, time.time() + ttl))
+            self._saves += 1
+            if self._saves % self.PURGE_EVERY == 0:
+                db.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),))
+
+    def delete(self, sid):
+        with self._conn() as db:
+            db.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+
+def make_store(backend, sqlite_path, processes=1):
+    if backend == "memory":
+        if processes > 1:
+            raise RuntimeError("EDIL_SESSION_BACKEND=memory keeps sessions per process; "
+                               "use sqlite (the default) with several workers")
+        return MemoryStore()
+    if backend == "sqlite":
+        return SQLiteStore(sqlite_path)
+    raise ValueError(f"unknown session backend: {backend}")
+
+
+# --- Flask integration ---
+class ServerSession(SecureCookieSession):
+    def __init__(self, initial=None, sid=None):
+        super().__init__(initial)
+        self.sid = sid
+        self.rotate = False
+
+
+def regenerate(session):
+    """Move the session to a new id when it is next saved (call on login and logout)"""
+    if isinstance(session, ServerSession):
+        session.rotate = True
+        session.modified = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store, ttl=TTL):
+        self.store = store
+        self.ttl = ttl
+
+    def load_value(self, app, value):
+        """Session for a raw cookie value (also used by the ASGI endpoints)"""
+        if value and SID_RE.match(value):
+            raw = self.store.load(value)
+            if raw is not None:
+                try:
+                    return ServerSession(self.serializer.loads(raw), sid=value)
+                except Exception:
+                    pass
+        return ServerSession()
+
+    def store_value(self, app, session):
+        """Persist a session and return the cookie value for it"""
+        sid = getattr(session, "sid", None)
+        if sid and getattr(session, "rotate", False):
+            self.store.delete(sid)
+            sid = None
+        sid = sid or secrets.token_urlsafe(32)
+        self.store.save(sid, self.serializer.dumps(dict(session)), self._ttl(app, session))
+        if isinstance(session, ServerSession):
+            session.sid, session.rotate = sid, False
+        return sid
+
+    def _ttl(self, app, session):
+        if session.get("_permanent"):
+            return int(app.permanent_session_lifetime.total_seconds())
+        return self.ttl
+
+    def open_session(self, app, request):
+        return self.load_value(app, request.cookies.get(self.get_cookie_name(app)))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified and session.sid:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app), httponly=self.get_cookie_httponly(app),
+                                       samesite=self.get_cookie_samesite(app))
+            return
+
+        if not session.modified:
+            return
+        new = session.sid is None or session.rotate
+        sid = self.store_value(app, session)
+        if new or session.permanent:
+            response.set_cookie(name, sid, expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app), domain=domain, path=path,
+                                secure=self.get_cookie_secure(app), samesite=self.get_cookie_samesite(app))
@@ -0,0 +1,96 @@
+# shared_state.py - Cross-process coordination for multi-worker deployments
+#
+# When several worker processes serve the app (e.g. gunicorn -w N), each one
+# holds its own copy of the data. To keep them from overwriting each other:
+#   * every write request runs under an exclusive file lock (single writer),
+#   * each save bumps a data version stored in data.json and mirrored in a
+#     tiny sidecar version file,
+#   * workers stat that version file at the start of a request and reload
+#     data.json when another worker has written a newer version.
+import os, threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class FileLock:
+    """Re-entrant exclusive lock shared by threads and processes"""
+
+    def __init__(self, path):
+        self.path = path
+        self._tlock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._tlock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except Exception:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._tlock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+        self._tlock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def read_version(path):
+    """Current shared data version, or 0 if none was written yet"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def write_version(path, version):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(str(version))
+    os.replace(tmp, path)
+
+
+class VersionWatcher:
+    """Cheap staleness check against the shared version file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = None
+        self._version = 0
+
+    def current(self):
+        # Only re-read the file when its mtime/size changed
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return 0
+        stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._version = read_version(self.path)
+        return self._version
+
+    def is_stale(self, loaded_version):
+        return self.current() > loaded_version
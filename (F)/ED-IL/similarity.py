@@ -0,0 +1,299 @@
+# similarity.py - "Similar internships" / "similar students" beyond exact skill overlap
+#
+# Records become sparse vectors built from our own data, no model download:
+#   - terms: every skill ("s:machine learning") plus the words of the title
+#     ("t:") or education ("e:"), weighted by idf (skills over all records,
+#     title words over internships, education words over students),
+#   - expansion: each skill also adds the NEIGHBOURS skills most associated
+#     with it (ranked by positive PMI of appearing in the same student or
+#     posting, weighted by how often they do), so "django" and "flask" meet
+#     through "python" even when no record lists both.
+# Vectors are L2-normalized and compared by cosine (their dot product).
+# Records with the same skills and words share one vector (a "group"), so
+# the index works per distinct profile rather than per record.
+#
+# Nearest neighbours come from random-projection LSH: TABLES hash tables,
+# each keyed by which side of BITS random hyperplanes a vector falls. Close
+# vectors fall on the same side of most planes, so a query reads TABLES
+# buckets (plus one neighbouring bucket per table, its least certain bit
+# flipped) and ranks at most MAX_CANDIDATES groups exactly, preferring those
+# that share the most buckets with it.
+#
+# Projections without numpy: each term has a random 0/1 pattern over all
+# planes, packed into LANE_BITS-bit lanes of one big int. Summing
+# weight * pattern over a vector's terms is one big-int multiply-add per
+# term; a plane's projection is then twice its lane minus the total weight
+# (pattern 1 = +1, 0 = -1). All weights are positive, so the vectors sit in
+# one corner of the space and planes through the origin would put nearly
+# all of them on the same side: each plane is split at the median
+# projection instead (see _Table.fit).
+#
+# Inserts are incremental (register, post, profile edit). Term statistics
+# keep updating, but stored vectors and plane splits are only recomputed by
+# rebuild() on load.
+import hashlib, heapq, math, struct, threading
+from collections import Counter
+from operator import sub
+
+from fulltext import tokenize
+
+TABLES = 16
+BITS = 10
+PLANES = TABLES * BITS
+LANE_BITS = 16
+QUANT = 1000            # vector weights are rounded to 1/QUANT for the projections
+MAX_CANDIDATES = 600
+EXACT_SCAN = 2000       # tables with up to this many groups are ranked exactly, no LSH
+FIT_SAMPLE = 5000       # vectors sampled to place each plane's split point
+NEIGHBOURS = 3
+MIN_CO = 3              # co-occurrences needed before two skills count as related
+EXPAND = 0.5            # weight of an expanded skill relative to the one listed
+WORD_WEIGHT = 0.5       # title / education words relative to skills
+MAX_SKILLS = 12         # skills per record used for co-occurrence counts
+
+_UNPACK = struct.Struct(f"<{PLANES}H").unpack
+_LANE_BYTES = PLANES * LANE_BITS // 8
+
+
+def _group_key(rec, kind):
+    """(skills, words) of a record: everything its vector is built from"""
+    skills = tuple(sorted({"s:" + s.strip().lower() for s in rec.get("skills", []) if s and s.strip()}))
+    if kind == "internship":
+        return skills, tuple("t:" + w for w in tokenize(rec.get("title")))
+    return skills, tuple("e:" + w for w in tokenize(rec.get("education")))
+
+
+class _Table:
+    """One kind of record (students or internships) in LSH buckets"""
+
+    def __init__(self):
+        self.groups = {}                                # group key -> [vector, bucket keys, member ids]
+        self.group_of = {}                              # record id -> group key
+        self._buckets = [{} for _ in range(TABLES)]     # bucket key -> set of group keys
+        self.thresholds = [0] * PLANES                  # split point of each plane
+
+    def __len__(self):
+        return len(self.group_of)
+
+    def vector(self, rid):
+        g = self.group_of.get(rid)
+        return self.groups[g][0] if g is not None else None
+
+    def fit(self, planes):
+        """Split each plane at the median projection of a sample of vectors"""
+        sample = planes[::max(1, len(planes) // FIT_SAMPLE)]
+        if sample:
+            self.thresholds = [sorted(col)[len(col) // 2] for col in zip(*sample)]
+
+    def probes(self, planes, flipped=True):
+        """Bucket key per table, then (if flipped) each with its least certain bit flipped"""
+        side = list(map(sub, planes, self.thresholds))
+        bits = "".join(["1" if x > 0 else "0" for x in side])
+        keys = [int(bits[t * BITS:(t + 1) * BITS], 2) for t in range(TABLES)]
+        if not flipped:
+            return keys
+        margin = list(map(abs, side))
+        for t in range(TABLES):
+            seg = margin[t * BITS:(t + 1) * BITS]
+            keys.append(keys[t] ^ (1 << (BITS - 1 - seg.index(min(seg)))))
+        return keys
+
+    def add(self, rid, gkey, make):
+        """File record `rid` under group `gkey`; make() gives (vector, planes) for a new group"""
+        if self.group_of.get(rid) == gkey:
+            return
+        self.remove(rid)
+        group = self.groups.get(gkey)
+        if group is None:
+            vec, planes = make()
+            if not vec:
+                return
+            keys = self.probes(planes, flipped=False)
+            group = self.groups[gkey] = [vec, keys, set()]
+            for buckets, k in zip(self._buckets, keys):
+                buckets.setdefault(k, set()).add(gkey)
+        group[2].add(rid)
+        self.group_of[rid] = gkey
+
+    def remove(self, rid):
+        gkey = self.group_of.pop(rid, None)
+        if gkey is None:
+            return
+        group = self.groups[gkey]
+        group[2].discard(rid)
+        if group[2]:
+            return
+        del self.groups[gkey]
+        for buckets, k in zip(self._buckets, group[1]):
+            held = buckets[k]
+            held.discard(gkey)
+            if not held:
+                del buckets[k]
+
+    def candidates(self, keys):
+        """Group keys in the probed buckets (see probes()), at most MAX_CANDIDATES"""
+        if len(self.groups) <= EXACT_SCAN:
+            return set(self.groups)
+        found = [held for held in (self._buckets[i % TABLES].get(k) for i, k in enumerate(keys)) if held]
+        if sum(map(len, found)) <= MAX_CANDIDATES:
+            return set().union(*found)
+        hits = Counter()
+        for held in found:
+            hits.update(held)
+        return {g for g, _ in hits.most_common(MAX_CANDIDATES)}
+
+
+class Similarity:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._patterns = {}     # term -> packed plane pattern
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._df = Counter()        # term -> records containing it
+            self._n = Counter()         # term prefix -> records it is counted over
+            self._co = {}               # skill -> Counter of skills seen with it
+            self._neighbours = {}       # skill -> [(skill, weight)], computed lazily
+            self.tables = {"student": _Table(), "internship": _Table()}
+
+    # --- Term statistics ---
+    def _count(self, gkey, kind, n=1):
+        """Add `n` records with these skills and words to the term statistics"""
+        skills, words = gkey
+        df = self._df
+        for term in skills + tuple(set(words)):
+            df[term] += n
+        self._n["s:"] += n
+        self._n["t:" if kind == "internship" else "e:"] += n
+        skills = skills[:MAX_SKILLS]
+        for s in skills:
+            row = self._co.get(s)
+            if row is None:
+                row = self._co[s] = Counter()
+            for other in skills:
+                if other != s:
+                    row[other] += n
+            self._neighbours.pop(s, None)
+
+    def _idf(self, term):
+        return math.log((self._n[term[:2]] + 1) / (self._df.get(term, 0) + 1)) + 1
+
+    def neighbours(self, skill):
+        """[(skill, weight)] most associated with `skill` ("s:name"), strongest first"""
+        hit = self._neighbours.get(skill)
+        if hit is None:
+            own = self._df.get(skill, 0)
+            scored = []
+            for other, n in self._co.get(skill, {}).items():
+                if n < MIN_CO:
+                    continue
+                pmi = math.log(n * self._n["s:"] / (own * self._df.get(other, 1)))
+                if pmi > 0:
+                    scored.append((pmi, other, n / own))
+            hit = self._neighbours[skill] = [(o, w) for _, o, w in heapq.nlargest(NEIGHBOURS, scored)]
+        return hit
+
+    # --- Vectors ---
+    def _vector(self, gkey):
+        skills, words = gkey
+        vec = {}
+        for s in skills:
+            w = self._idf(s)
+            vec[s] = vec.get(s, 0.0) + w
+            for other, assoc in self.neighbours(s):
+                vec[other] = vec.get(other, 0.0) + EXPAND * assoc * w
+        for word in words:
+            vec[word] = vec.get(word, 0.0) + WORD_WEIGHT * self._idf(word)
+        norm = math.sqrt(sum(w * w for w in vec.values()))
+        return {t: w / norm for t, w in vec.items()} if norm else {}
+
+    def vector(self, rec, kind):
+        """Normalized {term: weight} of a student or internship"""
+        return self._vector(_group_key(rec, kind))
+
+    def _pattern(self, term):
+        p = self._patterns.get(term)
+        if p is None:
+            bits = int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=PLANES // 8).digest(), "little")
+            p = 0
+            for i in range(PLANES):
+                if bits >> i & 1:
+                    p |= 1 << (i * LANE_BITS)
+            self._patterns[term] = p
+        return p
+
+    def _planes(self, vec):
+        """Projection of `vec` on each random plane (scaled by QUANT)"""
+        # A lane must hold the whole weight sum; unit vectors with very many
+        # terms are scaled down to fit
+        scale = min(QUANT, ((1 << LANE_BITS) - 1) / sum(vec.values()))
+        acc, total = 0, 0
+        for term, w in vec.items():
+            q = int(w * scale)
+            acc += q * self._pattern(term)
+            total += q
+        return [2 * x - total for x in _UNPACK(acc.to_bytes(_LANE_BYTES, "little"))]
+
+    def _made(self, gkey):
+        vec = self._vector(gkey)
+        return vec, self._planes(vec) if vec else None
+
+    # --- Maintenance ---
+    def rebuild(self, students, internships):
+        with self._lock:
+            self.clear()
+            keyed = []
+            for kind, records in (("student", students), ("internship", internships)):
+                gkeys = [_group_key(rec, kind) for rec in records]
+                counts = Counter(gkeys)
+                for gkey, n in counts.items():
+                    self._count(gkey, kind, n)
+                keyed.append((kind, records, gkeys, counts))
+            for kind, records, gkeys, counts in keyed:
+                made = {gkey: self._made(gkey) for gkey in counts}
+                table = self.tables[kind]
+                table.fit([planes for _, planes in made.values() if planes])
+                for rec, gkey in zip(records, gkeys):
+                    table.add(rec["id"], gkey, lambda g=gkey: made[g])
+
+    def add(self, rec, kind):
+        """Index a new or changed record (kind: "student" or "internship")"""
+        gkey = _group_key(rec, kind)
+        with self._lock:
+            if rec["id"] not in self.tables[kind].group_of:
+                self._count(gkey, kind)
+            self.tables[kind].add(rec["id"], gkey, lambda: self._made(gkey))
+
+    def remove(self, rec, kind):
+        with self._lock:
+            self.tables[kind].remove(rec["id"])
+
+    # --- Queries ---
+    def similar(self, rec, kind, target, k=10):
+        """[(id, score)] of the `target` kind records closest to `rec`, best first"""
+        with self._lock:
+            table = self.tables[target]
+            own = rec.get("id") if kind == target else None
+            vec = table.vector(own) if own is not None else None
+            if vec is None:
+                skills, words = _group_key(rec, kind)
+                # Titles and education share few words; across kinds only skills compare
+                vec = self._vector((skills, words if kind == target else ()))
+            if not vec:
+                return []
+            found = table.candidates(table.probes(self._planes(vec)))
+            groups, items = table.groups, list(vec.items())
+            scored = [(sum([w * other[t] for t, w in items if t in other]), g)
+                      for g in found for other in (groups[g][0],)]
+            scored.sort(key=lambda sg: sg[0], reverse=True)
+            out = []
+            for score, g in scored:
+                if score <= 0:
+                    break
+                for rid in sorted(groups[g][2]):
+                    if rid != own:
+                        out.append((rid, round(score, 4)))
+                        if len(out) == k:
+                            return out
+            return out
@@ -0,0 +1,96 @@
+# skill_bits.py - Bitset skill matching primitives
+#
+# Every skill name gets a stable bit position in a shared vocabulary, so a
+# list of skills becomes one Python int. Overlap between a student and an
+# internship is then a single AND plus a popcount instead of building two
+# fresh sets per comparison.
+#
+# Names match exactly, as the set comparisons this replaced did: "Python"
+# and "python" are two skills for allocation and the AI dashboard. Student
+# recommendations compared lowercased names; fold=True gives that mask (the
+# lowercased spellings are registered in the same vocabulary).
+import threading
+
+# Skill vocabulary: name -> bit position, and bit -> name
+_vocab = {}
+_labels = []
+_vocab_lock = threading.Lock()
+
+# Precomputed masks of the indexed (live) students and internships, keyed by
+# (kind, record id) -> (skills list, mask, folded mask). A hit needs the very
+# same skills list, so copies sharing it (dict(rec)) hit and any other copy
+# is computed afresh; only index_record() adds entries.
+_masks = {}
+
+
+def skill_id(name):
+    """Return the bit position for a skill, registering it if new"""
+    bit = _vocab.get(name)
+    if bit is None:
+        with _vocab_lock:
+            bit = _vocab.get(name)
+            if bit is None:
+                bit = len(_labels)
+                _labels.append(name)
+                _vocab[name] = bit
+    return bit
+
+
+def skill_mask(skills, fold=False):
+    """Build a bitset from a list of skill names (lowercased first with fold)"""
+    mask = 0
+    for sk in skills or []:
+        if sk and sk.strip():
+            mask |= 1 << skill_id(sk.lower() if fold else sk)
+    return mask
+
+
+def mask_skills(mask):
+    """List the skill labels set in a bitset, in vocabulary order"""
+    out = []
+    while mask:
+        low = mask & -mask
+        out.append(_labels[low.bit_length() - 1])
+        mask ^= low
+    return out
+
+
+def popcount(mask):
+    return mask.bit_count()
+
+
+def overlap_count(a, b):
+    """Number of shared skills between two bitsets"""
+    return (a & b).bit_count()
+
+
+# --- Per-record cache ---
+def index_record(rec, kind):
+    """(Re)compute and cache the skill bitsets of a live student or internship"""
+    skills = rec.get("skills", [])
+    mask = skill_mask(skills)
+    if rec.get("id") is not None:
+        _masks[(kind, rec["id"])] = (skills, mask, skill_mask(skills, fold=True))
+    return mask
+
+
+def record_mask(rec, kind, fold=False):
+    """Skill bitset of a record: cached if it is indexed, else computed"""
+    skills = rec.get("skills", [])
+    hit = _masks.get((kind, rec.get("id")))
+    if hit is not None and hit[0] is skills:
+        return hit[2 if fold else 1]
+    return skill_mask(skills, fold)
+
+
+def forget_record(rec, kind):
+    _masks.pop((kind, rec.get("id")), None)
+
+
+def rebuild(students, internships):
+    """Reset the per-record cache after a full data (re)load"""
+    _masks.clear()
+    for rec in students:
+        index_record(rec, "student")
+    for rec in internships:
+        index_record(rec, "internship")
@@ -0,0 +1,150 @@
+# snapshot.py - Versioned copy-on-write snapshots of the portal data
+#
+# Request threads keep changing students and internships (applies append,
+# notifications append) while data.json is being written. Instead of
+# serialising the live lists, a save first captures a Snapshot: every record
+# frozen into its encoded JSON text, which nothing can change afterwards.
+#
+#   - Every record has a generation. Writers call touch(rec) after changing
+#     a record, while still holding its stripe lock.
+#   - A record whose generation (and, for internships, the generations of
+#     the embedded application records) is unchanged since the last capture
+#     reuses its frozen text, so a capture only encodes what changed.
+#   - A changed record is encoded under its stripe lock, so a capture never
+#     sees a writer's update half done.
+#   - The frozen texts kept between captures are capped at CACHE_MB of JSON;
+#     records past the cap are simply encoded again by every capture. Removed
+#     records are forgotten (forget(), and each capture drops what is no
+#     longer in the lists).
+#
+# Writing a snapshot to disk, or rendering from it, then needs no lock at all
+# while writers carry on.
+#
+# data.json is written one record per line (it used to be indent=2): a save
+# streams the frozen texts as they are, and hot reload (datawatch.py) diffs
+# the file line by line. To edit it by hand, pretty-print it first
+# (python -m json.tool); any valid JSON loads, and the next save writes this
+# layout again.
+import itertools, json, os, threading
+
+CACHE_MB = float(os.environ.get("EDIL_SNAPSHOT_CACHE_MB", "64"))
+
+_tick = itertools.count(1)
+_gens = {}          # id(record) -> generation of its last change
+_frozen = {}        # list name -> {id(record): (record, generation key, json text)}
+_capture_lock = threading.Lock()
+
+
+def touch(rec):
+    """Record that `rec` changed (call after the change, under its lock)"""
+    _gens[id(rec)] = next(_tick)
+
+
+def tick():
+    """A new generation; every capture started after this call is newer"""
+    return next(_tick)
+
+
+def reset():
+    """Forget all frozen records (after the lists were reloaded from disk)"""
+    with _capture_lock:
+        _frozen.clear()
+        _gens.clear()
+
+
+def forget(rec, nested=None):
+    """Drop what is kept for a record that left the lists"""
+    with _capture_lock:
+        for cache in _frozen.values():
+            cache.pop(id(rec), None)
+        _gens.pop(id(rec), None)
+        for x in (rec.get(nested) or ()) if nested else ():
+            _gens.pop(id(x), None)
+
+
+def _key(rec, nested):
+    gen = _gens.get(id(rec), 0)
+    if not nested:
+        return gen
+    return (gen,) + tuple(_gens.get(id(x), 0) for x in rec.get(nested) or ())
+
+
+def encode(rec):
+    """A record's text as written to data.json (one line)"""
+    return json.dumps(rec, ensure_ascii=False)
+
+
+class Snapshot:
+    """Immutable view of the data lists as of one generation"""
+
+    def __init__(self, seq, parts, ids, encoded):
+        self.seq = seq
+        self.encoded = encoded  # records that had to be re-encoded for this capture
+        self._parts = parts     # [(name, tuple of json texts)]
+        self._ids = ids         # name -> tuple of record ids, aligned with the texts
+
+    def names(self):
+        return [name for name, _ in self._parts]
+
+    def count(self, name):
+        return len(dict(self._parts)[name])
+
+    def records(self, name):
+        """Fresh (private) copies of the records of one list, in order"""
+        for text in dict(self._parts)[name]:
+            yield json.loads(text)
+
+    def texts(self, name):
+        """(json text, record id) of each record of one list, in order"""
+        return zip(dict(self._parts)[name], self._ids[name])
+
+    def write(self, f, version):
+        """Write the data.json document, one record per line"""
+        f.write('{"version": %d' % version)
+        for name, texts in self._parts:
+            f.write(',\n"%s": [' % name)
+            if texts:
+                f.write("\n")
+                f.write(",\n".join(texts))
+                f.write("\n")
+            f.write("]")
+        f.write("}\n")
+
+
+def capture(sources):
+    """Snapshot of `sources`: [(name, records, lock_for(rec) or None, nested key or None)]"""
+    with _capture_lock:
+        seq = next(_tick)
+        parts = []
+        ids = {}
+        encoded = 0
+        budget = CACHE_MB * 1024 * 1024
+        live = set()
+        for name, records, lock_for, nested in sources:
+            cache = _frozen.get(name, {})
+            fresh = {}
+            texts, rids = [], []
+            for rec in list(records):
+                live.add(id(rec))
+                if nested:
+                    live.update(id(x) for x in rec.get(nested) or ())
+                hit = cache.get(id(rec))
+                if hit is None or hit[0] is not rec or hit[1] != _key(rec, nested):
+                    if lock_for is None:
+                        hit = (rec, _key(rec, nested), encode(rec))
+                    else:
+                        with lock_for(rec):
+                            hit = (rec, _key(rec, nested), encode(rec))
+                    encoded += 1
+                if budget >= len(hit[2]):
+                    budget -= len(hit[2])
+                    fresh[id(rec)] = hit
+                texts.append(hit[2])
+                rids.append(rec.get("id"))
+            _frozen[name] = fresh
+            parts.append((name, tuple(texts)))
+            ids[name] = tuple(rids)
+        # In place: a touch() racing with this must not be lost for a live record
+        for key in [k for k in _gens if k not in live]:
+            _gens.pop(key, None)
+        return Snapshot(seq, parts, ids, encoded)
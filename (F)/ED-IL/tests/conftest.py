@@ -0,0 +1,73 @@
+# conftest.py - Shared fixtures for the portal tests
+#
+# The modules are imported from the ED-IL directory as the app does. app.py
+# reads its data file (and puts its session, archive and change-feed files
+# next to it) when it is imported, so EDIL_DATA_FILE points into a scratch
+# directory before that happens. sample_data is a small data set built with
+# the make_student / make_internship factories; the `portal` fixture writes
+# it there and reloads it.
+import json, os, sys, tempfile
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+_scratch = tempfile.mkdtemp(prefix="edil-tests-")
+os.environ.setdefault("EDIL_DATA_FILE", os.path.join(_scratch, "data.json"))
+os.environ.setdefault("EDIL_WATCH", "1")
+os.environ.setdefault("EDIL_ARCHIVE_INTERVAL", "0")
+os.environ.setdefault("EDIL_SESSION_BACKEND", "memory")
+
+
+def _student(sid, name, email, skills, education="BTech"):
+    return {"id": sid, "name": name, "email": email, "education": education, "skills": skills,
+            "resume": None, "notifications": [], "notifications_unread": 0}
+
+
+def _internship(iid, company, title, skills, apps=()):
+    """A posting; `apps` are the applicants' records, copied in as data.json keeps them"""
+    return {"id": iid, "company": company, "title": title, "skills": skills, "openings": 1,
+            "apps": [dict(s) for s in apps], "app_ids": [s["id"] for s in apps], "selected_ids": [],
+            "created_at": "2025-10-24T06:08:47"}
+
+
+@pytest.fixture
+def make_student():
+    return _student
+
+
+@pytest.fixture
+def make_internship():
+    return _internship
+
+
+@pytest.fixture
+def sample_data():
+    """Four students (1 and 3 are the same person) and two postings, newest first"""
+    students = [
+        _student(1, "Ameya Kulkarni", "ameya@example.in", ["Python", "Flask", "SQL"]),
+        _student(2, "Bob Mathew", "bob@example.com", ["Java", "Spring"]),
+        _student(3, "Ameya Kulkarni", "Ameya+jobs@Example.in", ["Python", "Flask"]),
+        _student(4, "Chitra Rao", "chitra@example.org", ["Figma", "UI Design"], education="BDes"),
+    ]
+    return {
+        "version": 1,
+        "students": students,
+        "internships": [
+            _internship(2, "Pixel", "UI Design Intern", ["Figma", "UI Design"], apps=[students[3]]),
+            _internship(1, "Acme", "Python Developer", ["Python", "Flask"], apps=[students[0], students[2]]),
+        ],
+        "blogs": [],
+    }
+
+
+@pytest.fixture
+def portal(sample_data):
+    """app.py with sample_data loaded from its data file"""
+    import app
+
+    with open(app.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump(sample_data, f)
+    app.load_data()
+    return app
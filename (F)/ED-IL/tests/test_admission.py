@@ -0,0 +1,68 @@
+import pytest
+
+import admission
+
+
+@pytest.fixture
+def client(portal, monkeypatch):
+    monkeypatch.setattr(admission, "enabled", True)
+    return portal.app.test_client()
+
+
+def test_token_bucket_refuses_past_the_burst():
+    buckets = admission.TokenBuckets(rate=0.5, burst=2)
+    assert buckets.take("a") == 0.0 and buckets.take("a") == 0.0
+    assert buckets.take("a") == pytest.approx(2.0, abs=0.01)
+    assert buckets.take("b") == 0.0
+
+
+def test_gate_bounds_requests_in_flight():
+    gate = admission.Gate(1, 0.0)
+    assert gate.enter() and not gate.enter()
+    gate.leave()
+    assert gate.enter()
+
+
+def test_rate_limit_is_off_by_default(client, monkeypatch):
+    monkeypatch.setitem(admission._buckets, "search", admission.TokenBuckets(0.5, 1))
+    assert all(client.get("/skill_suggest?q=py").status_code == 200 for _ in range(3))
+
+
+def test_rate_limited_client_gets_429_with_retry_after(client, monkeypatch):
+    monkeypatch.setattr(admission, "rate_limited", True)
+    monkeypatch.setitem(admission._buckets, "search", admission.TokenBuckets(0.5, 2))
+    assert client.get("/skill_suggest?q=py").status_code == 200
+    assert client.get("/skill_suggest?q=pyt").status_code == 200
+    r = client.get("/skill_suggest?q=pyth")
+    assert r.status_code == 429 and r.headers["Retry-After"] == "2"
+    assert r.get_json()["ok"] is False
+    # Buckets are per client: a logged-in student has their own
+    with client.session_transaction() as sess:
+        sess["current_student_id"] = 1
+    assert client.get("/skill_suggest?q=py").status_code == 200
+
+
+@pytest.mark.parametrize("klass, request_args", [
+    ("write", ("post", "/apply_ajax", {"json": {"iid": 1}})),
+    ("search", ("get", "/skill_suggest?q=py", {})),
+])
+def test_full_gate_sheds_with_503(client, monkeypatch, klass, request_args):
+    gate = admission.Gate(1, 0.0)
+    monkeypatch.setitem(admission._gates, klass, gate)
+    method, url, kwargs = request_args
+    assert gate.enter()  # another request holds the only slot
+    r = getattr(client, method)(url, **kwargs)
+    assert r.status_code == 503 and r.headers["Retry-After"] == "1"
+
+    gate.leave()
+    assert getattr(client, method)(url, **kwargs).status_code == 200
+    # The slot is given back when a request finishes
+    assert getattr(client, method)(url, **kwargs).status_code == 200
+
+
+def test_page_views_are_never_shed(client, monkeypatch):
+    gate = admission.Gate(1, 0.0)
+    monkeypatch.setitem(admission._gates, "search", gate)
+    gate.enter()
+    assert client.get("/internships").status_code == 200
+    assert client.get("/internships?search=python").status_code == 503
@@ -0,0 +1,53 @@
+import datetime
+
+import archive
+
+
+def _posting(portal, iid):
+    return portal.listing_index.by_id[iid]
+
+
+def test_viewing_allocations_changes_nothing(portal):
+    it = _posting(portal, 1)
+    before = dict(it)
+    r = portal.app.test_client().get("/allocate/1")
+    assert r.status_code == 200
+    assert it == before and archive.state(it) == "open"
+
+
+def test_run_selects_and_moves_open_postings_on(portal):
+    it = _posting(portal, 1)
+    r = portal.app.test_client().post("/allocate/1", data={"action": "run"})
+    assert r.status_code == 302
+    assert it["selected_ids"] == [1] and it["selected_at"]
+    assert archive.state(it) == "allocated"
+
+
+def test_run_leaves_a_closed_posting_closed(portal):
+    it = _posting(portal, 1)
+    portal.set_internship_state(it, "closed")
+    portal.app.test_client().post("/allocate/1", data={"action": "run"})
+    assert it["selected_ids"] == [1]
+    assert archive.state(it) == "closed"
+
+
+def test_feedback_does_not_rerun_the_allocation(portal):
+    it = _posting(portal, 1)
+    client = portal.app.test_client()
+    client.post("/allocate/1", data={"feedback": "More SQL", "student_name": "Ameya Kulkarni"})
+    assert "selected_at" not in it
+    assert it["feedbacks"][0]["feedback"] == "More SQL"
+
+
+def test_apply_targets_the_same_posting_after_an_archive_sweep(portal):
+    # Posting 2 sits first in the list; archiving it shifts posting 1 to position 0
+    portal.set_internship_state(_posting(portal, 2), "closed")
+    portal.archive_cold(now=datetime.datetime.utcnow() + datetime.timedelta(days=portal.ARCHIVE_DAYS + 1))
+    assert [it["id"] for it in portal.internships] == [1]
+
+    client = portal.app.test_client()
+    with client.session_transaction() as sess:
+        sess["current_student_id"] = 2
+    assert client.post("/apply_ajax", json={"iid": 1}).get_json()["status"] == "ok"
+    assert 2 in _posting(portal, 1)["app_ids"]
+    assert client.post("/apply_ajax", json={"iid": 2}).status_code == 404
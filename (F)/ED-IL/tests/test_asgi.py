@@ -0,0 +1,41 @@
+import asyncio, json, threading
+
+import pytest
+
+
+@pytest.fixture
+def asgi(portal):
+    import asgi
+    return asgi
+
+
+def _call(asgi, method, path, query=b"", body=b""):
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(msg):
+        sent.append(msg)
+
+    scope = {"type": "http", "method": method, "path": path, "query_string": query, "headers": []}
+    asyncio.run(asgi.application(scope, receive, send))
+    return sent[0]["status"], json.loads(b"".join(m.get("body", b"") for m in sent[1:]))
+
+
+def test_native_reads_run_off_the_event_loop(asgi, monkeypatch):
+    threads = []
+
+    def suggest(q):
+        threads.append(threading.current_thread().name)
+        return ["Python"]
+
+    monkeypatch.setattr(asgi.portal, "suggest_skills", suggest)
+    assert _call(asgi, "GET", "/skill_suggest", b"q=py") == (200, {"suggestions": ["Python"]})
+    assert threads and threads[0].startswith("edil-asgi")
+
+
+def test_native_login_and_counts(asgi):
+    assert _call(asgi, "POST", "/login_student", body=b'{"sid": 2}') == (200, {"ok": True})
+    assert _call(asgi, "POST", "/login_student", body=b'{"sid": 99}') == (404, {"ok": False})
+    assert _call(asgi, "GET", "/api/notifications/unread_count") == (200, {"unread": 0})
@@ -0,0 +1,37 @@
+import json, os
+
+import pytest
+
+import assets
+
+
+@pytest.fixture
+def static(tmp_path, monkeypatch):
+    root = tmp_path / "static"
+    (root / "css").mkdir(parents=True)
+    (root / "css" / "style.css").write_text("body {\n  color: red;\n}\n/* note */\n")
+    (root / "img.svg").write_text("<svg/>")
+    monkeypatch.setattr(assets, "STATIC_DIR", str(root))
+    monkeypatch.setattr(assets, "DIST_DIR", str(root / "dist"))
+    monkeypatch.setattr(assets, "MANIFEST", str(root / "dist" / "manifest.json"))
+    monkeypatch.setattr(assets, "_manifest", {})
+    assets.build()
+    return root
+
+
+def test_manifest_records_content_hashes(static):
+    manifest = json.loads((static / "dist" / "manifest.json").read_text())
+    assert manifest["sources"]["img.svg"] == assets._digest(b"<svg/>")
+    assert manifest["files"]["css/style.css"].startswith("css/style.")
+    assert (static / "dist" / (manifest["files"]["css/style.css"] + ".gz")).exists()
+
+
+def test_touched_files_keep_the_build(static):
+    os.utime(static / "css" / "style.css", (1, 1))
+    assert "css/style.css" in assets.init()
+
+
+def test_edited_files_drop_the_build(static):
+    (static / "img.svg").write_text("<SVG/>")  # same size, new content
+    os.utime(static / "img.svg", (1, 1))
+    assert assets.init() == {}
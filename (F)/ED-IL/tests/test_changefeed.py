@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import changefeed
+
+
+@pytest.fixture
+def log(tmp_path):
+    return changefeed.ChangeLog(str(tmp_path / "changes.jsonl"), memory_events=4)
+
+
+def test_events_keep_only_references_and_field_names(log):
+    log.emit("create", "application", "1:3", {"internship": 1, "student": 3, "note": "hello"})
+    log.emit("update", "student", 3, {"email": "a@example.in", "skills": ["Go"], "merged_into": 1})
+    log.emit("delete", "student", 4)
+
+    (create, update, delete), more = log.since(0, 10)
+    assert not more
+    assert create["data"] == {"internship": 1, "student": 3} and "fields" not in create
+    assert update["data"] == {"merged_into": 1} and update["fields"] == ["email", "skills"]
+    assert "data" not in delete and [e["seq"] for e in (create, update, delete)] == [1, 2, 3]
+    with open(log.path, encoding="utf-8") as f:
+        text = f.read()
+    assert "a@example.in" not in text and "hello" not in text
+
+
+def test_since_pages_through_memory_and_file(log):
+    for i in range(1, 11):
+        log.emit("update", "student", i, {"name": "x"})
+    page, more = log.since(0, 4)  # older than the 4 kept in memory: read from the file
+    assert [e["seq"] for e in page] == [1, 2, 3, 4] and more
+    page, more = log.since(4, 4)
+    assert [e["seq"] for e in page] == [5, 6, 7, 8] and more
+    page, more = log.since(8, 4)
+    assert [e["seq"] for e in page] == [9, 10] and not more
+    assert log.since(10, 4) == ([], False)
+
+
+def test_other_processes_see_appended_events(log):
+    other = changefeed.ChangeLog(log.path)
+    log.emit("delete", "internship", 7)
+    assert other.latest() == 1
+    assert other.emit("delete", "internship", 8) == 2
+    assert [e["id"] for e in log.since(0, 10)[0]] == [7, 8]
+
+
+def test_trimmed_cursor_must_reset(log, monkeypatch):
+    monkeypatch.setattr(changefeed, "MAX_EVENTS", 6)
+    monkeypatch.setattr(changefeed, "KEEP_EVENTS", 3)
+    for i in range(1, 8):
+        log.emit("delete", "student", i)
+    with open(log.path, encoding="utf-8") as f:
+        assert [json.loads(line)["seq"] for line in f] == [5, 6, 7]
+    assert log.since(0, 10) is None
+    assert log.since(3, 10) is None
+    assert [e["seq"] for e in log.since(4, 10)[0]] == [5, 6, 7]
+
+
+@pytest.fixture
+def feed(portal, log, monkeypatch):
+    monkeypatch.setattr(portal, "changes", log)
+    return portal.app.test_client()
+
+
+def test_api_needs_an_admin_or_the_token(feed, monkeypatch):
+    r = feed.get("/api/changes")
+    assert r.status_code == 401 and "changes" not in r.get_json()
+
+    monkeypatch.setenv("EDIL_CHANGES_TOKEN", "s3cret")
+    assert feed.get("/api/changes", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert feed.get("/api/changes", headers={"Authorization": "Bearer s3cret"}).status_code == 200
+
+
+def test_api_pages_and_resets(feed, log, monkeypatch):
+    with feed.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    for i in range(1, 6):
+        log.emit("update", "student", i, {"name": "x"})
+
+    body = feed.get("/api/changes?since=0&limit=3").get_json()
+    assert [e["seq"] for e in body["changes"]] == [1, 2, 3] and body["more"] and body["next"] == 3
+    body = feed.get(f"/api/changes?since={body['next']}&limit=3").get_json()
+    assert [e["seq"] for e in body["changes"]] == [4, 5] and not body["more"] and body["next"] == 5
+    assert feed.get("/api/changes?since=x").status_code == 400
+
+    monkeypatch.setattr(changefeed, "MAX_EVENTS", 6)
+    monkeypatch.setattr(changefeed, "KEEP_EVENTS", 2)
+    log.emit("delete", "student", 6)
+    log.emit("delete", "student", 7)
+    r = feed.get("/api/changes?since=0")
+    assert r.status_code == 410 and r.get_json() == {"reset": True, "latest": 7}
@@ -0,0 +1,90 @@
+import io, json, types
+
+import datawatch
+import snapshot
+
+
+def _written(data):
+    snapshot.reset()
+    snap = snapshot.capture([(name, data[name], None, None) for name in datawatch.LISTS])
+    buf = io.StringIO()
+    snap.write(buf, data["version"])
+    return snap, buf.getvalue()
+
+
+def _edit(text, sid, change):
+    """Apply change(record) to student `sid`'s line; None deletes the line"""
+    out, in_students = [], False
+    for line in text.split("\n"):
+        if line.startswith(('"', ']')):
+            in_students = line.startswith('"students"')
+        elif in_students and line.startswith('{"id": %d,' % sid):
+            comma = line.endswith(",")
+            rec = change(json.loads(line.rstrip(",")))
+            if rec is None:
+                continue
+            line = snapshot.encode(rec) + ("," if comma else "")
+        out.append(line)
+    return "\n".join(out)
+
+
+def _rename(rec):
+    rec["name"] = "Bob M."
+    return rec
+
+
+def test_one_line_edit_and_deletion(sample_data, tmp_path, monkeypatch):
+    snap, text = _written(sample_data)
+    text = _edit(_edit(text, 2, _rename), 3, lambda rec: None)
+    path = tmp_path / "data.json"
+    path.write_text(text, encoding="utf-8")
+
+    parsed = []
+    monkeypatch.setattr(datawatch, "json", types.SimpleNamespace(
+        loads=lambda s: parsed.append(s) or json.loads(s)))
+    _, version, lists = datawatch.read(str(path))
+    bases = datawatch.base_from_snapshot(snap)
+    added, updated, deleted, base = datawatch.diff(lists["students"], bases["students"])
+
+    assert version == 1
+    assert added == [] and deleted == {3}
+    assert [(rec["id"], rec["name"]) for rec in updated] == [(2, "Bob M.")]
+    assert len(parsed) == 1  # only the edited line
+    assert sorted(base.values()) == [1, 2, 4]
+    assert datawatch.diff(lists["internships"], bases["internships"])[1:3] == ([], set())
+
+
+def test_records_created_since_the_save_are_kept(sample_data):
+    data = sample_data
+    snap, text = _written(data)
+    _, lines = datawatch.split_lines(text)
+    base = datawatch.base_from_snapshot(snap)["students"]
+    base[hash("not on disk")] = 99
+    entries = [(hash(line), line, None) for line in lines["students"]]
+    assert datawatch.diff(entries, base)[2] == {99}
+    # An id never in the base (created in memory after the save) is not deleted
+    del base[hash("not on disk")]
+    assert datawatch.diff(entries, base)[2] == set()
+
+
+def test_unknown_layout_is_parsed_whole(sample_data, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text(json.dumps(sample_data, indent=2), encoding="utf-8")
+    _, version, lists = datawatch.read(str(path))
+    assert version == 1
+    assert [rec["id"] for _, line, rec in lists["students"] if line is None] == [1, 2, 3, 4]
+
+
+def test_reload_applies_an_edit_and_a_deletion(portal):
+    portal.save_data()
+    with open(portal.DATA_FILE, encoding="utf-8") as f:
+        text = f.read()
+    with open(portal.DATA_FILE, "w", encoding="utf-8") as f:
+        f.write(_edit(_edit(text, 2, _rename), 4, lambda rec: None))
+
+    assert portal.reload_changes()
+    assert [(s["id"], s["name"]) for s in portal.students] == [
+        (1, "Ameya Kulkarni"), (2, "Bob M."), (3, "Ameya Kulkarni")]
+    assert portal.student_by_id(4) is None
+    # Applied edits are saved back, so the file is our own again
+    assert not portal._data_watch.changed()
@@ -0,0 +1,74 @@
+import hashlib, io
+
+import dedupe
+
+
+def _stable_hash(value):
+    return int.from_bytes(hashlib.blake2b(repr(value).encode(), digest_size=8).digest(), "little")
+
+
+def test_normalize_email_drops_case_and_tag():
+    assert dedupe.normalize_email(" A.B+x@Mail.com ") == "a.b@mail.com"
+    assert dedupe.normalize_email("no-at-sign") is None
+
+
+def test_claim_email_refuses_a_taken_address(sample_data):
+    index = dedupe.DuplicateIndex()
+    index.rebuild(sample_data["students"])
+    assert index.claim_email("BOB+other@example.com", 9) == 2
+    assert index.claim_email("new@example.com", 9) is None
+    assert index.claim_email("new@example.com", 10) == 9
+
+
+def test_report_groups_duplicates_only(sample_data, make_student, monkeypatch):
+    # Signatures use the per-process salted str hash; pin it so LSH recall is not a coin toss
+    monkeypatch.setattr(dedupe, "hash", _stable_hash, raising=False)
+    records = {s["id"]: s for s in sample_data["students"]}
+    records[5] = make_student(5, "Chitra Rao", "chitra@example.com", ["Figma", "UI design"], education="BDes")
+    index = dedupe.DuplicateIndex()
+    index.rebuild(records.values())
+
+    groups = index.report(records.get)
+    assert [g["ids"] for g in groups] == [[1, 3], [4, 5]]
+    assert groups[0]["pairs"][0][3] == "email"
+    assert groups[1]["pairs"][0][3] == "similar"
+
+
+def test_remove_forgets_email_and_buckets(sample_data):
+    records = {s["id"]: s for s in sample_data["students"]}
+    index = dedupe.DuplicateIndex()
+    index.rebuild(records.values())
+    index.remove(records[3])
+    assert index.by_email("ameya@example.in") == {1}
+    assert 3 not in index.candidates(records[1])
+    assert index.report(records.get) == []
+
+
+def test_merge_students_moves_applications(portal):
+    keep, drop = portal.student_by_id(1), portal.student_by_id(3)
+    drop["notifications"] = [{"id": "n1", "time": "2025-10-25T00:00:00", "read": False}]
+    portal.merge_students(keep, drop)
+
+    assert portal.student_by_id(3) is None
+    posting = next(it for it in portal.internships if it["id"] == 1)
+    assert posting["app_ids"] == [1]
+    assert keep["notifications_unread"] == 1
+    assert portal.duplicates.report(portal.student_by_id) == []
+
+
+def test_failed_registration_gives_the_email_back(portal, monkeypatch):
+    def broken_upload(student, f):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(portal, "save_resume", broken_upload)
+    client = portal.app.test_client()
+    form = {"name": "Dev Shah", "email": "dev@example.com", "education": "BSc", "skills": "Go"}
+    r = client.post("/student/register", data=dict(form, resume=(io.BytesIO(b"%PDF-1.4"), "cv.pdf")))
+    assert r.status_code == 500
+    assert portal.duplicates.by_email("dev@example.com") == set()
+
+    monkeypatch.undo()
+    r = client.post("/student/register", data=form)
+    assert r.status_code == 302 and r.location.endswith("/student/dashboard")
+    sid = next(s["id"] for s in portal.students if s["email"] == "dev@example.com")
+    assert portal.duplicates.by_email("Dev+x@Example.com") == {sid}
@@ -0,0 +1,86 @@
+import csv, io, secrets, zipfile
+import xml.etree.ElementTree as ET
+
+import pytest
+
+import exports
+
+NS = {"x": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+@pytest.fixture
+def admin(portal):
+    client = portal.app.test_client()
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    return client
+
+
+@pytest.mark.parametrize("value", ["=1+1", "+1", "-1", "@SUM(A1)", "\t=1", "\r=1"])
+def test_formula_prefixes_are_escaped(value):
+    assert exports._cell(value) == "'" + value
+
+
+def test_plain_values_are_left_alone():
+    assert [exports._cell(v) for v in ("Ameya", "a=b", "", 5, -3, None)] == ["Ameya", "a=b", "", 5, -3, None]
+
+
+def test_csv_export_quotes_formula_names(portal, admin):
+    portal.student_by_id(2)["name"] = '=HYPERLINK("http://evil.example","x")'
+    r = admin.get("/admin/export/students.csv")
+    assert r.status_code == 200 and r.mimetype == "text/csv"
+    text = r.get_data(as_text=True)
+    assert text.startswith("﻿")
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert tuple(rows[0]) == exports.STUDENT_COLUMNS
+    bob = next(row for row in rows[1:] if row[0] == "2")
+    assert bob[1] == '\'=HYPERLINK("http://evil.example","x")'
+    assert bob[2] == "bob@example.com"
+
+
+def test_csv_export_needs_an_admin(portal):
+    r = portal.app.test_client().get("/admin/export/students.csv")
+    assert r.status_code == 302 and r.location.endswith("/admin/login")
+
+
+def _sheet_rows(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.testzip() is None
+        assert set(zf.namelist()) == {"[Content_Types].xml", "_rels/.rels", "xl/_rels/workbook.xml.rels",
+                                      "xl/workbook.xml", "xl/worksheets/sheet1.xml"}
+        workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+        sheet = ET.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+    name = workbook.find("x:sheets/x:sheet", NS).get("name")
+    rows = []
+    for row in sheet.findall("x:sheetData/x:row", NS):
+        cells = []
+        for c in row.findall("x:c", NS):
+            if c.get("t") == "inlineStr":
+                cells.append(c.find("x:is/x:t", NS).text or "")
+            else:
+                cells.append(float(c.find("x:v", NS).text))
+        rows.append(cells)
+    return name, rows
+
+
+def test_xlsx_export_is_a_workbook(portal, admin):
+    portal.student_by_id(1)["name"] = "A <b> & \x01C"
+    r = admin.get("/admin/export/applications.xlsx")
+    assert r.status_code == 200 and r.mimetype.endswith("spreadsheetml.sheet")
+    name, rows = _sheet_rows(r.get_data())
+    assert name == "Applications"
+    assert tuple(rows[0]) == exports.APPLICATION_COLUMNS
+    assert sorted((row[0], row[3], row[7]) for row in rows[1:]) == [
+        (1.0, 1.0, "pending"), (1.0, 3.0, "pending"), (2.0, 4.0, "pending")]
+    # Text is escaped and control characters dropped; numbers stay numbers
+    assert "A <b> & C" in [row[4] for row in rows[1:]]
+
+
+def test_xlsx_streams_in_several_chunks(monkeypatch):
+    monkeypatch.setattr(exports, "FLUSH_ROWS", 100)
+    words = [secrets.token_hex(64) for _ in range(2000)]  # incompressible, so deflate emits as it goes
+    chunks = list(exports.xlsx_stream(("n", "word"), enumerate(words), sheet="Numbers"))
+    assert len(chunks) > 3
+    name, rows = _sheet_rows(b"".join(chunks))
+    assert name == "Numbers" and rows[0] == ["n", "word"]
+    assert len(rows) == 2001 and rows[-1] == [1999.0, words[-1]]
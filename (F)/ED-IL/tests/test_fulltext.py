@@ -0,0 +1,61 @@
+import pytest
+
+import fulltext
+
+
+@pytest.fixture
+def index():
+    idx = fulltext.Index()
+    idx.add(1, "Python developer python scripting")
+    idx.add(2, "Python developer for the data team with pandas numpy sql airflow dbt spark")
+    idx.add(3, "Java developer spring")
+    idx.add(4, "IT support intern, IS or OR graduates")
+    return idx
+
+
+def test_bm25_ranks_by_frequency_length_and_rarity(index):
+    # More occurrences in a shorter document rank first
+    assert [key for key, _ in index.search("python ")] == [1, 2]
+    # "developer" is in three documents, so "spring" carries the ranking
+    ranked = index.search("developer spring ")
+    assert [key for key, _ in ranked] == [3]
+    scores = index.scores("developer ")
+    assert scores.keys() == {1, 2, 3} and scores[3] > scores[2]
+    assert index.search("spring ")[0][1] > scores[3]
+
+
+def test_every_word_must_match(index):
+    assert index.keys("python java ") == set()
+    assert index.keys("python pandas ") == {2}
+
+
+def test_last_word_is_a_prefix_while_typing(index):
+    assert index.keys("pyth") == {1, 2}
+    assert index.keys("pyth ") == set()
+
+
+def test_index_follows_changes(index):
+    index.add(3, "Python developer")
+    assert index.keys("python ") == {1, 2, 3} and index.keys("java ") == set()
+    index.remove(1)
+    assert [key for key, _ in index.search("python ")][0] != 1 and 1 not in index
+
+
+@pytest.mark.parametrize("word", ["it", "is", "or"])
+def test_field_names_are_not_stopwords(index, word):
+    assert word not in fulltext.STOPWORDS
+    assert index.keys(word + " ") == {4}
+
+
+def test_stopword_only_queries_are_not_searchable(index):
+    assert fulltext.tokenize("The data, for you") == ["data"]
+    assert not fulltext.searchable("the for and")
+    assert index.scores("the for ") == {}
+
+
+def test_stopword_query_falls_back_to_substring_match(portal):
+    portal.listing_index.by_id[2]["title"] = "Design at the Studio"
+    assert fulltext.searchable("python")
+    assert set(portal._search_scores("the")) == {2}
+    r = portal.app.test_client().get("/internships?search=the")
+    assert b"Design at the Studio" in r.data and b"Acme Python Developer" not in r.data
@@ -0,0 +1,95 @@
+import pytest
+
+from listing_index import ListingIndex, duration_buckets, parse_duration, parse_location, structure_record
+
+
+@pytest.mark.parametrize("text, months", [
+    ("12 months", 12.0), ("12-month", 12.0), ("1 year", 12.0), ("3-6 months", 6.0),
+    ("2 to 3 months", 3.0), ("6 weeks", 1.38), ("10 wks", 2.31), (4, 4.0), ("", None), ("flexible", None),
+])
+def test_parse_duration(text, months):
+    assert parse_duration(text) == months
+
+
+def test_twelve_months_is_not_a_short_internship():
+    assert duration_buckets(parse_duration("12 months")) == ["6+"]
+    assert duration_buckets(parse_duration("1 month")) == ["1-3"]
+    assert duration_buckets(3.0) == ["1-3", "3-6"] and duration_buckets(None) == []
+
+
+def test_parse_location():
+    assert parse_location("Remote") == ("remote", None)
+    assert parse_location("Pune (Hybrid)") == ("hybrid", "Pune")
+    assert parse_location("Bengaluru") == ("onsite", "Bengaluru")
+    assert parse_location(None) == (None, None)
+
+
+@pytest.fixture
+def postings(make_internship):
+    def posting(iid, company, skills, duration, location):
+        it = make_internship(iid, company, f"{company} intern", skills)
+        it.update(duration=duration, location=location)
+        return structure_record(it)
+    return [posting(1, "Acme", ["Python", "SQL"], "12 months", "Pune"),
+            posting(2, "Pixel", ["Figma"], "2 months", "Remote"),
+            posting(3, "Acme", ["python"], "3 months", "Remote")]
+
+
+@pytest.fixture
+def index(postings):
+    idx = ListingIndex()
+    idx.rebuild(postings)
+    return idx
+
+
+def test_filters_intersect(index):
+    assert index.query() is None
+    assert index.query(duration="1-3") == {2, 3}
+    assert index.query(location="remote", skill="Python ") == {3}
+    assert index.query(city="pune") == {1}
+    assert index.query(min_months=3, max_months=6) == {3}
+
+
+def test_facet_counts_follow_add_update_and_delete(index, postings, make_internship):
+    counts = index.facet_counts({})
+    assert counts["total"] == 3
+    assert counts["duration"] == {"1-3": 2, "3-6": 1, "6+": 1}
+    assert counts["skill"] == {"python": 2, "sql": 1, "figma": 1}
+    assert counts["company"] == {"acme": 2, "pixel": 1}
+    # A facet is counted without its own filter, against the others
+    remote = index.facet_counts({"location": "remote"})
+    assert remote["total"] == 2 and remote["location"] == {"remote": 2, "onsite": 1}
+    assert remote["company"] == {"acme": 1, "pixel": 1}
+
+    new = structure_record(dict(make_internship(4, "Pixel", "Designer", ["Figma"]), duration="6 months"))
+    index.add(new)
+    counts = index.facet_counts({})
+    assert counts["total"] == 4 and counts["duration"]["3-6"] == 2 and counts["skill"]["figma"] == 2
+
+    old = postings[0]
+    updated = structure_record(dict(old, skills=["Go"], duration="1 month", duration_months=None))
+    index.remove(old)
+    index.add(updated)
+    counts = index.facet_counts({})
+    assert counts["duration"] == {"1-3": 3, "3-6": 2} and "sql" not in counts["skill"]
+    assert counts["skill"]["python"] == 1 and counts["skill"]["go"] == 1
+
+    index.remove(postings[1])
+    counts = index.facet_counts({"duration": "1-3"})
+    assert counts["total"] == 2 and counts["company"] == {"acme": 2}
+    assert index.query(skill="figma") == {4}
+
+
+@pytest.fixture
+def sample_data(sample_data):
+    pixel, acme = sample_data["internships"]
+    pixel["duration"], acme["duration"] = "2 months", "12 months"
+    return sample_data
+
+
+def test_listing_duration_filter(portal):
+    client = portal.app.test_client()
+    r = client.get("/internships?duration=1-3")
+    assert b"UI Design Intern" in r.data and b"Python Developer" not in r.data
+    r = client.get("/internships?duration=6%2B")
+    assert b"Python Developer" in r.data and b"UI Design Intern" not in r.data
@@ -0,0 +1,30 @@
+import metrics
+
+
+def test_metrics_need_an_admin_or_the_token(portal, monkeypatch):
+    client = portal.app.test_client()  # requests come from 127.0.0.1
+    assert client.get("/metrics").status_code == 401
+
+    monkeypatch.setenv("EDIL_METRICS_TOKEN", "s3cret")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    r = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert r.status_code == 200 and b"edil_requests_total" in r.data
+
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    assert client.get("/metrics").status_code == 200
+
+
+def test_local_scrapers_are_trusted_only_when_enabled(portal, monkeypatch):
+    client = portal.app.test_client()
+    monkeypatch.setattr(portal, "METRICS_TRUST_LOCAL", True)
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/metrics", environ_base={"REMOTE_ADDR": "10.0.0.7"}).status_code == 401
+
+
+def test_streamed_responses_are_timed_when_closed(portal):
+    metrics.reset()
+    client = portal.app.test_client()
+    client.get("/internships").close()
+    rows = {(r["name"], r["labels"]): r for r in metrics.summary()}
+    assert rows[("edil_request_seconds", "method=GET, route=internship_listings")]["count"] == 1
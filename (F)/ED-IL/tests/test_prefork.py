@@ -0,0 +1,50 @@
+import gc, os
+
+import pytest
+
+import archive
+import prefork
+import sessions
+
+
+def test_preload_env_alone_keeps_the_collector_on(monkeypatch):
+    monkeypatch.setenv("EDIL_PRELOAD", "1")
+    assert not prefork.enabled
+    prefork.begin()
+    assert gc.isenabled()
+
+
+def test_enable_turns_the_collector_off_until_after_fork(monkeypatch):
+    monkeypatch.setattr(prefork, "enabled", False)
+    prefork.enable()
+    try:
+        prefork.begin()
+        assert not gc.isenabled()
+        prefork.after_fork()
+        assert gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_sqlite_store_opens_nothing_until_used(tmp_path):
+    store = sessions.SQLiteStore(str(tmp_path / "s.sqlite"))
+    assert not os.path.exists(store.path)
+    store.save("a" * 43, "{}", 60)
+    assert store.load("a" * 43) == "{}"
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+@pytest.mark.parametrize("make", [
+    lambda path: sessions.SQLiteStore(path),
+    lambda path: archive.Archive(path),
+])
+def test_forked_workers_open_their_own_connection(tmp_path, make):
+    db = make(str(tmp_path / "db.sqlite"))
+    master_conn = db._conn()  # opened while "preloading"
+    pid = os.fork()
+    if pid == 0:
+        ok = db._conn() is not master_conn and db._conn() is db._conn()
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert db._conn() is master_conn
@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+
+import rollups
+
+
+@pytest.fixture
+def posting(make_internship, make_student):
+    it = make_internship(7, "Acme", "Data Intern", ["Python", " SQL", "python"],
+                         apps=[make_student(i, f"S{i}", f"s{i}@example.com", []) for i in (1, 2, 3)])
+    it["app_times"] = ["2025-11-01T09:15:00", "2025-11-01T17:40:00"]  # the third predates app_times
+    return it
+
+
+def _days(r, metric, dim, key):
+    return r.series(metric, "day", dim, key, ["2025-11-01", "2025-11-02", "2025-11-03"])
+
+
+def test_rebuild_counts_timed_applications(posting):
+    r = rollups.Rollups()
+    r.rebuild([posting])
+    assert _days(r, "applied", "all", "") == [2, 0, 0]
+    # Hourly buckets this old are pruned, daily ones kept
+    assert r.series("applied", "hour", "company", "Acme", ["2025-11-01T09", "2025-11-01T17"]) == [0, 0]
+    assert r.top("applied", "skill") == [("python", 2), ("sql", 2)]
+    # Untimed applications are only listed, by posting date
+    assert [row[2] for row in r.latest()] == [2, 1, 3]
+
+    now = datetime.datetime.utcnow().replace(microsecond=0).isoformat()
+    r.application(posting, 4, now)
+    assert r.series("applied", "hour", "company", "Acme", [now[:13]]) == [1]
+    assert r.latest(1) == [(now, 7, 4)]
+
+
+def test_rerun_moves_selections_to_the_new_run(posting):
+    r = rollups.Rollups()
+    r.rebuild([posting])
+    r.allocation(posting, 0, None, 2, "2025-11-01T10:00:00")
+    assert _days(r, "selected", "internship", 7) == [2, 0, 0]
+    r.allocation(posting, 2, "2025-11-01T10:00:00", 1, "2025-11-03T08:00:00")
+    assert _days(r, "selected", "internship", 7) == [0, 0, 1]
+    assert r.top("selected", "company") == [("Acme", 1)]
+
+
+def test_replace_with_none_drops_a_posting(posting):
+    posting.update(selected_ids=[1], selected_at="2025-11-02T12:00:00")
+    r = rollups.Rollups()
+    r.rebuild([posting])
+    assert _days(r, "selected", "all", "") == [0, 1, 0]
+    r.replace(posting, None)
+    assert _days(r, "applied", "all", "") == [0, 0, 0] and _days(r, "selected", "all", "") == [0, 0, 0]
+    assert r.top("applied", "internship") == [] and r.top("selected", "skill") == []
+
+
+def test_allocation_runs_and_archiving_update_the_charts(portal, monkeypatch):
+    r = portal.application_rollups
+    client = portal.app.test_client()
+    monkeypatch.setattr(portal, "now_iso", lambda: "2025-11-01T10:00:00")
+    client.post("/allocate/1", data={"action": "run"})
+    assert _days(r, "selected", "internship", 1) == [1, 0, 0]
+
+    monkeypatch.setattr(portal, "now_iso", lambda: "2025-11-03T08:00:00")
+    client.post("/allocate/1", data={"action": "run"})
+    assert _days(r, "selected", "internship", 1) == [0, 0, 1]
+    assert r.top("selected", "all") == [("", 1)]
+
+    portal.set_internship_state(portal.listing_index.by_id[1], "closed")
+    moved = portal.archive_cold(now=datetime.datetime(2026, 1, 1))
+    assert moved["internship"] == 1 and 1 not in portal.listing_index.by_id
+    assert _days(r, "selected", "internship", 1) == [0, 0, 0]
+    assert r.top("selected", "company") == []
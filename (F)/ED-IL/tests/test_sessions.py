@@ -0,0 +1,88 @@
+import pytest
+from flask.sessions import SecureCookieSessionInterface
+
+import sessions
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return sessions.make_store(request.param, str(tmp_path / "sessions.sqlite"))
+
+
+@pytest.fixture
+def client(portal, store, monkeypatch):
+    monkeypatch.setattr(portal.app, "session_interface", sessions.ServerSideSessionInterface(store))
+    return portal.app.test_client()
+
+
+def _sid(client):
+    cookie = client.get_cookie("session")
+    return cookie.value if cookie else None
+
+
+def test_login_moves_the_session_to_a_new_id(client, store):
+    # An id planted before login (session fixation)
+    with client.session_transaction() as sess:
+        sess["seen"] = True
+    planted = _sid(client)
+    assert planted and store.load(planted) is not None
+
+    assert client.post("/login_student", json={"sid": 1}).status_code == 200
+    current = _sid(client)
+    assert current != planted
+    assert store.load(planted) is None
+    with client.session_transaction() as sess:
+        assert sess["current_student_id"] == 1 and sess["seen"]
+
+
+def test_logout_moves_the_session_again(client, store):
+    client.post("/login_student", json={"sid": 1})
+    logged_in = _sid(client)
+    client.post("/logout_student")
+    assert _sid(client) != logged_in
+    assert store.load(logged_in) is None
+    with client.session_transaction() as sess:
+        assert "current_student_id" not in sess
+
+
+def test_unchanged_sessions_keep_their_id(client):
+    client.post("/login_student", json={"sid": 1})
+    sid = _sid(client)
+    client.get("/student/dashboard")
+    assert _sid(client) == sid
+
+
+def test_expired_sessions_do_not_load(store):
+    store.save("a" * 43, "{}", -1)
+    store.save("b" * 43, "{}", 60)
+    assert store.load("a" * 43) is None
+    assert store.load("b" * 43) == "{}"
+    store.delete("b" * 43)
+    assert store.load("b" * 43) is None
+
+
+def test_memory_store_evicts_least_recently_used():
+    store = sessions.MemoryStore(max_entries=2)
+    store.save("a", "1", 60)
+    store.save("b", "2", 60)
+    store.load("a")
+    store.save("c", "3", 60)
+    assert (store.load("a"), store.load("b"), store.load("c")) == ("1", None, "3")
+
+
+def test_unknown_or_unsafe_backends_are_refused(tmp_path):
+    with pytest.raises(RuntimeError):
+        sessions.make_store("memory", str(tmp_path / "s.sqlite"), processes=2)
+    with pytest.raises(ValueError):
+        sessions.make_store("redis", str(tmp_path / "s.sqlite"))
+
+
+def test_cookie_backend_logs_in(portal, monkeypatch):
+    monkeypatch.setattr(portal.app, "session_interface", SecureCookieSessionInterface())
+    client = portal.app.test_client()
+    assert client.post("/login_student", json={"sid": 2}).status_code == 200
+    with client.session_transaction() as sess:
+        assert sess["current_student_id"] == 2
+    client.post("/logout_student")
+    with client.session_transaction() as sess:
+        assert "current_student_id" not in sess
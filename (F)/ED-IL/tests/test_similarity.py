@@ -0,0 +1,55 @@
+import pytest
+
+import similarity
+
+
+@pytest.fixture
+def indexed(sample_data, make_internship):
+    """(Similarity over sample_data plus a Java posting, the data)"""
+    d = sample_data
+    d["internships"].append(make_internship(3, "Brew", "Backend Developer", ["Java", "Spring", "SQL"]))
+    index = similarity.Similarity()
+    index.rebuild(d["students"], d["internships"])
+    return index, d
+
+
+def test_nearest_internships_for_a_student(indexed):
+    index, d = indexed
+    ameya, bob, chitra = d["students"][0], d["students"][1], d["students"][3]
+    assert [iid for iid, _ in index.similar(ameya, "student", "internship")][:1] == [1]
+    assert [iid for iid, _ in index.similar(bob, "student", "internship")][:1] == [3]
+    assert [iid for iid, _ in index.similar(chitra, "student", "internship")] == [2]
+
+
+def test_similar_students_exclude_the_query_and_rank_by_score(indexed):
+    index, d = indexed
+    found = index.similar(d["students"][0], "student", "student")
+    assert found[0][0] == 3
+    assert all(sid != 1 for sid, _ in found)
+    scores = [score for _, score in found]
+    assert scores == sorted(scores, reverse=True) and 0 < scores[0] <= 1
+
+
+def test_add_and_remove_are_incremental(indexed, make_student):
+    index, d = indexed
+    newcomer = make_student(5, "Dev Patel", "dev@example.com", ["Figma", "UI Design"], education="BDes")
+    index.add(newcomer, "student")
+    assert [sid for sid, _ in index.similar(d["students"][3], "student", "student")][:1] == [5]
+
+    index.remove(newcomer, "student")
+    assert 5 not in [sid for sid, _ in index.similar(d["students"][3], "student", "student")]
+
+
+def test_record_without_terms_has_no_neighbours(indexed, make_student):
+    index, _ = indexed
+    assert index.similar(make_student(9, "Empty", "e@example.com", [], education=""), "student", "internship") == []
+
+
+def test_lsh_buckets_find_the_same_neighbour(indexed, make_student, monkeypatch):
+    # Past EXACT_SCAN groups only the probed buckets are ranked
+    monkeypatch.setattr(similarity, "EXACT_SCAN", 0)
+    index, d = indexed
+    assert [iid for iid, _ in index.similar(d["students"][0], "student", "internship")][:1] == [1]
+    # Same skills and education: same group, so every bucket is shared
+    index.add(make_student(5, "Asha", "asha@example.com", ["SQL", "flask", "Python"]), "student")
+    assert [sid for sid, _ in index.similar(d["students"][0], "student", "student")][:1] == [5]
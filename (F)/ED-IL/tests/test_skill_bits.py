@@ -0,0 +1,36 @@
+import skill_bits
+
+
+def test_names_match_exactly():
+    a = skill_bits.skill_mask(["Python", "SQL"])
+    b = skill_bits.skill_mask(["python", "SQL", " "])
+    assert skill_bits.mask_skills(a & b) == ["SQL"]
+    assert skill_bits.overlap_count(a, b) == 1
+
+
+def test_fold_matches_any_case():
+    a = skill_bits.skill_mask(["Python", "SQL"], fold=True)
+    b = skill_bits.skill_mask(["python", "PYTHON", "sql"], fold=True)
+    assert sorted(skill_bits.mask_skills(a & b)) == ["python", "sql"]
+    assert b.bit_count() == 2
+
+
+def test_record_masks_are_cached_per_record(make_student):
+    st = make_student(41, "Dev", "dev@example.com", ["Go", "gRPC"])
+    skill_bits.index_record(st, "student")
+    assert skill_bits.record_mask(st, "student") == skill_bits.skill_mask(["Go", "gRPC"])
+    assert skill_bits.record_mask(st, "student", fold=True) == skill_bits.skill_mask(["go", "grpc"])
+    # A different skills list on the same id is not served from the cache
+    assert skill_bits.record_mask(dict(st, skills=["Rust"]), "student") == skill_bits.skill_mask(["Rust"])
+    skill_bits.forget_record(st, "student")
+
+
+def test_allocation_is_exact_and_recommendations_are_not(portal):
+    it = portal.listing_index.by_id[1]  # needs Python, Flask
+    it["apps"][0]["skills"] = ["python", "flask"]  # student 1, lower case
+    portal.app.test_client().post("/allocate/1", data={"action": "run"})
+    assert it["selected_ids"] == [3]
+
+    recs = portal.get_student_recommendations({"id": 50, "skills": ["PYTHON"]})
+    acme = next(r for r in recs if r["iid"] == 1)
+    assert acme["matched_skills"] == ["python"] and acme["match_score"] == 50
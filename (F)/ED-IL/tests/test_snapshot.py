@@ -0,0 +1,74 @@
+import io, json
+
+import datawatch
+import snapshot
+
+
+def _sources(data):
+    return [("students", data["students"], None, None),
+            ("internships", data["internships"], None, "apps"),
+            ("blogs", data["blogs"], None, None)]
+
+
+def test_write_and_reload_round_trip(sample_data):
+    snapshot.reset()
+    data = sample_data
+    data["students"][0]["name"] = "Ämeya \"A\" Kulkarni\n"
+    snap = snapshot.capture(_sources(data))
+    buf = io.StringIO()
+    snap.write(buf, 7)
+    text = buf.getvalue()
+
+    loaded = json.loads(text)
+    assert loaded == dict(data, version=7)
+    assert [list(snap.records(name)) for name in snap.names()] == [data[name] for name in snap.names()]
+    # One record per line, so hot reload can diff it
+    version, lines = datawatch.split_lines(text)
+    assert version == 7
+    assert [json.loads(line) for line in lines["students"]] == data["students"]
+    assert lines["blogs"] == []
+
+
+def test_unchanged_records_are_not_encoded_again(sample_data):
+    snapshot.reset()
+    data = sample_data
+    assert snapshot.capture(_sources(data)).encoded == 6
+    assert snapshot.capture(_sources(data)).encoded == 0
+
+    student, posting = data["students"][1], data["internships"][0]
+    student["skills"].append("Kotlin")
+    snapshot.touch(student)
+    app = {"id": 4}
+    posting["apps"].append(app)
+    snapshot.touch(app)
+    snap = snapshot.capture(_sources(data))
+    assert snap.encoded == 2
+    texts = [text for text, _ in snap.texts("students")]
+    assert json.loads(texts[1])["skills"][-1] == "Kotlin"
+
+
+def test_snapshot_is_not_changed_by_later_writes(sample_data):
+    snapshot.reset()
+    data = sample_data
+    snap = snapshot.capture(_sources(data))
+    data["students"][0]["name"] = "Changed"
+    snapshot.touch(data["students"][0])
+    assert next(snap.records("students"))["name"] == "Ameya Kulkarni"
+
+
+def test_removed_records_are_forgotten(sample_data, monkeypatch):
+    snapshot.reset()
+    data = sample_data
+    snapshot.capture(_sources(data))
+    drop = data["students"].pop()
+    snapshot.touch(drop)
+    snapshot.forget(drop)
+    assert all(id(drop) not in cache for cache in snapshot._frozen.values())
+    assert id(drop) not in snapshot._gens
+
+    # Past the cache budget records are still written, just encoded every time
+    monkeypatch.setattr(snapshot, "CACHE_MB", 0)
+    assert snapshot.capture(_sources(data)).encoded == 0  # last capture's texts, then dropped
+    assert snapshot.capture(_sources(data)).encoded == 5
+    assert snapshot.capture(_sources(data)).encoded == 5
+    assert snapshot._frozen["students"] == {}
@@ -0,0 +1,194 @@
+# uploads.py - Resume storage: streaming, content-addressed, sharded
+#
+# Multipart file parts are streamed by Werkzeug straight into a HashingSpool
+# temp file inside the upload folder, so the SHA-256 and size are known as
+# soon as parsing finishes, without a second read or copy. Stored files are
+# named by their hash and sharded two levels deep:
+#
+#   uploads/3f/a2/3fa2...e9.pdf        the resume itself (deduplicated)
+#   uploads/3f/a2/3fa2...e9.text       extracted plain text (background)
+#
+# Flat legacy names like "4_cv.pdf" in uploads/ keep working.
+import hashlib, os, queue, re, shutil, tempfile, threading, zipfile
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+CHUNK = 64 * 1024
+KEY_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]{1,8}$")
+
+UPLOAD_FOLDER = None
+MAX_FILE_BYTES = 10 * 1024 * 1024
+
+# Callables invoked as listener(key, text) once a resume's text is extracted
+extract_listeners = []
+
+
+def configure(folder, max_file_bytes):
+    global UPLOAD_FOLDER, MAX_FILE_BYTES
+    UPLOAD_FOLDER = folder
+    MAX_FILE_BYTES = max_file_bytes
+    os.makedirs(os.path.join(folder, "tmp"), exist_ok=True)
+
+
+class HashingSpool:
+    """Writable temp file that hashes and size-checks data as it arrives"""
+
+    def __init__(self, folder, limit):
+        self._file = tempfile.NamedTemporaryFile(dir=folder, prefix="up-", delete=True)
+        self._hash = hashlib.sha256()
+        self.size = 0
+        self.limit = limit
+
+    def write(self, data):
+        self.size += len(data)
+        if self.limit and self.size > self.limit:
+            raise RequestEntityTooLarge()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self):
+        return self._hash.hexdigest()
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+def file_stream_factory(total_content_length, content_type, filename=None, content_length=None):
+    """Werkzeug stream factory: spool file parts into the upload folder"""
+    return HashingSpool(os.path.join(UPLOAD_FOLDER, "tmp"), MAX_FILE_BYTES)
+
+
+# --- Storing ---
+def key_path(key):
+    return os.path.join(UPLOAD_FOLDER, *key.split("/"))
+
+
+def _key_for(digest, ext):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def store(file_storage, ext):
+    """Persist an uploaded FileStorage; returns its content-addressed key"""
+    stream = file_storage.stream
+    if isinstance(stream, HashingSpool):
+        digest = stream.hexdigest()
+        src = stream
+    else:
+        # Fallback for streams we did not spool ourselves: copy once, hashing
+        src = HashingSpool(os.path.join(UPLOAD_FOLDER, "tmp"), MAX_FILE_BYTES)
+        while True:
+            chunk = stream.read(CHUNK)
+            if not chunk:
+                break
+            src.write(chunk)
+        digest = src.hexdigest()
+
+    key = _key_for(digest, ext)
+    dest = key_path(key)
+    if not os.path.exists(dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        src.flush()
+        try:
+            os.link(src.name, dest)
+        except OSError:
+            src.seek(0)
+            with open(dest + ".part", "wb") as out:
+                shutil.copyfileobj(src, out, CHUNK)
+            os.replace(dest + ".part", dest)
+        enqueue(key)
+    if src is not stream:
+        src.close()
+    return key
+
+
+def is_key(name):
+    return bool(KEY_RE.match(name or ""))
+
+
+def etag_for(key):
+    return key.rsplit("/", 1)[-1].split(".", 1)[0]
+
+
+# --- Background text extraction ---
+_jobs = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def enqueue(key):
+    global _worker
+    _jobs.put(key)
+    if _worker is None or not _worker.is_alive():
+        with _worker_lock:
+            if _worker is None or not _worker.is_alive():
+                _worker = threading.Thread(target=_run, name="resume-extract", daemon=True)
+                _worker.start()
+
+
+def _run():
+    while True:
+        key = _jobs.get()
+        try:
+            process(key)
+        except Exception as e:
+            print("Failed to process upload", key, e)
+        finally:
+            _jobs.task_done()
+
+
+def text_path(key):
+    return key_path(key).rsplit(".", 1)[0] + ".text"
+
+
+def process(key):
+    out = text_path(key)
+    if os.path.exists(out):
+        return
+    text = extract_text(key_path(key))
+    tmp = out + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, out)
+    for listener in extract_listeners:
+        listener(key, text)
+
+
+def extracted_text(key):
+    try:
+        with open(text_path(key), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def extract_text(path):
+    ext = path.rsplit(".", 1)[-1].lower()
+    if ext == "txt":
+        with open(path, "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+    if ext == "docx":
+        try:
+            with zipfile.ZipFile(path) as z:
+                xml = z.read("word/document.xml").decode("utf-8", errors="replace")
+        except (KeyError, zipfile.BadZipFile):
+            return ""
+        xml = re.sub(r"</w:p>", "\n", xml)
+        return re.sub(r"<[^>]+>", "", xml)
+    if ext == "pdf":
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            PdfReader = None
+        if PdfReader is not None:
+            try:
+                return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+            except Exception:
+                return ""
+        # Without pypdf, fall back to literal strings in uncompressed streams
+        with open(path, "rb") as f:
+            raw = f.read()
+        return " ".join(m.decode("latin-1") for m in re.findall(rb"\(([^()\\]{2,})\)\s*Tj", raw))
+    return ""